@@ -1,6 +1,10 @@
 # src/lamportMessage.py
 
 # LamportMessage class for representing messages with Lamport timestamps in a distributed system.
+import struct
+
+from src import wireCodec
+
 
 class LamportMessage:
   def __init__(self, msg_type, sender_id, receiver_id, timestamp):  # Constructor for the message class
@@ -8,6 +12,9 @@ class LamportMessage:
     self.sender_id = sender_id
     self.receiver_id = receiver_id
     self.timestamp = timestamp
+    # Latency tracing: trace id and stage timestamps (ns), None unless the message is traced
+    self.trace_id = None
+    self.trace = None
 
   def __repr__(self):  # String representation of the message
     return f"[Msg: type={self.msg_type}, N{self.sender_id} -> N{self.receiver_id}, timestamp={self.timestamp}]"
@@ -28,3 +35,24 @@ class LamportMessage:
         'receiver_id': self.receiver_id,
         'timestamp': self.timestamp
     }
+
+  def encode(self):
+    """Encodes the message in the binary wire format."""
+    if self.trace is not None:
+      return (wireCodec.pack_header(wireCodec.KIND_LAMPORT, self.msg_type, self.sender_id, self.receiver_id, wireCodec.FLAG_TRACE) +
+              wireCodec.LAMPORT_BODY.pack(self.timestamp) + wireCodec.pack_trace(self.trace_id, self.trace))
+    return (wireCodec.pack_header(wireCodec.KIND_LAMPORT, self.msg_type, self.sender_id, self.receiver_id) +
+            wireCodec.LAMPORT_BODY.pack(self.timestamp))
+
+  @classmethod
+  def decode(cls, data):
+    """Decodes a message produced by encode()."""
+    _, flags, msg_type, sender_id, receiver_id, offset = wireCodec.unpack_header(data, wireCodec.KIND_LAMPORT)
+    try:
+      (timestamp,) = wireCodec.LAMPORT_BODY.unpack_from(data, offset)
+    except struct.error as e:
+      raise wireCodec.WireFormatError(f"Truncated Lamport message: {e}") from e
+    message = cls(msg_type, sender_id, receiver_id, timestamp)
+    if flags & wireCodec.FLAG_TRACE:
+      message.trace_id, message.trace = wireCodec.unpack_trace(data)
+    return message
@@ -1,62 +1,120 @@
 #!/usr/bin python3
 
 # src/Lamport_timestamps/node.py
+import heapq
+import math
 import sys
-import socket
-import json
+import threading
 
 # autopep8: off
 from src.LogicalNode import LogicalNode
 from src.Lamport_timestamps.lamportMessage import LamportMessage
+from src.wireCodec import MULTICAST_RECEIVER
 
 # autopep8: on
 
+ACK_TYPE = "ACK"  # Message type of the acknowledgements of totally ordered multicast
+
 
 class LamportNode(LogicalNode):
-  def __init__(self, node_Id, known_Nodes, logger):
+  def __init__(self, node_Id, known_Nodes, logger, transport=None, total_order=False):
     self.lamport_Clock = 0  # Initialize Lamport clock
-    super().__init__(node_Id, known_Nodes, logger)
-
-  def listen(self):
-    """Listens for incoming messages and appends them to the message queue."""
-    self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    self.server.bind(("localhost", self.PORT_BASE + self.node_Id))
-    self.server.listen()
-    self.server.settimeout(1.0)
 
-    print(f"Node {self.node_Id} listening on port {self.PORT_BASE + self.node_Id}")
+    # Totally ordered multicast (Lamport's algorithm over FIFO links). Broadcasts
+    # wait in a heap ordered by (timestamp, sender) until every other node sent
+    # something with a timestamp at least as large, after which no earlier
+    # broadcast can still arrive. Any message counts, so broadcasts piggyback
+    # acknowledgements; explicit ACKs go out once per processed batch.
+    self.total_order = total_order
+    self.hold_Back = []  # heap of (timestamp, sender_id, message)
+    self.latest_Seen = {k: 0 for k in known_Nodes if k != node_Id}  # Highest timestamp from each node
+    self.seen_Floor = min(self.latest_Seen.values(), default=math.inf)  # min(latest_Seen)
+    self.floor_Count = len(self.latest_Seen)  # Nodes whose latest timestamp equals seen_Floor
+    self.ack_Pending = False
+    super().__init__(node_Id, known_Nodes, logger, transport)
+    if total_order:
+      self.send_Lock = threading.Lock()  # Receivers rely on each node's messages arriving in timestamp order
+
+  def _decode_message(self, data):
+    """Decodes a LamportMessage from its wire format."""
+    return LamportMessage.decode(data)
+
+  def deliver_message(self, msg):
+    """Applies a received message to the Lamport clock, logs it and handles it.
+
+    In total-order mode a broadcast is held back until it is next in the
+    global order, and every message may release held broadcasts.
+    """
+    self._status = "RECEIVING"
+    with self.state_Lock:
+      if not self.total_order:
+        self._apply_message(msg)
+      else:
+        self.lamport_Clock = max(self.lamport_Clock, msg.timestamp)
+        self._saw(msg.sender_id, msg.timestamp)
+        if msg.msg_type == ACK_TYPE:
+          pass  # Only advances latest_Seen
+        elif msg.receiver_id == MULTICAST_RECEIVER:
+          heapq.heappush(self.hold_Back, (msg.timestamp, msg.sender_id, msg))
+          self.ack_Pending = True
+        else:
+          self._apply_message(msg)  # Unicasts are not part of the total order
+        self._deliver_ordered()
+      self._status = "IDLE"
 
-    while self.is_alive:
+  def _apply_message(self, msg):
+    """Updates the clock for a delivered message, logs and handles it. Caller holds state_Lock."""
+    # Update Lamport clock following Lamport's rules: C = max(C, T) + 1
+    self.lamport_Clock = max(self.lamport_Clock, msg.timestamp) + 1
+    self.logger.record_event(self.node_Id, "RECEIVE_MESSAGE", self.lamport_Clock, details=f"Received {msg.msg_type} from Node {msg.sender_id}", peer_id=msg.sender_id)
+
+    print(f"Node {self.node_Id} updated Lamport clock to {self.lamport_Clock} after receiving message from Node {msg.sender_id}")
+    self.handle_message(msg)
+
+  def _saw(self, sender_id, timestamp):
+    """Records the timestamp of a message from `sender_id` and keeps seen_Floor up to date."""
+    previous = self.latest_Seen[sender_id]
+    if timestamp <= previous:
+      return
+    self.latest_Seen[sender_id] = timestamp
+    if previous == self.seen_Floor:
+      self.floor_Count -= 1
+      if self.floor_Count == 0:  # The last node at the floor moved on, at most once per floor value
+        self.seen_Floor = min(self.latest_Seen.values())
+        self.floor_Count = sum(1 for seen in self.latest_Seen.values() if seen == self.seen_Floor)
+
+  def _deliver_ordered(self):
+    """Delivers held broadcasts from the head of the heap while no earlier one can still arrive."""
+    # FIFO links: every later message from node k has a timestamp above latest_Seen[k]
+    while self.hold_Back and self.hold_Back[0][0] <= self.seen_Floor:
+      _, sender_id, msg = heapq.heappop(self.hold_Back)
+      if sender_id == self.node_Id:
+        self.lamport_Clock += 1
+        self.logger.record_event(self.node_Id, "LOCAL_EVENT", self.lamport_Clock, details=f"Delivered own {msg.msg_type}")
+        self.handle_message(msg)
+      else:
+        self._apply_message(msg)
+
+  def _after_batch(self):
+    """Sends one ACK for all broadcasts received in the batch, unless a broadcast already carried it."""
+    if not self.ack_Pending:
+      return
+    with self._sending():
+      with self.state_Lock:
+        if not self.ack_Pending:
+          return  # A broadcast sent meanwhile carried the acknowledgement
+        self.ack_Pending = False
+        self.lamport_Clock += 1
+        ack = LamportMessage(ACK_TYPE, self.node_Id, MULTICAST_RECEIVER, self.lamport_Clock)
+      targets = list(self.latest_Seen)
+      with self.stats_Lock:
+        self.messages_Sent += len(targets)
       try:
-        conn, _ = self.server.accept()
-        msg = json.loads(conn.recv(1024).decode("utf-8"))
-        conn.close()
-        msg_obj = LamportMessage(msg['msg_type'], msg['sender_id'], msg['receiver_id'], msg['timestamp'])
-        with self.queue_Lock:
-          self._status = "RECEIVING"
-          self.message_Queue.append(msg_obj)
-          self._status = "IDLE"
-      except socket.timeout:
-        continue
-
-  def process_message(self):
-    """Allows the node to process incoming messages and update Lamport clock."""
-    while True:
-      msg = None  # reset msg to None before acquiring lock
-      with self.queue_Lock:
-        if self.message_Queue:
-          msg = self.message_Queue.pop(0)  # Get the first message in the queue
-      if msg:
-        self._status = "RECEIVING"
-        with self.state_Lock:
-          # Update Lamport clock following Lamport's rules: C = max(C, T) + 1
-          self.lamport_Clock = max(self.lamport_Clock, msg.timestamp) + 1
-          self.logger.record_event(self.node_Id, "RECEIVE_MESSAGE", self.lamport_Clock, details=f"Received {msg.msg_type} from Node {msg.sender_id}")
-
-          print(f"Node {self.node_Id} updated Lamport clock to {self.lamport_Clock} after receiving message from Node {msg.sender_id}")
-          self.handle_message(msg)
-          self._status = "IDLE"
+        self._send_multicast(ack, targets)
+      except (ConnectionRefusedError, OSError):
+        with self.stats_Lock:
+          self.messages_Sent -= len(targets)
+        print(f"Node {self.node_Id} failed to send ACK. Simulator may be down.")
 
   def local_event(self):
     """Simulates a local event(non-communication event) and increments Lamport clock."""
@@ -75,20 +133,40 @@ class LamportNode(LogicalNode):
       print(f"Node {self.node_Id} incremented Lamport clock to {self.lamport_Clock} for sending message.")
       return LamportMessage(message_type, self.node_Id, target_Id, self.lamport_Clock)
 
+  def _create_broadcast(self, targets, message_type):
+    """Creates one LamportMessage for all `targets`; in total-order mode it is also queued for this node."""
+    if not self.total_order:
+      return self._create_message(MULTICAST_RECEIVER, message_type)
+    if len(targets) != len(self.latest_Seen):
+      raise ValueError("Totally ordered multicast orders broadcasts to every other node only")
+    with self.state_Lock:
+      self._status = "SENDING"
+      self.lamport_Clock += 1
+      message = LamportMessage(message_type, self.node_Id, MULTICAST_RECEIVER, self.lamport_Clock)
+      heapq.heappush(self.hold_Back, (message.timestamp, self.node_Id, message))
+      self.ack_Pending = False  # The broadcast acknowledges everything received so far
+      return message
+
+  def _broadcast_failed(self, message):
+    """A broadcast that never left is not held back for delivery, and no longer acknowledges anything."""
+    if self.total_order:
+      with self.state_Lock:
+        self.hold_Back.remove((message.timestamp, self.node_Id, message))
+        heapq.heapify(self.hold_Back)
+        self.ack_Pending = True
+
   def status(self):
     print(f" \
               Node {self.node_Id} \n \
               Known Nodes: {self.known_Nodes} \n \
               Lamport Clock: {self.lamport_Clock} \n \
+              Held back: {len(self.hold_Back)} \n \
               Status: {self._status}")
 
   def stop(self):
     """Stops the node's operations."""
-    try:
-      self.server.shutdown(socket.SHUT_RDWR)
-      self.server.close()
-    except Exception as e:
-      pass
+    self.transport.close(self)
+    self._stop_processing()
 
 
 
@@ -121,8 +199,7 @@ if __name__ == "__main__":
 
         try:
           target_id = int(full_cmd[1])
-          message = node._create_message(target_id, "CONTACT")
-          node.send_message(target_id, message)
+          node.send(target_id, "CONTACT")
         except ValueError:
           print("Invalid target node ID.")
 
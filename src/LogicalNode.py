@@ -4,20 +4,20 @@
 
 # Abstract LogicalNode class representing to build the Lamport timestamp and vector clock nodes upon.
 from abc import ABC, abstractmethod
-import socket
+import contextlib
 import sys
 import threading
-import json
-import struct
-import binascii
 
-from regex import D
-
-from src.networkSimulation import SIM_PORT, NODE_PORT_BASE
+from src.networkSimulation import NODE_PORT_BASE
+from src.messageInbox import MessageInbox, BATCH_SIZE
+from src.transport import TcpTransport
+from src.wireCodec import MULTICAST_RECEIVER
+from src.latencyTracing import trace_clock
+from src.threadProfiling import profiled
 
 
 class LogicalNode(ABC):
-  def __init__(self, node_Id, known_Nodes, logger):
+  def __init__(self, node_Id, known_Nodes, logger, transport=None):
     self.node_Id = node_Id
     self.known_Nodes = known_Nodes
     self.PORT_BASE = NODE_PORT_BASE
@@ -27,24 +27,79 @@ class LogicalNode(ABC):
     self.is_alive = True
 
     self._status = "IDLE"
-    self.message_Queue = []
-    self.queue_Lock = threading.Lock()
+    self.message_Queue = MessageInbox()  # Delivered messages waiting for the processor thread
+    # Messages handed to the transport and messages processed, for quiescence detection
+    self.messages_Sent = 0
+    self.messages_Received = 0
+    self.stats_Lock = threading.Lock()
     self.state_Lock = threading.Lock()
+    # Held from stamping a message until the transport has it, by nodes whose
+    # receivers need messages to leave in stamp order; see _sending()
+    self.send_Lock = None
+    self.tracer = None  # LatencyTracer when sent messages are traced, see latencyTracing.py
+    self.profiler = None  # ThreadProfiler of the listener and processor threads, see threadProfiling.py
+
+    # How messages reach the network simulator and how delivered ones come back
+    self.transport = TcpTransport() if transport is None else transport
 
   def start(self):
-    self.listener_thread = threading.Thread(target=self.listen, daemon=True)
-    self.processor_thread = threading.Thread(target=self.process_message, daemon=True)
+    self.listener_thread = threading.Thread(target=profiled(self.profiler, "listener", self.listen), daemon=True)
+    self.processor_thread = threading.Thread(target=profiled(self.profiler, "processor", self.process_message), daemon=True)
     self.listener_thread.start()
     self.processor_thread.start()
 
-  @abstractmethod
   def listen(self):
-    pass
+    """Receives delivered messages through the node's transport."""
+    self.transport.listen(self)
+
+  def enqueue_messages(self, batch):
+    """Appends delivered messages to the message queue in a single step."""
+    if self.tracer is not None:
+      received = trace_clock()
+      for msg in batch:
+        if msg.trace is not None:
+          msg.trace.append(received)
+    self.message_Queue.put_many(batch)
 
   @abstractmethod
+  def _decode_message(self, msg):
+    pass
+
   def process_message(self):
+    """Processor thread: sleeps until messages arrive and delivers them in batches."""
+    while True:
+      batch = self.message_Queue.get_batch(BATCH_SIZE)
+      if not batch:
+        return  # Inbox closed by stop() and drained
+      delivered = 0
+      try:
+        for msg in batch:
+          if self.tracer is not None and msg.trace is not None:
+            self._deliver_traced(msg)
+          else:
+            self.deliver_message(msg)
+          delivered += 1
+        self._after_batch()
+      finally:
+        # Counted after _after_batch() so messages it sends are never missing from messages_Sent
+        self.messages_Received += delivered  # Only the processor thread writes this counter
+        self.message_Queue.task_done(len(batch))
+
+  @abstractmethod
+  def deliver_message(self, msg):
+    pass
+
+  def _after_batch(self):
+    """Called by the processor after each batch of delivered messages."""
     pass
 
+  def _deliver_traced(self, msg):
+    """deliver_message() for a traced message: stamps when processing starts and ends and records the trace."""
+    msg.trace.append(trace_clock())
+    self.deliver_message(msg)
+    msg.trace.append(trace_clock())
+    self.tracer.record(msg.sender_id, self.node_Id, msg.trace)
+
   def handle_message(self, msg):
     """Handles the received messages based on their type."""
     if msg.msg_type == "CONTACT":
@@ -57,34 +112,95 @@ class LogicalNode(ABC):
   def _create_message(self, target_Id, message_type):
     pass
 
+  def send(self, target_id, message_type="CONTACT"):
+    """Stamps a message for `target_id` and sends it, in stamp order with the node's other messages."""
+    with self._sending():
+      self.send_message(target_id, self._create_message(target_id, message_type))
+
   def send_message(self, targetId, message):
+    if self.tracer is not None:
+      self.tracer.start(message, self.node_Id)
     try:
-      self.logger.record_event(self.node_Id, "SEND_MESSAGE",
-                               getattr(self, 'lamport_Clock', getattr(self, 'vector_Clock', None)),
-                               details=f"Sent {message.msg_type} to Node {targetId}")
-      # Build payload from message dict. If this is a vector-clock message
-      # the `vector_clock` may be a Python list; pack to bytes and hex-encode
-      # so JSON remains text-safe and consistent with the listener decoding.
-      payload = message.to_dict()
-      if 'vector_clock' in payload and isinstance(payload['vector_clock'], list):
-        packed = b''.join(struct.pack('!I', int(v)) for v in payload['vector_clock'])
-        payload['vector_clock'] = binascii.hexlify(packed).decode('utf-8')
-
-      s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-      s.connect(("localhost", SIM_PORT))
-      s.sendall(json.dumps(payload).encode("utf-8"))
-      s.close()
+      self._log_send(f"Sent {message.msg_type} to Node {targetId}", targetId)
+      with self.stats_Lock:
+        self.messages_Sent += 1  # Counted before the send so it can never trail the receiver's count
+      self.transport.send(self, message)
       self._status = "IDLE"
 
       print(f"Node {self.node_Id} sent {message.msg_type} to Node {targetId}.")
 
     except (ConnectionRefusedError, OSError):
+      with self.stats_Lock:
+        self.messages_Sent -= 1
       print(f"Node {self.node_Id} failed to send message to Node {targetId}. Simulator may be down.")
 
+  def _log_send(self, details, peer_id):
+    """Logs a send with the node's clock, snapshotted under state_Lock while the processor thread may update it."""
+    with self.state_Lock:
+      self.logger.record_event(self.node_Id, "SEND_MESSAGE",
+                               getattr(self, 'lamport_Clock', getattr(self, 'vector_Clock', None)),
+                               details=details, peer_id=peer_id)
+
+  def _create_broadcast(self, targets, message_type):
+    """Creates the one message a broadcast sends to all `targets`."""
+    return self._create_message(MULTICAST_RECEIVER, message_type)
+
+  def broadcast(self, message_type, targets=None):
+    """Sends a message to every node in `targets`, by default every other known node.
+
+    The clock is stamped and the message serialized once, and the simulator
+    receives a single multicast envelope that it fans out with a delay per
+    link. The send is logged once, with peer_id MULTICAST_RECEIVER.
+    """
+    targets = [k for k in (self.known_Nodes if targets is None else targets) if k != self.node_Id]
+    if not targets:
+      return
+    with self._sending():
+      message = self._create_broadcast(targets, message_type)
+      if self.tracer is not None:
+        self.tracer.start(message, self.node_Id)
+      try:
+        self._log_send(f"Broadcast {message.msg_type} to Nodes {targets}", MULTICAST_RECEIVER)
+        with self.stats_Lock:
+          self.messages_Sent += len(targets)  # One delivery per target
+        self._send_multicast(message, targets)
+        self._status = "IDLE"
+
+        print(f"Node {self.node_Id} broadcast {message.msg_type} to {len(targets)} nodes.")
+
+      except (ConnectionRefusedError, OSError):
+        with self.stats_Lock:
+          self.messages_Sent -= len(targets)
+        self._broadcast_failed(message)
+        print(f"Node {self.node_Id} failed to broadcast {message.msg_type}. Simulator may be down.")
+
+  def _sending(self):
+    """Context held from stamping a message until the transport has it.
+
+    With send_Lock set, no other message of this node is stamped in between, so
+    messages leave in stamp order and a failed broadcast can be rolled back.
+    """
+    return self.send_Lock if self.send_Lock is not None else contextlib.nullcontext()
+
+  def _broadcast_failed(self, message):
+    """Undoes what _create_broadcast() recorded for a broadcast the transport did not take."""
+    pass
+
+  def _send_multicast(self, message, targets):
+    self.transport.multicast(self, message, targets)
+
   @abstractmethod
   def local_event(self):
     pass
 
+  def _stop_processing(self, timeout=1.0):
+    """Closes the inbox and waits for the processor thread to deliver what is left."""
+    self.is_alive = False
+    self.message_Queue.close()
+    processor = getattr(self, "processor_thread", None)
+    if processor is not None and processor is not threading.current_thread():
+      processor.join(timeout)
+
   @abstractmethod
   def stop(self):
     pass
@@ -2,112 +2,173 @@
 
 # src/vector_clocks/node.py
 import sys
-import socket
-import json
-import struct
-import binascii
+import threading
 
 # autopep8: off
 from src.LogicalNode import LogicalNode
 from src.Vector_clocks.vectorMessage import VectorMessage
+from src.Vector_clocks.vectorClock import VectorClock
+from src.wireCodec import MULTICAST_RECEIVER
 
 # autopep8: on
 
 
 class VectorClockNode(LogicalNode):
-  def __init__(self, node_Id, known_Nodes, logger):
-    self.vector_Clock = [0] * len(known_Nodes)  # Initialize vector clock
-    super().__init__(node_Id, known_Nodes, logger)
-
-  def listen(self):
-    """Listens for incoming messages and appends them to the message queue."""
-    self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    self.server.bind(("localhost", self.PORT_BASE + self.node_Id))
-    self.server.listen()
-    self.server.settimeout(1.0)
-
-    print(f"Node {self.node_Id} listening on port {self.PORT_BASE + self.node_Id}")
-
-    while self.is_alive:
-      try:
-        conn, _ = self.server.accept()
-      except socket.timeout:
-        continue
-      except OSError:
-        break
+  def __init__(self, node_Id, known_Nodes, logger, differential=False, transport=None, causal=False):
+    self.vector_Clock = VectorClock(len(known_Nodes))  # Initialize vector clock
+
+    # Singhal-Kshemkalyani differential transmission: only the entries that
+    # changed since the last send to a peer are put on the wire. Requires FIFO
+    # links (see networkSimulator(fifo=True)).
+    self.differential = differential
+    self.last_Update = VectorClock(len(known_Nodes))  # LU[k]: own entry when entry k last changed
+    self.last_Sent = VectorClock(len(known_Nodes))  # LS[j]: own entry at the last send to node j
+
+    # Birman-Schiper-Stephenson (CBCAST) causal delivery of broadcasts. A
+    # message is held back until every broadcast it causally depends on was
+    # delivered here. Held messages are indexed by the (node index, count) of
+    # the one missing broadcast they wait for, so a delivery only looks at the
+    # messages waiting for exactly that broadcast.
+    if causal and differential:
+      raise ValueError("Causal delivery reorders messages and needs full vector clocks")
+    self.causal = causal
+    self.causal_Delivered = [0] * len(known_Nodes)  # Broadcasts of each node delivered, own entry: sent
+    self.hold_Back = {}  # (node index, count) -> [(message, node index to resume the check at)]
+    self.held_Back = 0
+    super().__init__(node_Id, known_Nodes, logger, transport)
+    if causal or differential:
+      # Differential clocks are computed against the last send to each peer, so
+      # they must leave in stamp order; a failed causal broadcast is rolled back
+      # before the next one is counted
+      self.send_Lock = threading.Lock()
+
+  def _decode_message(self, data):
+    """Decodes a VectorMessage from its wire format."""
+    return VectorMessage.decode(data)
+
+  def deliver_message(self, msg):
+    """Merges a received message into the vector clock, logs it and handles it.
+
+    With causal delivery the message may be held back instead, and delivering
+    it may release held messages that depended on it.
+    """
+    self._status = "RECEIVING"
+    with self.state_Lock:
+      if self.causal:
+        self._deliver_causally(msg)
+      else:
+        self._apply_message(msg)
+      self._status = "IDLE"
 
-      try:
-        data = conn.recv(1024)
-        if not data:
-          conn.close()
-          continue
-        msg = json.loads(data.decode("utf-8"))
-        conn.close()
-      except:
-        conn.close()
+  def _deliver_causally(self, msg):
+    """Delivers `msg` and every held message it releases, or holds it back. Caller holds state_Lock."""
+    ready = [(msg, 0)]
+    while ready:
+      msg, start = ready.pop()
+      missing = self._missing_dependency(msg, start)
+      if missing is not None:
+        self.hold_Back.setdefault(missing, []).append((msg, missing[0]))
+        self.held_Back += 1
         continue
-        # Accept either a hex-encoded packed vector clock (preferred) or
-        # a plain Python list (legacy/compatibility). If it's a hex string,
-        # unpack it into integers packed as network-order unsigned ints ('!I').
-      raw_clock_field = msg.get('vector_clock')
-      if isinstance(raw_clock_field, str):
-        try:
-          raw_clock = binascii.unhexlify(raw_clock_field.encode('utf-8'))
-          num_nodes = len(raw_clock) // 4
-          vector_clock = list(struct.unpack('!' + 'I' * num_nodes, raw_clock))
-        except (binascii.Error, struct.error):
-          # Fallback to empty list on decode error
-          vector_clock = []
-      elif isinstance(raw_clock_field, list):
-        # Already a list (older sender), accept directly
-        vector_clock = raw_clock_field
-      else:
-        vector_clock = []
-      msg_obj = VectorMessage(msg['msg_type'], msg['sender_id'], msg['receiver_id'], vector_clock)
-      with self.queue_Lock:
-        self._status = "RECEIVING"
-        self.message_Queue.append(msg_obj)
-        self._status = "IDLE"
-
-  def process_message(self):
-    """Allows the node to process incoming messages and update vector clock."""
-    while True:
-      msg = None  # reset msg to None before acquiring lock
-      with self.queue_Lock:
-        if self.message_Queue:
-          msg = self.message_Queue.pop(0)  # Get the first message in the queue
-      if msg:
-        self._status = "RECEIVING"
-        with self.state_Lock:
-          # Update vector clock
-          self.vector_Clock = [max(vc1, vc2) for vc1, vc2 in zip(self.vector_Clock, msg.vector_clock)]
-          self.vector_Clock[self.node_Id - 1] += 1  # Increment own entry
-
-          # Log the event in the logger
-          self.logger.record_event(self.node_Id, "RECEIVE_MESSAGE", self.vector_Clock.copy(), details=f"Received {msg.msg_type} from Node {msg.sender_id}")
-
-          print(f"Node {self.node_Id} updated vector clock to {self.vector_Clock} after receiving message from Node {msg.sender_id}")
-          self.handle_message(msg)
-          self._status = "IDLE"
+
+      self._apply_message(msg)
+      if msg.receiver_id == MULTICAST_RECEIVER:
+        sender = msg.sender_id - 1
+        self.causal_Delivered[sender] += 1
+        released = self.hold_Back.pop((sender, self.causal_Delivered[sender]), None)
+        if released:
+          self.held_Back -= len(released)
+          ready.extend(released)
+
+  def _missing_dependency(self, msg, start=0):
+    """First (node index, count) from `start` on that `msg` still waits for, None if deliverable.
+
+    A broadcast needs the sender's previous broadcasts and everything the sender
+    had delivered; a unicast only the latter. Delivered counts never decrease,
+    so a held message resumes its check where it stopped.
+    """
+    deps = msg.causal_clock
+    sender = msg.sender_id - 1
+    delivered = self.causal_Delivered
+    for k in range(start, len(deps)):
+      needed = deps[k] - 1 if k == sender and msg.receiver_id == MULTICAST_RECEIVER else deps[k]
+      if delivered[k] < needed:
+        return (k, needed)
+    return None
+
+  def _apply_message(self, msg):
+    """Merges a delivered message into the vector clock, logs and handles it. Caller holds state_Lock."""
+    # Update vector clock; merged entries are stamped with the own entry this receive produces
+    own = self.node_Id - 1
+    if msg.clock_diff is not None:
+      changed = self.vector_Clock.merge_entries(msg.clock_diff)
+    else:
+      changed = self.vector_Clock.merge(msg.vector_clock)  # In-place element-wise max
+    stamp = self.vector_Clock.increment(own)  # Increment own entry
+    self.last_Update.assign(changed, stamp)
+    self.last_Update[own] = stamp
+
+    # Log the event in the logger
+    self.logger.record_event(self.node_Id, "RECEIVE_MESSAGE", self.vector_Clock, details=f"Received {msg.msg_type} from Node {msg.sender_id}", peer_id=msg.sender_id)
+
+    print(f"Node {self.node_Id} updated vector clock to {self.vector_Clock} after receiving message from Node {msg.sender_id}")
+    self.handle_message(msg)
 
   def local_event(self):
     """Simulates a local event(non-communication event) and increments vector clock."""
     print(f"Node {self.node_Id} performing local event.")
     with self.state_Lock:
       self._status = "LOCAL_EVENT"
-      self.vector_Clock[self.node_Id - 1] += 1
+      self.last_Update[self.node_Id - 1] = self.vector_Clock.increment(self.node_Id - 1)
       print(f"Node {self.node_Id} incremented its vector clock to {self.vector_Clock} for local event.")
-      self.logger.record_event(self.node_Id, "LOCAL_EVENT", self.vector_Clock.copy())
+      self.logger.record_event(self.node_Id, "LOCAL_EVENT", self.vector_Clock)
       self._status = "IDLE"
 
   def _create_message(self, target_Id, message_type):
     """Creates a VectorMessage with the current vector clock."""
     with self.state_Lock:
       self._status = "SENDING"
-      self.vector_Clock[self.node_Id - 1] += 1  # Increment own entry
+      own = self.node_Id - 1
+      self.last_Update[own] = self.vector_Clock.increment(own)  # Increment own entry
       print(f"Node {self.node_Id} incremented its vector clock to {self.vector_Clock} for sending message.")
-      return VectorMessage(message_type, self.node_Id, target_Id, self.vector_Clock.copy())
+
+      if self.differential:
+        # Only entries updated since the last send to this peer
+        since = self.last_Sent[target_Id - 1]
+        diff = self.vector_Clock.pairs(self.last_Update.indices_above(since))
+        self.last_Sent[target_Id - 1] = self.vector_Clock[own]
+        return VectorMessage(message_type, self.node_Id, target_Id, None, clock_diff=diff)
+
+      if self.causal:
+        if target_Id == MULTICAST_RECEIVER:
+          self.causal_Delivered[own] += 1
+        return VectorMessage(message_type, self.node_Id, target_Id, self.vector_Clock.snapshot(),
+                             causal_clock=list(self.causal_Delivered))
+
+      return VectorMessage(message_type, self.node_Id, target_Id, self.vector_Clock.snapshot())  # Copied on the next update
+
+  def _create_broadcast(self, targets, message_type):
+    """Creates one VectorMessage for all `targets`, stamping the clock once."""
+    if self.causal and len(targets) != len(self.known_Nodes) - 1:
+      raise ValueError("Causal delivery orders broadcasts to every other node only")
+    if not self.differential:
+      return self._create_message(MULTICAST_RECEIVER, message_type)
+    with self.state_Lock:
+      self._status = "SENDING"
+      own = self.node_Id - 1
+      stamp = self.last_Update[own] = self.vector_Clock.increment(own)
+      print(f"Node {self.node_Id} incremented its vector clock to {self.vector_Clock} for broadcasting.")
+      # Entries updated since the oldest last send to any target cover what every target is missing
+      since = min(self.last_Sent[k - 1] for k in targets)
+      diff = self.vector_Clock.pairs(self.last_Update.indices_above(since))
+      self.last_Sent.assign([k - 1 for k in targets], stamp)
+      return VectorMessage(message_type, self.node_Id, MULTICAST_RECEIVER, None, clock_diff=diff)
+
+  def _broadcast_failed(self, message):
+    """A broadcast that never left is not counted, or receivers would wait for it forever."""
+    if self.causal:
+      with self.state_Lock:
+        self.causal_Delivered[self.node_Id - 1] -= 1
 
   def status(self):
     """Helper method to print the current status of the node."""
@@ -115,15 +176,13 @@ class VectorClockNode(LogicalNode):
               Node {self.node_Id} \n \
               Known Nodes: {self.known_Nodes} \n \
               Vector Clock: {self.vector_Clock} \n \
+              Held back: {self.held_Back} \n \
               Status: {self._status}")
     
   def stop(self):
     """Stops the node's operations."""
-    try:
-      self.server.shutdown(socket.SHUT_RDWR)
-      self.server.close()
-    except Exception as e:
-      pass
+    self.transport.close(self)
+    self._stop_processing()
     
 
 if __name__ == "__main__":
@@ -159,7 +218,7 @@ if __name__ == "__main__":
 
         try:
           target_id = int(full_cmd[1])
-          node.send_message(target_id, "CONTACT")
+          node.send(target_id, "CONTACT")
         except ValueError:
           print("Invalid target node ID.")
 
@@ -0,0 +1,220 @@
+# src/Vector_clocks/vectorClock.py
+# Compact vector clock stored as a typed array of u32 entries, optionally backed by NumPy.
+import sys
+from array import array
+from itertools import compress, repeat
+from operator import gt, lt
+
+try:
+  import numpy as np
+except ImportError:  # Every clock uses the array backend
+  np = None
+
+# Below this size the per-call overhead of NumPy outweighs the vectorized loops
+NUMPY_MIN_SIZE = 64
+
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+def _default_backend(size):
+  return "numpy" if np is not None and size >= NUMPY_MIN_SIZE else "array"
+
+
+class VectorClock:
+  """Vector clock backed by an `array("I")` or a NumPy uint32 array.
+
+  merge() and increment() update the entries in place. snapshot() returns a
+  copy-on-write view: both clocks share the storage until either is modified,
+  so logging or sending a clock does not copy it. The entries are already
+  laid out as u32 values, so buffer() hands them to the wire format without
+  converting each one, and from_buffer() wraps a received clock without
+  copying it.
+  """
+
+  __slots__ = ("_entries", "_shared", "backend")
+
+  def __init__(self, size=0, backend=None):
+    self.backend = backend or _default_backend(size)
+    if self.backend == "numpy":
+      if np is None:
+        raise ValueError("The numpy vector clock backend needs NumPy installed")
+      self._entries = np.zeros(size, dtype=np.uint32)
+    else:
+      self._entries = array("I", bytes(4 * size))
+    self._shared = False  # True while the storage may be referenced by another clock
+
+  @classmethod
+  def from_entries(cls, entries, backend=None):
+    """Builds a clock holding a copy of `entries`."""
+    entries = list(entries)
+    clock = cls(0, backend or _default_backend(len(entries)))
+    clock._entries = np.array(entries, dtype=np.uint32) if clock.backend == "numpy" else array("I", entries)
+    return clock
+
+  @classmethod
+  def from_buffer(cls, data, offset, count, backend=None):
+    """Wraps `count` little-endian u32 entries of `data` starting at `offset` without copying them.
+
+    The clock is read-only until it is first modified, at which point it takes
+    its own copy.
+    """
+    clock = cls(0, backend or _default_backend(count))
+    end = offset + 4 * count
+    if clock.backend == "numpy":
+      clock._entries = np.frombuffer(data, dtype="<u4", count=count, offset=offset)
+    elif _LITTLE_ENDIAN:
+      clock._entries = memoryview(data)[offset:end].cast("B").cast("I")
+    else:
+      clock._entries = array("I", bytes(data[offset:end]))
+      clock._entries.byteswap()
+    clock._shared = True
+    return clock
+
+  # --- Reading -----------------------------------------------------------------
+
+  def __len__(self):
+    return len(self._entries)
+
+  def __getitem__(self, index):
+    return int(self._entries[index])
+
+  def __iter__(self):
+    return iter(self.tolist())
+
+  def tolist(self):
+    return self._entries.tolist()
+
+  def __eq__(self, other):
+    if isinstance(other, VectorClock):
+      other = other.tolist()
+    elif not isinstance(other, (list, tuple)):
+      return NotImplemented
+    return self.tolist() == list(other)
+
+  __hash__ = None  # Mutable
+
+  def __repr__(self):
+    # Printed like the list it replaces, e.g. in the node output and the status command
+    return repr(self.tolist())
+
+  def __sizeof__(self):
+    return object.__sizeof__(self) + len(self._entries) * 4
+
+  def indices_above(self, value):
+    """Indices of the entries greater than `value`."""
+    if self.backend == "numpy":
+      return np.flatnonzero(self._entries > value).tolist()
+    return list(compress(range(len(self._entries)), map(lt, repeat(value), self._entries)))
+
+  def pairs(self, indices):
+    """(index, value) pairs of the entries in `indices`, e.g. for a differential message."""
+    if self.backend == "numpy":
+      return list(zip(indices, self._entries[indices].tolist()))
+    entries = self._entries
+    return [(k, entries[k]) for k in indices]
+
+  def buffer(self):
+    """The entries as little-endian u32 bytes, a view of the storage where possible."""
+    if self.backend == "numpy":
+      return memoryview(self._entries.astype("<u4", copy=False)).cast("B")
+    if _LITTLE_ENDIAN:
+      return memoryview(self._entries).cast("B")
+    swapped = array("I", self._entries)
+    swapped.byteswap()
+    return memoryview(swapped).cast("B")
+
+  def to_array(self):
+    """The entries as an `array("I")` (the storage itself for the array backend)."""
+    if isinstance(self._entries, array):
+      return self._entries
+    return array("I", self._entries.tolist())
+
+  # --- Copy-on-write -----------------------------------------------------------
+
+  def snapshot(self):
+    """Returns a clock sharing this clock's storage; whichever is modified first copies it."""
+    clock = VectorClock.__new__(VectorClock)
+    clock._entries = self._entries
+    clock.backend = self.backend
+    clock._shared = self._shared = True
+    return clock
+
+  def copy(self):
+    clock = VectorClock.__new__(VectorClock)
+    clock._entries = self._copy_entries()
+    clock.backend = self.backend
+    clock._shared = False
+    return clock
+
+  def _copy_entries(self):
+    if self.backend == "numpy":
+      return np.array(self._entries, dtype=np.uint32)
+    return array("I", self._entries)
+
+  def _own(self):
+    """Storage this clock may modify, copied first if it is shared."""
+    if self._shared:
+      self._entries = self._copy_entries()
+      self._shared = False
+    return self._entries
+
+  # --- Updating ----------------------------------------------------------------
+
+  def __setitem__(self, index, value):
+    self._own()[index] = value
+
+  def increment(self, index, amount=1):
+    """Adds `amount` to entry `index` and returns the new value."""
+    entries = self._own()
+    entries[index] += amount
+    return int(entries[index])
+
+  def assign(self, indices, value):
+    """Sets every entry in `indices` to `value`."""
+    entries = self._own()
+    if self.backend == "numpy":
+      entries[indices] = value
+    else:
+      for k in indices:
+        entries[k] = value
+
+  def merge(self, other):
+    """Element-wise max of `other` (a clock or sequence of the same length) into this clock.
+
+    Returns the indices whose entry increased.
+    """
+    if len(other) != len(self._entries):
+      raise ValueError(f"Cannot merge a clock of {len(other)} entries into one of {len(self._entries)}")
+    if self.backend == "numpy":
+      theirs = np.asarray(other._entries if isinstance(other, VectorClock) else other, dtype=np.uint32)
+      changed = np.flatnonzero(theirs > self._entries)
+      if changed.size:
+        self._own()[changed] = theirs[changed]
+      return changed.tolist()
+
+    theirs = other._entries if isinstance(other, VectorClock) else other
+    mine = self._entries
+    changed = list(compress(range(len(mine)), map(gt, theirs, mine)))  # Compared without a Python-level loop
+    if changed:
+      mine = self._own()
+      for k in changed:
+        mine[k] = theirs[k]
+    return changed
+
+  def merge_entries(self, pairs):
+    """Element-wise max of differential (index, value) pairs. Returns the indices that increased."""
+    if self.backend == "numpy" and pairs:
+      indices, values = np.array(pairs, dtype=np.int64).T
+      increased = values > self._entries[indices]
+      if increased.any():
+        indices = indices[increased]
+        self._own()[indices] = values[increased]
+        return indices.tolist()
+      return []
+    mine = self._entries
+    changed = [(k, value) for k, value in pairs if value > mine[k]]
+    if changed:
+      mine = self._own()
+      for k, value in changed:
+        mine[k] = value
+    return [k for k, _ in changed]
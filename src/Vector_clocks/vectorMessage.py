@@ -1,14 +1,28 @@
 # src/Vector_clocks/vectorMessage.py
 # VectorMessage class for representing messages with vector timestamps in a distributed system.
+import struct
+
+from src import wireCodec
+from src.Vector_clocks.vectorClock import VectorClock
+
 
 class VectorMessage:
-  def __init__(self, msg_type, sender_id, receiver_id, vector_clock):  # Constructor for the message class
+  def __init__(self, msg_type, sender_id, receiver_id, vector_clock, clock_diff=None, causal_clock=None):  # Constructor for the message class
     self.msg_type = msg_type
     self.sender_id = sender_id
     self.receiver_id = receiver_id
-    self.vector_clock = vector_clock
+    self.vector_clock = vector_clock  # VectorClock (or list) of the sender, None for differential messages
+    # Differential messages carry only the changed (index, value) pairs instead of the full clock
+    self.clock_diff = clock_diff
+    # With causal delivery: broadcasts of each node the sender had delivered (own entry: sent)
+    self.causal_clock = causal_clock
+    # Latency tracing: trace id and stage timestamps (ns), None unless the message is traced
+    self.trace_id = None
+    self.trace = None
 
   def __repr__(self):  # String representation of the message
+    if self.clock_diff is not None:
+      return f"[Msg: type={self.msg_type}, N{self.sender_id} -> N{self.receiver_id}, clock_diff={self.clock_diff}]"
     return f"[Msg: type={self.msg_type}, N{self.sender_id} -> N{self.receiver_id}, vector_clock={self.vector_clock}]"
 
   def __eq__(self, other):  # Equality check for comparing two messages used in testing
@@ -17,16 +31,56 @@ class VectorMessage:
     return (self.sender_id == other.sender_id and
             self.receiver_id == other.receiver_id and
             self.vector_clock == other.vector_clock and
+            self.clock_diff == other.clock_diff and
+            self.causal_clock == other.causal_clock and
             self.msg_type == other.msg_type)
 
   def to_dict(self):
-    """Converts the VectorMessage to a dictionary for binary serialization."""
-    # Return the raw vector clock list here. The pack->hex encoding is
-    # performed by the sender to centralize binary serialization logic
-    # (so Lamport vs Vector send behavior can be handled in one place).
+    """Converts the VectorMessage to a dictionary, e.g. for debugging output."""
     return {
       'msg_type': self.msg_type,
       'sender_id': self.sender_id,
       'receiver_id': self.receiver_id,
-      'vector_clock': self.vector_clock
-    }
\ No newline at end of file
+      'vector_clock': None if self.vector_clock is None else list(self.vector_clock),
+      'clock_diff': self.clock_diff,
+      'causal_clock': None if self.causal_clock is None else list(self.causal_clock)
+    }
+
+  def encode(self):
+    """Encodes the message in the binary wire format with the clock packed as raw u32 entries."""
+    flags = 0 if self.causal_clock is None else wireCodec.FLAG_CAUSAL
+    if self.trace is not None:
+      flags |= wireCodec.FLAG_TRACE
+    if self.clock_diff is not None:
+      data = (wireCodec.pack_header(wireCodec.KIND_VECTOR_DIFF, self.msg_type, self.sender_id, self.receiver_id, flags) +
+              wireCodec.pack_clock_diff(self.clock_diff))
+    else:
+      data = (wireCodec.pack_header(wireCodec.KIND_VECTOR, self.msg_type, self.sender_id, self.receiver_id, flags) +
+              wireCodec.pack_clock(self.vector_clock))
+    if self.causal_clock is not None:
+      data += wireCodec.pack_clock(self.causal_clock)
+    if self.trace is not None:
+      data += wireCodec.pack_trace(self.trace_id, self.trace)
+    return data
+
+  @classmethod
+  def decode(cls, data):
+    """Decodes a message produced by encode()."""
+    kind, flags, msg_type, sender_id, receiver_id, offset = wireCodec.unpack_header(data)
+    try:
+      if kind == wireCodec.KIND_VECTOR:
+        count, entries_offset, offset = wireCodec.clock_bounds(data, offset)
+        vector_clock = VectorClock.from_buffer(data, entries_offset, count)  # A view of the frame, not a copy
+        message = cls(msg_type, sender_id, receiver_id, vector_clock)
+      elif kind == wireCodec.KIND_VECTOR_DIFF:
+        clock_diff, offset = wireCodec.unpack_clock_diff(data, offset)
+        message = cls(msg_type, sender_id, receiver_id, None, clock_diff=clock_diff)
+      else:
+        raise wireCodec.WireFormatError(f"Expected a vector message, got kind {kind}")
+      if flags & wireCodec.FLAG_CAUSAL:
+        message.causal_clock, _ = wireCodec.unpack_clock(data, offset)
+      if flags & wireCodec.FLAG_TRACE:
+        message.trace_id, message.trace = wireCodec.unpack_trace(data)
+      return message
+    except struct.error as e:
+      raise wireCodec.WireFormatError(f"Truncated vector message: {e}") from e
@@ -0,0 +1,352 @@
+#!/usr/bin python3
+
+# src/asyncRuntime.py
+
+# asyncio implementation of the network simulator and the nodes.
+#
+# The thread-based runtime starts two threads per node plus one per delivered
+# batch. Here the simulator and every node share a single event loop running in
+# one background thread: listeners and processors are coroutines, delays are loop
+# timers and connections are asyncio streams. Clock handling is inherited unchanged
+# from LamportNode and VectorClockNode.
+import asyncio
+import collections
+import itertools
+import random
+import threading
+
+from src.networkSimulation import SIM_PORT, NODE_PORT_BASE, MIN_DELAY, MAX_DELAY
+from src.messageFraming import encode_frame, FrameReader, FrameError, RECV_SIZE
+from src.wireCodec import peek_route, is_multicast, unpack_multicast, pack_multicast, pack_batch, batch_payloads, WireFormatError
+from src.messageInbox import BATCH_SIZE
+from src.portRegistry import PortRegistry
+from src.latencyTracing import add_stamps, trace_clock
+from src.Lamport_timestamps.node import LamportNode
+from src.Vector_clocks.node import VectorClockNode
+
+# Numeric address so asyncio does not resolve "localhost" in its thread pool executor
+HOST = "127.0.0.1"
+
+
+class AsyncRuntime:
+  """Owns the event loop shared by the simulator and all nodes."""
+
+  def __init__(self):
+    self.loop = asyncio.new_event_loop()
+    self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+    self.thread.start()
+
+  def run(self, coro, timeout=None):
+    """Runs a coroutine on the loop from another thread and waits for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+  def call(self, fn, *args):
+    """Schedules a plain callback on the loop, safe to use from any thread."""
+    self.loop.call_soon_threadsafe(fn, *args)
+
+  def stop(self, timeout=1.0):
+    """Cancels the tasks still on the loop, stops it and waits for its thread to end."""
+    if not self.thread.is_alive():
+      return
+
+    async def _cancel_tasks():
+      tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+      for task in tasks:
+        task.cancel()
+      await asyncio.gather(*tasks, return_exceptions=True)
+    self.run(_cancel_tasks(), timeout)
+    self.loop.call_soon_threadsafe(self.loop.stop)
+    self.thread.join(timeout)
+    if not self.thread.is_alive():
+      self.loop.close()
+
+
+class AsyncConnectionPool:
+  """One asyncio stream per destination port. Must only be used from the loop thread."""
+
+  def __init__(self, loop, host=HOST):
+    self.loop = loop
+    self.host = host
+    self._writers = {}  # port -> StreamWriter
+    self._connecting = {}  # port -> frames waiting for the connection
+
+  def send(self, port, frame):
+    """Writes `frame` to `port`, opening (or re-opening) the connection if needed."""
+    writer = self._writers.get(port)
+    if writer is not None and not writer.is_closing():
+      writer.write(frame)
+      return
+    waiting = self._connecting.get(port)
+    if waiting is not None:
+      waiting.append(frame)
+      return
+    self._connecting[port] = [frame]
+    self.loop.create_task(self._connect(port))
+
+  async def _connect(self, port):
+    try:
+      _, writer = await asyncio.open_connection(self.host, port)
+    except OSError as e:
+      frames = self._connecting.pop(port)
+      print(f"[FAILED] Could not connect to port {port}, dropped {len(frames)} message(s): {e}")
+      return
+    self._writers[port] = writer
+    writer.writelines(self._connecting.pop(port))
+
+  def close(self):
+    for writer in self._writers.values():
+      writer.close()
+    self._writers.clear()
+
+
+async def read_frames_async(reader):
+  """Yields the list of complete payloads decoded from each read until the peer closes."""
+  frame_reader = FrameReader()
+  while True:
+    data = await reader.read(RECV_SIZE)
+    if not data:
+      return
+    frames = frame_reader.feed(data)
+    if frames:
+      yield frames
+
+
+class AsyncNetworkSimulator:
+  """Event-loop version of networkSimulator: delays are loop timers instead of a scheduler thread."""
+
+  def __init__(self, numNodes, runtime, minDelay=MIN_DELAY, maxDelay=MAX_DELAY, fifo=False, registry=None):
+    self.numNodes = numNodes
+    self.runtime = runtime
+    self.registry = PortRegistry(SIM_PORT, NODE_PORT_BASE) if registry is None else registry
+    self.minDelay = minDelay
+    self.maxDelay = maxDelay
+    self.fifo = fifo
+
+    self._timers = {}  # msg_id -> TimerHandle of a pending delivery
+    self._ids = itertools.count(1)
+    self._links = {}  # (sender_id, receiver_id) -> (last delivery_time, deque of messages)
+    self._scheduled = 0
+    self._delivered = 0
+    self._cancelled = 0
+    self._peak_depth = 0
+    self._outbox = {}  # target_id -> messages due in the current loop iteration
+    self._batches = 0
+    self._streams = set()  # StreamWriters of the accepted node connections
+
+    self.node_Connections = AsyncConnectionPool(runtime.loop)
+    self.runtime.run(self.listen())
+
+    print(f"Async Network Simulator is running on Port {self.registry.sim_port} with {self.numNodes} nodes.")
+
+  async def listen(self):
+    """Starts accepting connections from the nodes and publishes the bound port."""
+    self.server = await asyncio.start_server(self._serve_connection, HOST, self.registry.sim_port, reuse_address=True)
+    self.registry.publish_simulator(self.server.sockets[0].getsockname()[1])
+
+  async def _serve_connection(self, reader, writer):
+    self._streams.add(writer)
+    try:
+      async for frames in read_frames_async(reader):
+        for frame in frames:
+          self.schedule_delivery(frame)
+    except (OSError, FrameError) as e:
+      print(f"Simulation manager connection error: {e}")
+    finally:
+      self._streams.discard(writer)
+      writer.close()
+
+  def stop(self):
+    """Cancels pending deliveries, closes the server and the connections to and from the nodes."""
+
+    async def _stop():
+      for timer in self._timers.values():
+        timer.cancel()
+      self._timers.clear()
+      self.server.close()
+      for writer in list(self._streams):
+        writer.close()
+      self.node_Connections.close()
+      await self.server.wait_closed()
+    self.runtime.run(_stop())
+
+  def schedule_delivery(self, message):
+    """Arms a loop timer that forwards the message after a random delay, returns its delivery id.
+
+    A multicast envelope arms one timer per target and returns their ids.
+    """
+    try:
+      if is_multicast(message):
+        sender_id, targets, payload = unpack_multicast(message)
+        return [self._schedule(sender_id, target_id, payload) for target_id in targets]
+      sender_id, target_id = peek_route(message)
+    except WireFormatError as e:
+      print(f"[SYSTEM] Failed to decode message: {e}")
+      return None
+    return self._schedule(sender_id, target_id, message)
+
+  def _schedule(self, sender_id, target_id, message):
+    message = add_stamps(message, trace_clock())  # "scheduled" for traced messages
+    loop = self.runtime.loop
+    msg_id = next(self._ids)
+    delivery_time = loop.time() + random.uniform(self.minDelay, self.maxDelay)
+
+    if self.fifo:
+      # Loop timers with equal deadlines may fire in any order, so each timer
+      # forwards the oldest message of its link rather than its own.
+      last_time, pending = self._links.setdefault((sender_id, target_id), (0.0, collections.deque()))
+      delivery_time = max(delivery_time, last_time)
+      pending.append(message)
+      self._links[(sender_id, target_id)] = (delivery_time, pending)
+      callback_args = (msg_id, target_id, None, pending, delivery_time)
+    else:
+      callback_args = (msg_id, target_id, message, None, delivery_time)
+
+    self._timers[msg_id] = loop.call_at(delivery_time, self._deliver, *callback_args)
+    self._scheduled += 1
+    self._peak_depth = max(self._peak_depth, len(self._timers))
+    return msg_id
+
+  def cancel_delivery(self, msg_id):
+    """Cancels a pending delivery. FIFO links deliver in order, so cancellation is not supported there."""
+    if self.fifo:
+      return False
+    timer = self._timers.pop(msg_id, None)
+    if timer is None:
+      return False
+    timer.cancel()
+    self._cancelled += 1
+    return True
+
+  def queue_stats(self):
+    """Returns the same counters as networkSimulator.queue_stats()."""
+    return {
+        "depth": len(self._timers),
+        "peak_depth": self._peak_depth,
+        "scheduled": self._scheduled,
+        "delivered": self._delivered,
+        "cancelled": self._cancelled,
+        "batches": self._batches,
+        "next_due_in": None
+    }
+
+  def _deliver(self, msg_id, target_id, message, pending, delivery_time):
+    """Timer callback: moves the message to its target's outbox, flushed once the due timers ran."""
+    del self._timers[msg_id]
+    self._delivered += 1
+    if not self._outbox:
+      self.runtime.loop.call_soon(self._flush_outbox)
+    message = pending.popleft() if pending is not None else message
+    # "deadline" and "due" for traced messages; the loop clock is time.monotonic()
+    self._outbox.setdefault(target_id, []).append(add_stamps(message, int(delivery_time * 1e9), trace_clock()))
+
+  def _flush_outbox(self):
+    """Forwards the messages that became due in one loop iteration, one batch frame per target."""
+    outbox, self._outbox = self._outbox, {}
+    self._batches += len(outbox)
+    for target_id, messages in outbox.items():
+      self._forward_message(target_id, pack_batch(target_id, messages))
+
+  def _forward_message(self, target_id, message):
+    """Writes the message to the target node's stream."""
+    try:
+      port = self.registry.node_port(target_id)
+    except LookupError:
+      print(f"[FAILED] Could not deliver message to node {target_id}. Node may be down.")
+      return
+    self.node_Connections.send(port, encode_frame(message))
+
+
+class AsyncNodeMixin:
+  """Replaces the listener/processor threads and blocking send of a node with coroutines."""
+
+  def __init__(self, node_Id, known_Nodes, logger, runtime, registry=None, **kwargs):
+    self.runtime = runtime
+    super().__init__(node_Id, known_Nodes, logger, **kwargs)
+    self.registry = registry
+    self.sim_Port = SIM_PORT if registry is None else registry.sim_port
+
+  def start(self):
+    """Binds the node's server and starts its processor task on the shared loop."""
+    self.runtime.run(self._start())
+
+  async def _start(self):
+    self.inbox = asyncio.Queue()
+    self.sim_Streams = AsyncConnectionPool(self.runtime.loop)
+    await self.listen()
+    self.processor_task = self.runtime.loop.create_task(self.process_message())
+
+  async def listen(self):
+    """Starts accepting connections from the simulator."""
+    port = self.PORT_BASE + self.node_Id if self.registry is None else self.registry.node_bind_port(self.node_Id)
+    self.server = await asyncio.start_server(self._serve_stream, HOST, port, reuse_address=True)
+    if self.registry is not None:
+      self.registry.register(self.node_Id, self.server.sockets[0].getsockname()[1])
+
+  async def _serve_stream(self, reader, writer):
+    try:
+      async for frames in read_frames_async(reader):
+        for frame in frames:
+          try:
+            for payload in batch_payloads(frame):  # A frame may carry a batch coalesced by the simulator
+              msg = self._decode_message(payload)
+              if msg.trace is not None:
+                msg.trace.append(trace_clock())
+              self.inbox.put_nowait(msg)
+          except WireFormatError as e:
+            print(f"Node {self.node_Id} dropped malformed message: {e}")
+    except (OSError, FrameError) as e:
+      print(f"Node {self.node_Id} connection error: {e}")
+    finally:
+      writer.close()
+
+  async def process_message(self):
+    """Applies messages from the inbox to the clock, draining what is queued per wakeup."""
+    while True:
+      msg = await self.inbox.get()
+      self._deliver(msg)
+      delivered = 1
+      for _ in range(min(self.inbox.qsize(), BATCH_SIZE - 1)):
+        self._deliver(self.inbox.get_nowait())
+        delivered += 1
+      self._after_batch()
+      self.messages_Received += delivered
+
+  def _deliver(self, msg):
+    if self.tracer is not None and msg.trace is not None:
+      self._deliver_traced(msg)
+    else:
+      self.deliver_message(msg)
+
+  def send_message(self, targetId, message):
+    """Logs the send and hands the encoded message to the loop, safe to call from any thread."""
+    if self.tracer is not None:
+      self.tracer.start(message, self.node_Id)
+    self._log_send(f"Sent {message.msg_type} to Node {targetId}", targetId)
+    with self.stats_Lock:
+      self.messages_Sent += 1
+    self.runtime.call(self.sim_Streams.send, self.sim_Port, encode_frame(message.encode()))
+    self._status = "IDLE"
+
+    print(f"Node {self.node_Id} sent {message.msg_type} to Node {targetId}.")
+
+  def _send_multicast(self, message, targets):
+    envelope = pack_multicast(self.node_Id, targets, message.encode())
+    self.runtime.call(self.sim_Streams.send, self.sim_Port, encode_frame(envelope))
+
+  def stop(self):
+    """Stops the node's server and processor task."""
+    self.is_alive = False
+
+    async def _stop():
+      self.processor_task.cancel()
+      self.server.close()
+      self.sim_Streams.close()
+    self.runtime.run(_stop())
+
+
+class AsyncLamportNode(AsyncNodeMixin, LamportNode):
+  """LamportNode running on the shared event loop."""
+
+
+class AsyncVectorClockNode(AsyncNodeMixin, VectorClockNode):
+  """VectorClockNode running on the shared event loop."""
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+
+# src/benchmarks/clockBenchmark.py
+
+# Benchmark suite comparing Lamport and vector clock nodes across cluster sizes and message rates.
+#
+# Every case starts N nodes behind the network simulator, sends messages between
+# random pairs at a fixed offered rate and waits until all of them are applied
+# at their receiver. It reports end-to-end latency percentiles (send call to
+# clock update at the receiver), delivered messages per second, encoded bytes per
+# message, log bytes per event, CPU time and resident memory.
+#
+# Each case runs in its own interpreter so threads, sockets and memory of one
+# case do not affect the next. Results can be written as JSON and compared with
+# an earlier run to spot regressions between commits.
+#
+# Usage: python clockBenchmark.py [--nodes 4 16 64] [--rates 200 1000] [--output results.json] [--compare baseline.json]
+
+# autopep8: off
+import sys
+import os
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import threading
+import contextlib
+import subprocess
+from collections import deque
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.networkSimulation import ShardedNetworkSimulator
+from src.messageFraming import FRAME_HEADER
+from src.eventLogger import EventLogger
+from src.binaryEventLog import BinaryEventLogger
+from src.transport import InMemoryTransport, TcpTransport
+from src.portRegistry import PortRegistry
+from src.Lamport_timestamps.node import LamportNode
+from src.Vector_clocks.node import VectorClockNode
+# autopep8: on
+
+CLUSTER_SIZES = [4, 16, 64, 256, 1024]
+MESSAGE_RATES = [200, 1000]  # Offered messages per second, over the whole cluster
+NODE_TYPES = ["LAMPORT", "VECTOR"]
+DURATION = 2.0  # Seconds of traffic per case
+DELIVERY_TIMEOUT = 60.0  # Seconds to wait for the last deliveries
+
+# Metrics compared by --compare and whether a higher value is better
+COMPARED_METRICS = {
+    "throughput_msgs_per_s": True,
+    "latency_p50_ms": False,
+    "latency_p99_ms": False,
+    "wire_bytes_per_msg": False,
+    "log_bytes_per_event": False,
+    "cpu_us_per_msg": False,
+    "rss_mb": False
+}
+
+
+class LatencyRecorder:
+  """Matches deliveries to sends per link (the simulator runs with FIFO links) and records latencies."""
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._sent = {}  # (sender, receiver) -> deque of send times
+    self._done = threading.Condition(self._lock)
+    self.latencies = []
+    self.wire_bytes = 0
+    self.first_send = None
+    self.last_delivery = None
+
+  def sent(self, sender_id, receiver_id, wire_bytes):
+    now = time.perf_counter()
+    with self._lock:
+      self._sent.setdefault((sender_id, receiver_id), deque()).append(now)
+      self.wire_bytes += wire_bytes
+      if self.first_send is None:
+        self.first_send = now
+
+  def delivered(self, sender_id, receiver_id):
+    now = time.perf_counter()
+    with self._lock:
+      self.latencies.append(now - self._sent[(sender_id, receiver_id)].popleft())
+      self.last_delivery = now
+      self._done.notify_all()
+
+  def wait_for(self, count, timeout):
+    with self._done:
+      return self._done.wait_for(lambda: len(self.latencies) >= count, timeout)
+
+
+class _TimedNode:
+  """Reports the wire size and time of every send and the time each message is applied."""
+
+  recorder = None
+
+  def send_message(self, targetId, message):
+    self.recorder.sent(self.node_Id, targetId, len(message.encode()) + FRAME_HEADER.size)
+    super().send_message(targetId, message)
+
+  def deliver_message(self, msg):
+    super().deliver_message(msg)
+    self.recorder.delivered(msg.sender_id, self.node_Id)
+
+
+class TimedLamportNode(_TimedNode, LamportNode):
+  pass
+
+
+class TimedVectorClockNode(_TimedNode, VectorClockNode):
+  pass
+
+
+def _rss_mb():
+  """Current resident set size in MB, the peak where only that is available."""
+  try:
+    with open("/proc/self/statm") as f:
+      return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+  except (OSError, ValueError, AttributeError):
+    pass
+  try:
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+  except ImportError:
+    return None
+
+
+def _percentile(sorted_values, q):
+  if not sorted_values:
+    return None
+  return sorted_values[min(len(sorted_values) - 1, int(q / 100 * len(sorted_values)))]
+
+
+def run_case(num_nodes, node_type, rate, duration=DURATION, transport="memory", log_format="json", delay=0.0, seed=1, shards=1):
+  """Runs one benchmark case in this process and returns its metrics."""
+  rng = random.Random(seed)
+  messages = max(1, int(rate * duration))
+  log_dir = tempfile.mkdtemp(prefix="clockBenchmark")
+  log_file = os.path.join(log_dir, "simulationLog" + (".bin" if log_format == "binary" else ".txt"))
+  if log_format == "binary":
+    logger = BinaryEventLogger(log_file, clock_width=num_nodes if node_type == "VECTOR" else 1)
+  else:
+    logger = EventLogger(log_file)
+
+  recorder = LatencyRecorder()
+  NodeClass = TimedVectorClockNode if node_type == "VECTOR" else TimedLamportNode
+  NodeClass.recorder = recorder
+  known_nodes = list(range(1, num_nodes + 1))
+  nodes = []
+
+  rss_before = _rss_mb()
+  cpu_start = time.process_time()
+  with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):  # Nodes print every event
+    ports = PortRegistry()  # Ephemeral ports, so cases can run side by side
+    simulator = ShardedNetworkSimulator(num_nodes, minDelay=delay, maxDelay=delay, fifo=True, tcp=(transport == "tcp"),
+                                        registry=ports, shards=shards)
+    for node_id in known_nodes:
+      node_transport = InMemoryTransport(simulator) if transport == "memory" else TcpTransport(registry=ports)
+      node = NodeClass(node_id, known_nodes, logger, transport=node_transport)
+      node.start()
+      nodes.append(node)
+    if transport == "tcp":
+      ports.wait_for_nodes(known_nodes, timeout=30)  # Let the listeners bind
+
+    cpu_traffic = time.process_time()
+    interval = 1.0 / rate
+    next_send = time.perf_counter()
+    for _ in range(messages):
+      sender = rng.randint(1, num_nodes)
+      target = rng.randint(1, num_nodes - 1)
+      target += target >= sender  # Any node but the sender
+      now = time.perf_counter()
+      if next_send > now:
+        time.sleep(next_send - now)
+      node = nodes[sender - 1]
+      node.send(target, "CONTACT")
+      next_send += interval
+    complete = recorder.wait_for(messages, DELIVERY_TIMEOUT)
+    cpu_traffic = time.process_time() - cpu_traffic
+
+    logger.flush()
+    for node in nodes:
+      node.stop()
+    simulator.stop()
+  cpu_total = time.process_time() - cpu_start
+
+  latencies = sorted(recorder.latencies)
+  delivered = len(latencies)
+  elapsed = (recorder.last_delivery or time.perf_counter()) - (recorder.first_send or 0)
+  logged_events = 2 * messages  # One SEND_MESSAGE and one RECEIVE_MESSAGE each
+  log_bytes = os.path.getsize(log_file)
+  logger.close()
+  shutil.rmtree(log_dir, ignore_errors=True)
+  rss = _rss_mb()
+  return {
+      "nodes": num_nodes,
+      "clock": node_type,
+      "offered_rate": rate,
+      "transport": transport,
+      "log_format": log_format,
+      "shards": shards,
+      "messages": messages,
+      "delivered": delivered,
+      "complete": complete,
+      "throughput_msgs_per_s": delivered / elapsed if elapsed > 0 else None,
+      "latency_p50_ms": _ms(_percentile(latencies, 50)),
+      "latency_p90_ms": _ms(_percentile(latencies, 90)),
+      "latency_p99_ms": _ms(_percentile(latencies, 99)),
+      "latency_max_ms": _ms(latencies[-1] if latencies else None),
+      "wire_bytes_per_msg": recorder.wire_bytes / messages,
+      "log_bytes_per_event": log_bytes / logged_events,
+      "cpu_s": cpu_total,
+      "cpu_us_per_msg": cpu_traffic / messages * 1e6,
+      "rss_mb": rss,
+      "rss_growth_mb": None if rss is None or rss_before is None else rss - rss_before
+  }
+
+
+def _ms(seconds):
+  return None if seconds is None else seconds * 1000
+
+
+def run_isolated(num_nodes, node_type, rate, options):
+  """Runs one case in a fresh interpreter and returns its metrics."""
+  command = [sys.executable, os.path.abspath(__file__), "--case", str(num_nodes), node_type, str(rate),
+             "--duration", str(options.duration), "--transport", options.transport,
+             "--log", options.log, "--delay", str(options.delay), "--shards", str(options.shards)]
+  completed = subprocess.run(command, capture_output=True, text=True)
+  if completed.returncode != 0:
+    print(completed.stderr, file=sys.stderr)
+    return {"nodes": num_nodes, "clock": node_type, "offered_rate": rate, "error": completed.stderr.strip().splitlines()[-1:]}
+  return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _git_commit():
+  try:
+    return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                          cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+  except OSError:
+    return None
+
+
+def print_result(result):
+  if "error" in result:
+    print(f"{result['nodes']:>6} {result['clock']:>8} {result['offered_rate']:>7}  failed: {result['error']}")
+    return
+  print(f"{result['nodes']:>6} {result['clock']:>8} {result['offered_rate']:>7} {result['throughput_msgs_per_s']:>9.0f} "
+        f"{result['latency_p50_ms']:>8.2f} {result['latency_p99_ms']:>8.2f} {result['wire_bytes_per_msg']:>8.0f} "
+        f"{result['log_bytes_per_event']:>8.0f} {result['cpu_us_per_msg']:>8.0f} {result['rss_mb'] or 0:>7.0f}")
+
+
+def compare(results, baseline_file):
+  """Prints the relative change of each metric against a results file of an earlier run."""
+  with open(baseline_file) as f:
+    baseline = {(r["nodes"], r["clock"], r["offered_rate"]): r for r in json.load(f)["results"]}
+  print(f"\nCompared with {baseline_file} (+ is better):")
+  for result in results:
+    old = baseline.get((result["nodes"], result["clock"], result["offered_rate"]))
+    if old is None or "error" in result or "error" in old:
+      continue
+    changes = []
+    for metric, higher_is_better in COMPARED_METRICS.items():
+      if result.get(metric) is None or not old.get(metric):
+        continue
+      change = (result[metric] - old[metric]) / old[metric] * 100
+      changes.append(f"{metric} {change if higher_is_better else -change:+.0f}%")
+    print(f"{result['nodes']:>6} {result['clock']:>8} {result['offered_rate']:>7}  " + ", ".join(changes))
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Lamport vs vector clock benchmark suite")
+  parser.add_argument("--nodes", type=int, nargs="+", default=CLUSTER_SIZES)
+  parser.add_argument("--rates", type=int, nargs="+", default=MESSAGE_RATES, help="offered messages per second")
+  parser.add_argument("--clocks", nargs="+", default=NODE_TYPES, type=str.upper)
+  parser.add_argument("--duration", type=float, default=DURATION, help="seconds of traffic per case")
+  parser.add_argument("--transport", choices=["memory", "tcp"], default="memory")
+  parser.add_argument("--log", choices=["json", "binary"], default="json")
+  parser.add_argument("--delay", type=float, default=0.0, help="simulated network delay in seconds")
+  parser.add_argument("--shards", type=int, default=1, help="delivery shards of the network simulator")
+  parser.add_argument("--output", help="write the results as JSON to this file")
+  parser.add_argument("--compare", help="JSON results of an earlier run to compare with")
+  parser.add_argument("--inline", action="store_true", help="run all cases in this process")
+  parser.add_argument("--case", nargs=3, metavar=("NODES", "CLOCK", "RATE"), help=argparse.SUPPRESS)
+  options = parser.parse_args()
+  if min(options.nodes) < 2:
+    parser.error("every case needs at least 2 nodes")
+
+  if options.case:  # Child process of run_isolated()
+    num_nodes, node_type, rate = int(options.case[0]), options.case[1], int(options.case[2])
+    print(json.dumps(run_case(num_nodes, node_type, rate, options.duration, options.transport, options.log, options.delay, shards=options.shards)))
+    return
+
+  print(f"{'N':>6} {'clock':>8} {'rate':>7} {'msgs/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'wire B':>8} "
+        f"{'log B/ev':>8} {'cpu us':>8} {'RSS MB':>7}")
+  results = []
+  for num_nodes in options.nodes:
+    for node_type in options.clocks:
+      for rate in options.rates:
+        if options.inline:
+          result = run_case(num_nodes, node_type, rate, options.duration, options.transport, options.log, options.delay, shards=options.shards)
+        else:
+          result = run_isolated(num_nodes, node_type, rate, options)
+        results.append(result)
+        print_result(result)
+
+  if options.output:
+    meta = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "options": {k: v for k, v in vars(options).items() if k not in ("output", "compare", "case")}
+    }
+    with open(options.output, "w") as f:
+      json.dump({"meta": meta, "results": results}, f, indent=2)
+  if options.compare:
+    compare(results, options.compare)
+
+
+if __name__ == "__main__":
+  main()
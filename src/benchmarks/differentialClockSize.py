@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+# src/benchmarks/differentialClockSize.py
+
+# Compares the wire size of full and differential (Singhal-Kshemkalyani) vector clocks.
+#
+# Nodes are split into small groups that mostly talk among themselves, which is the
+# localized traffic the differential mode is meant for. Messages are delivered in
+# FIFO order directly to the receiving node, so no sockets are involved.
+#
+# Usage: python differentialClockSize.py [<messages>] [<locality>]
+
+# autopep8: off
+import sys
+import os
+import random
+import contextlib
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.eventLogger import EventLogger
+from src.Vector_clocks.node import VectorClockNode
+# autopep8: on
+
+CLUSTER_SIZES = [4, 8, 16, 32, 64, 128, 256, 512, 1024]
+GROUP_SIZE = 4
+
+
+def measure(num_nodes, differential, messages, locality, seed=1):
+  """Returns the average encoded message size in bytes for one traffic run."""
+  rng = random.Random(seed)
+  logger = EventLogger(os.devnull, index=False)
+  known_nodes = list(range(1, num_nodes + 1))
+  nodes = [VectorClockNode(node_id, known_nodes, logger, differential=differential) for node_id in known_nodes]
+
+  total_bytes = 0
+  with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull), contextlib.closing(logger):
+    for _ in range(messages):
+      sender = rng.randint(1, num_nodes)
+      if rng.random() < locality:
+        group_start = (sender - 1) // GROUP_SIZE * GROUP_SIZE + 1
+        group = [n for n in range(group_start, min(group_start + GROUP_SIZE, num_nodes + 1)) if n != sender]
+        target = rng.choice(group) if group else sender % num_nodes + 1
+      else:
+        target = rng.choice([n for n in known_nodes if n != sender])
+
+      msg = nodes[sender - 1]._create_message(target, "CONTACT")
+      total_bytes += len(msg.encode())
+      nodes[target - 1].deliver_message(msg)
+
+  return total_bytes / messages
+
+
+def run(messages=2000, locality=0.9):
+  """Prints bytes per message for full and differential clocks across cluster sizes."""
+  print(f"{messages} messages per run, {locality:.0%} of them inside a group of {GROUP_SIZE}")
+  print(f"{'N':>6} {'full B/msg':>12} {'diff B/msg':>12} {'ratio':>8}")
+  results = []
+  for num_nodes in CLUSTER_SIZES:
+    full = measure(num_nodes, False, messages, locality)
+    diff = measure(num_nodes, True, messages, locality)
+    results.append({"nodes": num_nodes, "full_bytes": full, "diff_bytes": diff})
+    print(f"{num_nodes:>6} {full:>12.1f} {diff:>12.1f} {full / diff:>7.1f}x")
+  return results
+
+
+if __name__ == "__main__":
+  messages = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+  locality = float(sys.argv[2]) if len(sys.argv) > 2 else 0.9
+  run(messages, locality)
@@ -0,0 +1,174 @@
+#!/usr/bin python3
+
+# src/binaryEventLog.py
+
+# Binary event log with fixed-width records and a memory-mapped columnar reader.
+#
+# File layout (little-endian):
+#   header  magic "DSEL" | version u32 | clock_width u32 | fields_per_record u32
+#   records seq u32 | node_id u32 | event_type u32 | peer_id u32 | clock u32 * clock_width
+#
+# Every field is a u32, so the records form a (records x fields) matrix that the
+# reader exposes as column views straight over the mapped file, without parsing.
+import mmap
+import struct
+import sys
+from array import array
+
+from src.eventLogger import EventLogger, FLUSH_SIZE, FLUSH_INTERVAL, EVENT_TYPES, EVENT_CODES, freeze_clock
+
+try:
+  import numpy as np
+except ImportError:  # The reader falls back to strided memoryviews
+  np = None
+
+MAGIC = b"DSEL"
+LOG_VERSION = 1
+FILE_HEADER = struct.Struct("<4sIII")
+RECORD_FIELDS = 4  # seq, node_id, event_type, peer_id before the clock entries
+
+if array("I").itemsize != 4:
+  raise RuntimeError(f"The binary log needs a 4 byte unsigned int array type, this platform's has {array('I').itemsize}")
+
+
+class BinaryEventLogger(EventLogger):
+  """Buffered event logger writing fixed-width binary records instead of JSON lines.
+
+  Lamport clocks use a clock_width of 1, vector clocks one entry per node. The
+  `details` text is not stored; the other node of a send or receive goes in the
+  peer_id column (0 when there is none). Records have a fixed size, so the
+  file needs no sidecar index.
+  """
+
+  FILE_MODE = "ab"
+
+  def __init__(self, log_file, clock_width, flush_size=FLUSH_SIZE, flush_interval=FLUSH_INTERVAL):
+    self.clock_width = clock_width
+    self.record_fields = RECORD_FIELDS + clock_width
+    self._next_seq = 0
+    super().__init__(log_file, flush_size, flush_interval, index=False)
+
+  def _clear_file(self):
+    with open(self.log_file, "wb") as f:
+      f.write(FILE_HEADER.pack(MAGIC, LOG_VERSION, self.clock_width, self.record_fields))
+
+  def record_event(self, node_id, event_type, clock, details="", peer_id=None):
+    clock = freeze_clock(clock) if hasattr(clock, "__len__") else [clock]
+    if len(clock) != self.clock_width:
+      raise ValueError(f"Clock has {len(clock)} entries, the log stores {self.clock_width}")
+    self._append((node_id, EVENT_CODES.get(event_type, 0), peer_id or 0, clock))
+
+  def _encode_batch(self, batch):
+    records = array("I")
+    for entry in batch:
+      if isinstance(entry, str):  # write_marker(): a MARKER record with an empty clock
+        entry = (0, EVENT_CODES["MARKER"], 0, [0] * self.clock_width)
+      node_id, code, peer_id, clock = entry
+      records.extend((self._next_seq, node_id, code, peer_id))
+      records.extend(clock.to_array() if hasattr(clock, "to_array") else clock)
+      self._next_seq += 1
+    if sys.byteorder == "big":
+      records.byteswap()
+    return records.tobytes(), None
+
+
+class BinaryLogReader:
+  """Memory-maps a binary event log and exposes its columns without parsing.
+
+  With NumPy installed the columns are ndarray views and `clocks` is a
+  (records x clock_width) matrix. Otherwise they are strided memoryviews and
+  `clocks` yields one memoryview per record. A partially written last record
+  is ignored; call refresh() to pick up records appended since opening.
+  """
+
+  def __init__(self, log_file):
+    if np is None and sys.byteorder == "big":
+      raise RuntimeError("Reading a binary log without NumPy needs a little-endian host; install NumPy")
+    self.log_file = log_file
+    self._file = open(log_file, "rb")
+    self._map = None
+    self._views = None
+    self.refresh()
+
+  def refresh(self):
+    """Re-maps the file, e.g. after the logger appended more records."""
+    self._release()
+    self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, self.clock_width, self.record_fields = FILE_HEADER.unpack_from(self._map)
+    if magic != MAGIC or version != LOG_VERSION:
+      raise ValueError(f"{self.log_file} is not a version {LOG_VERSION} binary event log")
+
+    record_size = self.record_fields * 4
+    self.num_records = (len(self._map) - FILE_HEADER.size) // record_size
+    end = FILE_HEADER.size + self.num_records * record_size
+
+    if np is not None:
+      matrix = np.frombuffer(self._map, dtype="<u4", count=self.num_records * self.record_fields,
+                             offset=FILE_HEADER.size).reshape(self.num_records, self.record_fields)
+      self._views = [matrix]
+      self.seq, self.node_id, self.event_type, self.peer_id = (matrix[:, i] for i in range(RECORD_FIELDS))
+      self.clocks = matrix[:, RECORD_FIELDS:]
+    else:
+      flat = memoryview(self._map)[FILE_HEADER.size:end].cast("I")
+      columns = [flat[i::self.record_fields] for i in range(RECORD_FIELDS)]
+      self._views = columns + [flat]
+      self.seq, self.node_id, self.event_type, self.peer_id = columns
+      self.clocks = _ClockRows(flat, self.record_fields, self.num_records)
+
+  def __len__(self):
+    return self.num_records
+
+  def clock(self, index):
+    """Clock of record `index` as a list."""
+    start = index * self.record_fields + RECORD_FIELDS
+    if np is not None:
+      return self.clocks[index].tolist()
+    return self._views[-1][start:start + self.clock_width].tolist()  # The flat record view
+
+  def event_type_name(self, index):
+    return EVENT_TYPES[self.event_type[index]]
+
+  def _release(self):
+    # Views must be released before the map can be closed
+    if self._views is not None:
+      for view in self._views:
+        if isinstance(view, memoryview):
+          view.release()
+      self._views = None
+      self.seq = self.node_id = self.event_type = self.peer_id = self.clocks = None
+    if self._map is not None:
+      try:
+        self._map.close()
+      except BufferError:
+        pass  # A NumPy view is still referenced by the caller; the map closes when it is dropped
+      self._map = None
+
+  def close(self):
+    self._release()
+    self._file.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc):
+    self.close()
+
+
+class _ClockRows:
+  """Sequence of per-record clock memoryviews over the flat record buffer."""
+
+  def __init__(self, flat, record_fields, num_records):
+    self._flat = flat
+    self._record_fields = record_fields
+    self._num_records = num_records
+
+  def __len__(self):
+    return self._num_records
+
+  def __getitem__(self, index):
+    if index < 0:
+      index += self._num_records
+    if not 0 <= index < self._num_records:
+      raise IndexError(index)
+    start = index * self._record_fields + RECORD_FIELDS
+    return self._flat[start:(index + 1) * self._record_fields]
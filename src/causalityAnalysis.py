@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+
+# src/causalityAnalysis.py
+
+# Offline causality analysis of a simulation log.
+#
+# The log (JSON lines or the binary format) is loaded into columns: node_id,
+# event_type, peer_id and a (events x entries) clock matrix. Every question is
+# then answered with NumPy operations over whole columns instead of pairwise
+# Python loops:
+#
+#   - Sends and receives are matched per link (sender, receiver) in log order.
+#   - Happens-before uses the vector timestamps: with one clock increment per
+#     event, e -> f exactly when V(f)[node(e)] >= V(e)[node(e)]. Lamport logs
+#     get vector timestamps replayed from the matched messages first.
+#   - Clock-condition violations are checked on program order and message
+#     edges, which implies the condition for the whole relation.
+#
+# Usage: python causalityAnalysis.py <log_file> [<run>]
+
+# autopep8: off
+import sys
+import os
+import json
+
+try:
+  import numpy as np
+except ImportError:  # Only needed once an analysis is created
+  np = None
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.binaryEventLog import MAGIC, EVENT_CODES, EVENT_TYPES, BinaryLogReader
+from src.wireCodec import MULTICAST_RECEIVER
+# autopep8: on
+
+SEND = EVENT_CODES["SEND_MESSAGE"]
+RECEIVE = EVENT_CODES["RECEIVE_MESSAGE"]
+MARKER = EVENT_CODES["MARKER"]
+
+MAX_MATRIX_EVENTS = 8192  # Largest concurrency matrix built in one call (64 MB of booleans)
+
+
+class CausalityAnalysis:
+  """Happens-before relation, concurrency and ordering checks over one run of a log.
+
+  `clocks` holds the logged clocks (one column for Lamport logs) and
+  `vector_clocks` the vector timestamps used for happens-before, which are the
+  logged clocks for vector logs. Node ids are 1-based as in the simulation.
+  """
+
+  def __init__(self, node_id, event_type, peer_id, clocks):
+    if np is None:
+      raise ImportError("Causality analysis needs NumPy installed")
+    self.node_id = np.asarray(node_id, dtype=np.int64)
+    self.event_type = np.asarray(event_type, dtype=np.int64)
+    self.peer_id = np.asarray(peer_id, dtype=np.int64)
+    self.num_events = len(self.node_id)
+    if not self.num_events:
+      raise ValueError("The log run contains no events")
+    self.clocks = np.asarray(clocks, dtype=np.int64).reshape(self.num_events, -1)
+    self.num_nodes = int(max(self.node_id.max(initial=0), self.peer_id.max(initial=0), self.clocks.shape[1] if self.is_vector else 0))
+
+    self.send_of = self._match_messages()
+    self.previous_event = self._program_order()
+    self.vector_clocks = self.clocks if self.is_vector else self._replay_vector_clocks()
+    # V(e)[node(e)]: the position of each event on its own node
+    self.own = self.vector_clocks[np.arange(self.num_events), self.node_id - 1]
+
+  @property
+  def is_vector(self):
+    return self.clocks.shape[1] > 1
+
+  # --- Loading -----------------------------------------------------------------
+
+  @classmethod
+  def from_log(cls, log_file, run=-1):
+    """Loads run `run` of a JSON-lines or binary log; runs are separated by markers.
+
+    `run=-1` selects the last run and `run=None` the whole file.
+    """
+    with open(log_file, "rb") as f:
+      binary = f.read(len(MAGIC)) == MAGIC
+    columns = cls._load_binary(log_file, run) if binary else cls._load_json(log_file, run)
+    return cls(*columns)
+
+  @staticmethod
+  def _load_json(log_file, run):
+    runs = [[]]
+    with open(log_file) as f:
+      for line in f:
+        if line.startswith("{"):
+          runs[-1].append(line)
+        elif line.strip():
+          runs.append([])  # A marker such as "--- New Test Run ---"
+
+    lines = [line for lines in runs for line in lines] if run is None else runs[run]
+    events = json.loads("[" + ",".join(lines) + "]")  # One parser call instead of one per line
+    node_id = [event["node_id"] for event in events]
+    event_type = [EVENT_CODES.get(event["event_type"], 0) for event in events]
+    peer_id = [_peer_from_details(event.get("details", "")) for event in events]
+    clocks = [event["clock"] for event in events]
+    return node_id, event_type, peer_id, clocks
+
+  @staticmethod
+  def _load_binary(log_file, run):
+    with BinaryLogReader(log_file) as reader:
+      event_type = np.array(reader.event_type)
+      markers = np.flatnonzero(event_type == MARKER)
+      if run is None:
+        rows = np.flatnonzero(event_type != MARKER)
+      else:
+        starts = np.concatenate(([0], markers + 1))
+        ends = np.append(markers, len(event_type))
+        rows = np.arange(starts[run], ends[run])
+      return (np.array(reader.node_id)[rows], event_type[rows],
+              np.array(reader.peer_id)[rows], np.array(reader.clocks)[rows])
+
+  # --- Relation building -------------------------------------------------------
+
+  def _match_messages(self):
+    """Index of the matching send for every receive, -1 elsewhere.
+
+    In a vector log a receive that learned about its send event carries the
+    send's own entry, which identifies the send on that link, or among all of
+    the sender's events for a broadcast (peer_id 0). The remaining receives,
+    and all of them in a Lamport log, are matched in order: the k-th receive
+    on a link with the k-th send, which is exact for FIFO links. Receives of
+    broadcasts in a Lamport log stay unmatched.
+    """
+    send_of = np.full(self.num_events, -1, dtype=np.int64)
+    sends = np.flatnonzero(self.event_type == SEND)
+    receives = np.flatnonzero(self.event_type == RECEIVE)
+    width = self.num_nodes + 1
+    send_links = self.node_id[sends] * width + self.peer_id[sends]
+    receive_links = self.peer_id[receives] * width + self.node_id[receives]
+
+    if self.is_vector and len(sends) and len(receives):
+      scale = int(self.clocks.max()) + 1
+      send_values = self.clocks[sends, self.node_id[sends] - 1]
+      receive_values = self.clocks[receives, self.peer_id[receives] - 1]
+      matched, candidates = _join(send_links * scale + send_values, receive_links * scale + receive_values)
+      # A broadcast has no single link; it is identified among the sender's events
+      rest = np.flatnonzero(~np.isin(np.arange(len(receives)), matched))
+      broadcast_keys = np.where(self.peer_id[sends] == MULTICAST_RECEIVER, self.node_id[sends] * scale + send_values, -1)
+      more, more_candidates = _join(broadcast_keys, self.peer_id[receives[rest]] * scale + receive_values[rest])
+      matched = np.concatenate((matched, rest[more]))
+      candidates = np.concatenate((candidates, more_candidates))
+      # A later receive on the link may only repeat a value it already knew; the first one wins
+      _, first = np.unique(candidates * width + self.node_id[receives[matched]], return_index=True)
+      matched = matched[first]
+      send_of[receives[matched]] = sends[candidates[first]]
+      open_sends = np.ones(len(sends), dtype=bool)
+      open_sends[candidates[first]] = False
+      open_receives = np.ones(len(receives), dtype=bool)
+      open_receives[matched] = False
+      sends, send_links = sends[open_sends], send_links[open_sends]
+      receives, receive_links = receives[open_receives], receive_links[open_receives]
+
+    if len(sends) and len(receives):
+      span = self.num_events + 1
+      matched, candidates = _join(send_links * span + _rank_within(send_links),
+                                  receive_links * span + _rank_within(receive_links))
+      send_of[receives[matched]] = sends[candidates]
+    return send_of
+
+  def _program_order(self):
+    """Index of the previous event on the same node, -1 for a node's first event."""
+    previous = np.full(self.num_events, -1, dtype=np.int64)
+    order = np.argsort(self.node_id, kind="stable")
+    same_node = self.node_id[order[1:]] == self.node_id[order[:-1]]
+    previous[order[1:][same_node]] = order[:-1][same_node]
+    return previous
+
+  def _replay_vector_clocks(self):
+    """Vector timestamps for a Lamport log, replayed from program order and the matched messages."""
+    current = [[0] * self.num_nodes for _ in range(self.num_nodes + 1)]
+    rows = []
+    for index, (node, send) in enumerate(zip(self.node_id.tolist(), self.send_of.tolist())):
+      clock = current[node]
+      if send >= 0:
+        clock = [max(mine, theirs) for mine, theirs in zip(clock, rows[send])]
+      else:
+        clock = list(clock)
+      clock[node - 1] += 1
+      current[node] = clock
+      rows.append(clock)
+    return np.array(rows, dtype=np.int64)
+
+  # --- Happens-before ----------------------------------------------------------
+
+  def happened_before(self, a, b):
+    """True if event `a` happens before event `b`."""
+    return bool(a != b and self.vector_clocks[b, self.node_id[a] - 1] >= self.own[a])
+
+  def concurrent(self, a, b):
+    return a != b and not self.happened_before(a, b) and not self.happened_before(b, a)
+
+  def causal_past(self, index):
+    """Indices of all events that happen before event `index`."""
+    known = self.vector_clocks[index, self.node_id - 1]
+    past = self.own <= known
+    past[index] = False
+    return np.flatnonzero(past)
+
+  def causal_future(self, index):
+    """Indices of all events that event `index` happens before."""
+    future = self.vector_clocks[:, self.node_id[index] - 1] >= self.own[index]
+    future[index] = False
+    return np.flatnonzero(future)
+
+  def happens_before_matrix(self, indices=None):
+    """Boolean matrix M with M[i, j] true when event indices[i] happens before indices[j]."""
+    indices = self._matrix_indices(indices)
+    nodes = self.node_id[indices] - 1
+    matrix = self.vector_clocks[indices][:, nodes].T >= self.own[indices][:, None]
+    np.fill_diagonal(matrix, False)
+    return matrix
+
+  def concurrency_matrix(self, indices=None):
+    """Boolean matrix M with M[i, j] true when events indices[i] and indices[j] are concurrent."""
+    before = self.happens_before_matrix(indices)
+    concurrent = ~(before | before.T)
+    np.fill_diagonal(concurrent, False)
+    return concurrent
+
+  def _matrix_indices(self, indices):
+    indices = np.arange(self.num_events) if indices is None else np.asarray(indices, dtype=np.int64)
+    if len(indices) > MAX_MATRIX_EVENTS:
+      raise ValueError(f"A {len(indices)} x {len(indices)} matrix is too large; pass at most "
+                       f"{MAX_MATRIX_EVENTS} event indices or use concurrency_counts()")
+    return indices
+
+  def concurrency_counts(self):
+    """Number of events concurrent with each event, without building the full matrix.
+
+    Every event in the run is counted in exactly one entry of some clock, so
+    predecessors are the clock sum and successors follow from a histogram of
+    each node's column.
+    """
+    predecessors = self.vector_clocks.sum(axis=1) - 1
+    successors = np.zeros(self.num_events, dtype=np.int64)
+    for node in np.unique(self.node_id):
+      own_events = np.flatnonzero(self.node_id == node)
+      column = self.vector_clocks[:, node - 1]
+      # at_least[v]: number of events whose clock has entry >= v for this node
+      at_least = np.cumsum(np.bincount(column, minlength=column.max() + 2)[::-1])[::-1]
+      successors[own_events] = at_least[self.own[own_events]] - 1
+    return self.num_events - 1 - predecessors - successors
+
+  def concurrent_pairs(self):
+    """Number of unordered pairs of concurrent events."""
+    return int(self.concurrency_counts().sum()) // 2
+
+  # --- Checks ------------------------------------------------------------------
+
+  def ordering_violations(self):
+    """Edges of the happens-before relation whose logged clocks break the clock condition.
+
+    Returns (earlier, later, kind) tuples with kind "PROGRAM_ORDER" for
+    consecutive events of a node and "MESSAGE" for a send and its receive.
+    Lamport clocks must strictly increase along every edge; vector clocks must
+    be less-or-equal in every entry and strictly smaller in one.
+    """
+    violations = []
+    for kind, later in (("PROGRAM_ORDER", self.previous_event), ("MESSAGE", self.send_of)):
+      edges = np.flatnonzero(later >= 0)
+      earlier = later[edges]
+      before, after = self.clocks[earlier], self.clocks[edges]
+      broken = ~(np.all(before <= after, axis=1) & np.any(before < after, axis=1))
+      violations.extend((int(e), int(l), kind) for e, l in zip(earlier[broken], edges[broken]))
+    return sorted(violations, key=lambda violation: violation[1])
+
+  def unmatched_receives(self):
+    """Receives for which no send was logged."""
+    return np.flatnonzero((self.event_type == RECEIVE) & (self.send_of < 0))
+
+  # --- Causal chains -----------------------------------------------------------
+
+  def _chain_depths(self):
+    """Length of the longest causal chain ending at each event and the event before it on that chain."""
+    if hasattr(self, "_depths"):
+      return self._depths, self._parents
+    depths, parents = [0] * self.num_events, [-1] * self.num_events
+    for index, (previous, send) in enumerate(zip(self.previous_event.tolist(), self.send_of.tolist())):
+      parent = previous if send < 0 or (previous >= 0 and depths[previous] >= depths[send]) else send
+      parents[index] = parent
+      depths[index] = 1 + (depths[parent] if parent >= 0 else 0)
+    self._depths, self._parents = depths, parents
+    return depths, parents
+
+  def causal_chain(self, index):
+    """Longest chain of events, each happening before the next, that ends at event `index`."""
+    _, parents = self._chain_depths()
+    chain = []
+    while index >= 0:
+      chain.append(index)
+      index = parents[index]
+    return chain[::-1]
+
+  def longest_causal_chain(self):
+    depths, _ = self._chain_depths()
+    return self.causal_chain(int(np.argmax(depths)))
+
+  def describe(self, index):
+    """Short text form of an event, e.g. for printing chains."""
+    clock = self.clocks[index].tolist()
+    return f"N{self.node_id[index]} {EVENT_TYPES[self.event_type[index]]} {clock if self.is_vector else clock[0]}"
+
+  def summary(self):
+    return {
+        "events": self.num_events,
+        "nodes": self.num_nodes,
+        "clock": "VECTOR" if self.is_vector else "LAMPORT",
+        "messages": int((self.send_of >= 0).sum()),
+        "unmatched_receives": len(self.unmatched_receives()),
+        "ordering_violations": len(self.ordering_violations()),
+        "concurrent_pairs": self.concurrent_pairs(),
+        "longest_causal_chain": len(self.longest_causal_chain())
+    }
+
+
+def _join(left_keys, right_keys):
+  """Matches unique `left_keys` against `right_keys`: returns (right positions, left positions)."""
+  order = np.argsort(left_keys)
+  position = np.minimum(np.searchsorted(left_keys, right_keys, sorter=order), len(left_keys) - 1)
+  candidates = order[position]
+  matched = np.flatnonzero(left_keys[candidates] == right_keys)
+  return matched, candidates[matched]
+
+
+def _rank_within(keys):
+  """Position of every element among the earlier elements with the same key."""
+  order = np.argsort(keys, kind="stable")
+  sorted_keys = keys[order]
+  starts = np.flatnonzero(np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1])))
+  group_start = np.repeat(starts, np.diff(np.append(starts, len(keys))))
+  ranks = np.empty(len(keys), dtype=np.int64)
+  ranks[order] = np.arange(len(keys)) - group_start
+  return ranks
+
+
+def _peer_from_details(details):
+  """Peer node of a JSON log event, e.g. 2 for "Sent CONTACT to Node 2"."""
+  _, found, peer = details.rpartition("Node ")
+  return int(peer) if found and peer.isdigit() else 0
+
+
+if __name__ == "__main__":
+  if len(sys.argv) < 2:
+    print("Usage: python causalityAnalysis.py <log_file> [<run>]")
+    sys.exit(1)
+
+  run = int(sys.argv[2]) if len(sys.argv) > 2 else -1
+  analysis = CausalityAnalysis.from_log(sys.argv[1], run)
+  for key, value in analysis.summary().items():
+    print(f"{key:>22}: {value}")
+  for earlier, later, kind in analysis.ordering_violations()[:10]:
+    print(f"{kind} violation: {analysis.describe(earlier)} -> {analysis.describe(later)}")
+  print("Longest causal chain: " + " -> ".join(analysis.describe(i) for i in analysis.longest_causal_chain()[:20]))
@@ -0,0 +1,68 @@
+#!/usr/bin python3
+
+# src/connectionPool.py
+
+# Pool of long-lived TCP connections shared by the nodes and the network simulator.
+import socket
+import threading
+
+
+class ConnectionPool:
+  """Keeps one persistent TCP connection per destination port.
+
+  Connections are opened lazily on the first send and reused afterwards, so a
+  message no longer pays for a handshake and a TIME_WAIT socket. A broken
+  connection is dropped and re-opened once before the error is raised.
+  """
+
+  def __init__(self, host="localhost", connect_timeout=2.0):
+    self.host = host
+    self.connect_timeout = connect_timeout
+    self._sockets = {}  # port -> socket
+    self._locks = {}  # port -> lock serializing writes on that connection
+    self._pool_Lock = threading.Lock()
+
+  def _lock_for(self, port):
+    with self._pool_Lock:
+      lock = self._locks.get(port)
+      if lock is None:
+        lock = self._locks[port] = threading.Lock()
+      return lock
+
+  def _connect(self, port):
+    s = socket.create_connection((self.host, port), timeout=self.connect_timeout)
+    s.settimeout(None)
+    s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    with self._pool_Lock:
+      self._sockets[port] = s
+    return s
+
+  def _drop(self, port):
+    with self._pool_Lock:
+      s = self._sockets.pop(port, None)
+    if s is not None:
+      try:
+        s.close()
+      except OSError:
+        pass
+
+  def send(self, port, data):
+    """Sends `data` over the connection to `port`, reconnecting once on failure."""
+    with self._lock_for(port):
+      for attempt in range(2):
+        try:
+          s = self._sockets.get(port) or self._connect(port)
+          s.sendall(data)
+          return
+        except OSError:
+          self._drop(port)
+          if attempt == 1:
+            raise
+
+  def close(self, port=None):
+    """Closes the connection to `port`, or every connection if no port is given."""
+    with self._pool_Lock:
+      ports = [port] if port is not None else list(self._sockets)
+    for p in ports:
+      with self._lock_for(p):
+        self._drop(p)
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+
+# src/discreteEventSimulation.py
+
+# Discrete-event, virtual-time version of the simulation.
+#
+# There are no threads, sockets or sleeps. A single heap of (time, seq) ordered
+# events drives local events, sends and deliveries on a virtual clock, and every
+# random choice (delays, workload) comes from one seeded RNG. The same seed
+# therefore always produces the same run, which runs as fast as the CPU allows.
+
+# autopep8: off
+import sys
+import os
+import io
+import time
+import heapq
+import random
+import itertools
+import contextlib
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.networkSimulation import MIN_DELAY, MAX_DELAY
+from src.transport import Transport
+from src.eventLogger import EventLogger, NullLogger
+from src.Lamport_timestamps.node import LamportNode
+from src.Vector_clocks.node import VectorClockNode
+# autopep8: on
+
+
+class DiscreteEventTransport(Transport):
+  """Transport that turns every send into a delivery event on the simulator's heap."""
+
+  def __init__(self, simulator):
+    self.simulator = simulator
+
+  def send(self, node, message):
+    self.simulator.schedule_message(message)
+
+  def multicast(self, node, message, targets):
+    for target_id in targets:
+      self.simulator.schedule_message(message, target_id)
+
+  def listen(self, node):
+    pass  # Deliveries are events, nothing to listen on
+
+  def close(self, node):
+    pass
+
+
+class DiscreteEventSimulator:
+  def __init__(self, num_nodes, NODE_TYPE="LAMPORT", logger=None, seed=0,
+               minDelay=MIN_DELAY, maxDelay=MAX_DELAY, differential=False, verbose=False, causal=False, total_order=False):
+    self.NODE_TYPE = NODE_TYPE
+    self.minDelay = minDelay
+    self.maxDelay = maxDelay
+    self.rng = random.Random(seed)
+    self.logger = EventLogger(f"simulationLog_{NODE_TYPE}.txt") if logger is None else logger
+    self.verbose = verbose  # Node output is discarded unless verbose
+
+    self.now = 0.0  # Virtual time in seconds
+    self._events = []  # heap of (time, seq, action, args)
+    self._seq = itertools.count()  # Tie-breaker keeping equal-time events in scheduling order
+
+    # Differential vector clocks and total order need FIFO links, as in networkSimulator(fifo=True)
+    self.fifo = differential or total_order
+    self.link_Deadlines = {}
+
+    self.events_processed = 0
+    self.messages_delivered = 0
+
+    transport = DiscreteEventTransport(self)
+    known_nodes = list(range(1, num_nodes + 1))
+    if NODE_TYPE == "VECTOR":
+      self.nodes = [VectorClockNode(node_id, known_nodes, self.logger, differential=differential, transport=transport,
+                                    causal=causal) for node_id in known_nodes]
+    else:
+      self.nodes = [LamportNode(node_id, known_nodes, self.logger, transport=transport, total_order=total_order)
+                    for node_id in known_nodes]
+
+  # --- Scheduling --------------------------------------------------------------
+
+  def schedule_at(self, at, action, *args):
+    """Schedules `action(*args)` at virtual time `at`."""
+    heapq.heappush(self._events, (at, next(self._seq), action, args))
+
+  def schedule_local_event(self, at, node_id):
+    self.schedule_at(at, self._local_event, node_id)
+
+  def schedule_send(self, at, node_id, target_id, message_type="CONTACT"):
+    self.schedule_at(at, self._send, node_id, target_id, message_type)
+
+  def schedule_message(self, message, target_id=None):
+    """Schedules the delivery of a sent message after a random delay from the seeded RNG.
+
+    `target_id` overrides the receiver of a message sent to several nodes at once.
+    """
+    target_id = message.receiver_id if target_id is None else target_id
+    delivery_time = self.now + self.rng.uniform(self.minDelay, self.maxDelay)
+    if self.fifo:
+      link = (message.sender_id, target_id)
+      delivery_time = max(delivery_time, self.link_Deadlines.get(link, 0.0))
+      self.link_Deadlines[link] = delivery_time
+    self.schedule_at(delivery_time, self._deliver, message, target_id)
+
+  def schedule_scenario(self, scenario, interval=1.0, start=None):
+    """Schedules (node_id, "LOCAL_EVENT" | "SEND", target_id) tuples `interval` virtual seconds apart."""
+    at = self.now if start is None else start
+    for node_id, event_type, target_id in scenario:
+      if event_type == "LOCAL_EVENT":
+        self.schedule_local_event(at, node_id)
+      elif event_type == "SEND":
+        self.schedule_send(at, node_id, target_id)
+      at += interval
+
+  def schedule_random_events(self, count, send_ratio=0.5, mean_interval=0.01):
+    """Schedules `count` Poisson-arriving events on random nodes, `send_ratio` of them sends.
+
+    Arrivals are generated one at a time as they fire, so the heap stays small
+    no matter how many events are requested.
+    """
+    if count > 0:
+      self.schedule_at(self.now + self.rng.expovariate(1.0 / mean_interval),
+                       self._random_event, count, send_ratio, mean_interval)
+
+  # --- Actions -----------------------------------------------------------------
+
+  def _local_event(self, node_id):
+    self.nodes[node_id - 1].local_event()
+
+  def _send(self, node_id, target_id, message_type):
+    node = self.nodes[node_id - 1]
+    node.send(target_id, message_type)
+
+  def _deliver(self, message, target_id):
+    self.messages_delivered += 1
+    node = self.nodes[target_id - 1]
+    node.deliver_message(message)
+    node._after_batch()  # Every delivery event is a batch of one
+
+  def _random_event(self, remaining, send_ratio, mean_interval):
+    rand = self.rng.random  # randint() is several times slower than scaling random()
+    num_nodes = len(self.nodes)
+    node_id = 1 + int(rand() * num_nodes)
+    if num_nodes > 1 and rand() < send_ratio:
+      target_id = 1 + int(rand() * (num_nodes - 1))
+      target_id += target_id >= node_id  # Any node but the sender
+      self._send(node_id, target_id, "CONTACT")
+    else:
+      self._local_event(node_id)
+    self.schedule_random_events(remaining - 1, send_ratio, mean_interval)
+
+  # --- Running -----------------------------------------------------------------
+
+  def run(self, until=None, max_events=None):
+    """Processes events in virtual-time order until the heap is empty, `until` or `max_events`.
+
+    Returns the number of events processed by this call.
+    """
+    processed = 0
+    events = self._events
+    output = contextlib.nullcontext() if self.verbose else contextlib.redirect_stdout(io.StringIO())
+    with output as buffer:
+      while events and (max_events is None or processed < max_events):
+        if until is not None and events[0][0] > until:
+          break
+        at, _, action, args = heapq.heappop(events)
+        self.now = at
+        action(*args)
+        processed += 1
+        if buffer is not None and processed % 1024 == 0:
+          buffer.seek(0)
+          buffer.truncate()  # Discard node output as we go
+    if until is not None and (not events or events[0][0] > until):
+      self.now = max(self.now, until)
+    self.events_processed += processed
+    return processed
+
+  def stats(self):
+    return {
+        "virtual_time": self.now,
+        "events_processed": self.events_processed,
+        "messages_delivered": self.messages_delivered,
+        "pending_events": len(self._events)
+    }
+
+
+if __name__ == "__main__":
+  if len(sys.argv) < 3:
+    print("Usage: python discreteEventSimulation.py <num_nodes> <num_events> [<NODE_TYPE>] [<seed>]")
+    sys.exit(1)
+
+  num_nodes = int(sys.argv[1])
+  num_events = int(sys.argv[2])
+  node_type = sys.argv[3].upper() if len(sys.argv) > 3 else "LAMPORT"
+  seed = int(sys.argv[4]) if len(sys.argv) > 4 else 0
+
+  simulator = DiscreteEventSimulator(num_nodes, node_type, logger=NullLogger(), seed=seed)
+  simulator.schedule_random_events(num_events)
+  start = time.perf_counter()
+  simulator.run()
+  elapsed = time.perf_counter() - start
+
+  stats = simulator.stats()
+  print(f"Simulated {stats['events_processed']} events ({stats['messages_delivered']} deliveries) "
+        f"over {stats['virtual_time']:.2f} virtual seconds in {elapsed:.2f} s "
+        f"({stats['events_processed'] / elapsed:,.0f} events/s)")
@@ -0,0 +1,133 @@
+#!/usr/bin python3
+
+# src/eventLogIndex.py
+
+# Query API over a JSON-lines event log using the sidecar index written by EventLogger
+import json
+import os
+from array import array
+from bisect import bisect_left
+
+from src.eventLogger import EVENT_CODES, EVENT_TYPES, INDEX_ENTRY, INDEX_SUFFIX
+
+MARKER = EVENT_CODES["MARKER"]
+
+
+class EventLogIndex:
+  """Looks up events of a log by sequence number, node_id and event type.
+
+  The sidecar index is read incrementally: refresh() (called by every query)
+  only reads the index entries appended since the last call, and queries seek
+  straight to the lines they return. Polling a long-running simulation
+  therefore costs the size of the new entries and the results, not the log.
+
+  Events are returned as the logged dicts with an added "seq"; markers are
+  skipped unless MARKER is asked for explicitly.
+  """
+
+  def __init__(self, log_file):
+    self.log_file = log_file
+    self.index_file = log_file + INDEX_SUFFIX
+    self._reset()
+
+  def _reset(self):
+    self._index_size = 0  # Bytes of the index file read so far
+    self._offsets = array("Q")
+    self._lengths = array("I")
+    self._events = array("I")  # Seqs of all events, markers excluded
+    self._by_node = {}  # node_id -> seqs
+    self._by_type = {}  # event type code -> seqs
+    self._by_node_type = {}  # (node_id, code) -> seqs
+
+  def refresh(self):
+    """Reads the index entries written since the last refresh. Returns the number of new entries."""
+    size = os.path.getsize(self.index_file)
+    if size < self._index_size:
+      self._reset()  # The logger was restarted and cleared the log
+    usable = size - (size - self._index_size) % INDEX_ENTRY.size  # Skip a partially written entry
+    if usable == self._index_size:
+      return 0
+
+    with open(self.index_file, "rb") as f:
+      f.seek(self._index_size)
+      data = f.read(usable - self._index_size)
+    seq = len(self._offsets)
+    for offset, length, node_id, code in INDEX_ENTRY.iter_unpack(data):
+      self._offsets.append(offset)
+      self._lengths.append(length)
+      if code != MARKER:
+        self._events.append(seq)
+      self._by_node.setdefault(node_id, array("I")).append(seq)
+      self._by_type.setdefault(code, array("I")).append(seq)
+      self._by_node_type.setdefault((node_id, code), array("I")).append(seq)
+      seq += 1
+    self._index_size = usable
+    return len(data) // INDEX_ENTRY.size
+
+  def __len__(self):
+    self.refresh()
+    return len(self._offsets)
+
+  # --- Queries -----------------------------------------------------------------
+
+  def get(self, seq):
+    """The entry with sequence number `seq`."""
+    self.refresh()
+    return self._read([seq])[0]
+
+  def last(self, k, node_id=None, event_type=None):
+    """The last `k` events in log order, optionally only of one node and/or event type."""
+    seqs = self._seqs(node_id, event_type)
+    return self._read(seqs[-k:] if k > 0 else [])
+
+  def select(self, node_id=None, event_type=None, start=0, stop=None):
+    """Events of one node and/or event type with start <= seq < stop, in log order."""
+    seqs = self._seqs(node_id, event_type)
+    first = bisect_left(seqs, start)
+    end = len(seqs) if stop is None else bisect_left(seqs, stop)
+    return self._read(seqs[first:end])
+
+  def seq_range(self, start, stop=None):
+    """All events with start <= seq < stop."""
+    return self.select(start=start, stop=stop)
+
+  def count(self, node_id=None, event_type=None):
+    return len(self._seqs(node_id, event_type))
+
+  def _seqs(self, node_id, event_type):
+    """Sorted sequence numbers matching the filter."""
+    self.refresh()
+    code = None if event_type is None else EVENT_CODES[event_type]
+    if node_id is not None and code is not None:
+      return self._by_node_type.get((node_id, code), array("I"))
+    if node_id is not None:
+      return self._by_node.get(node_id, array("I"))
+    if code is not None:
+      return self._by_type.get(code, array("I"))
+    return self._events
+
+  def _read(self, seqs):
+    """Reads the lines of `seqs`, with one read per run of consecutive lines."""
+    runs = []
+    for seq in seqs:
+      if runs and runs[-1][1] == seq:
+        runs[-1][1] += 1
+      else:
+        runs.append([seq, seq + 1])
+
+    events = []
+    with open(self.log_file, "rb") as f:
+      for first, end in runs:
+        base = self._offsets[first]
+        f.seek(base)
+        data = f.read(self._offsets[end - 1] + self._lengths[end - 1] - base)
+        for seq in range(first, end):
+          start = self._offsets[seq] - base
+          line = data[start:start + self._lengths[seq]]
+          if line.startswith(b"{"):
+            event = json.loads(line)
+            event["seq"] = seq
+          else:
+            event = {"seq": seq, "event_type": EVENT_TYPES[MARKER], "details": line.decode().rstrip("\n")}
+          events.append(event)
+    return events
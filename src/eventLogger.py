@@ -3,28 +3,196 @@
 # src/eventLogger.py
 
 # Class for logging all event data for analysis after the simulation
+import atexit
+import os
+import struct
+import threading
 import time
 import json
 
+FLUSH_SIZE = 256  # Events buffered before the writer is woken up
+FLUSH_INTERVAL = 0.5  # Seconds an event may wait in the buffer at most
+
+# Event types are stored as their index in this table (binary log and index)
+EVENT_TYPES = ("UNKNOWN", "LOCAL_EVENT", "SEND_MESSAGE", "RECEIVE_MESSAGE", "MARKER")
+EVENT_CODES = {name: code for code, name in enumerate(EVENT_TYPES)}
+
+# Sidecar index: one entry per logged line, so entry i describes the line with seq i
+INDEX_SUFFIX = ".idx"
+INDEX_ENTRY = struct.Struct("<QIIB")  # byte offset, byte length, node_id, event type code
+
+
+def freeze_clock(clock):
+  """Copy of a list clock, or a copy-on-write snapshot of a VectorClock."""
+  if isinstance(clock, list):
+    return list(clock)
+  if hasattr(clock, "snapshot"):
+    return clock.snapshot()
+  return clock
+
+
+def _clock_to_json(clock):
+  return clock.tolist()
+
 
 class EventLogger:
-  def __init__(self, log_file):
+  """Buffered JSON-lines event log.
+
+  record_event() only appends to an in-memory buffer, so nodes calling it while
+  holding their state lock no longer pay for an open/write/close per event. A
+  writer thread keeps the file open and writes the buffer in batches once
+  `flush_size` events are pending or `flush_interval` seconds have passed.
+  flush() blocks until everything recorded so far is on disk, and the log is
+  flushed at interpreter shutdown.
+
+  With `index` enabled the writer also appends the byte offset, node_id and
+  event type of every line to `<log_file>.idx`, which EventLogIndex uses to
+  look up events without scanning the log. Logs that are not regular files,
+  such as os.devnull, are never indexed.
+  """
+
+  FILE_MODE = "ab"
+
+  def __init__(self, log_file, flush_size=FLUSH_SIZE, flush_interval=FLUSH_INTERVAL, index=True):
 
     self.log_file = log_file
-    
+    self.flush_size = flush_size
+    self.flush_interval = flush_interval
+
     # Clear existing log file
+    self._clear_file()
+    # Only a regular file can be indexed by offset; os.devnull or a pipe gets no sidecar
+    self.index_file = log_file + INDEX_SUFFIX if index and os.path.isfile(log_file) else None
+    if self.index_file:
+      open(self.index_file, "wb").close()
+    self._offset = os.path.getsize(log_file)  # Where the next batch starts in the file
+
+    self._buffer = []  # Pending lines: event dicts or raw marker strings
+    self._cond = threading.Condition()
+    self._recorded = 0  # Number of entries handed to the logger
+    self._written = 0  # Number of entries written to the file
+    self._flush_requested = False
+    self._closed = False
+
+    self._writer = threading.Thread(target=self._write_loop, daemon=True)
+    self._writer.start()
+    atexit.register(self.close)  # Unregistered by close(), so closed loggers can be freed
+
+  def _clear_file(self):
     with open(self.log_file, "w") as f:
       f.write("")
 
-  def record_event(self, node_id, event_type, clock, details=""):
+  def record_event(self, node_id, event_type, clock, details="", peer_id=None):
+    # peer_id (the other node of a send/receive) is part of `details` in the JSON format
     event = {
       "node_id": node_id,
       "event_type": event_type,
-      "clock": clock,
+      "clock": freeze_clock(clock),  # Callers may keep mutating their clock
       "details": details
     }
-    
-    with open(self.log_file, "a") as f:
-      f.write(json.dumps(event) + "\n")
+    self._append(event)
+
+  def write_marker(self, text):
+    """Writes a raw line (e.g. a test-run separator) in order with the buffered events."""
+    self._append(text)
+
+  def _append(self, entry):
+    with self._cond:
+      if self._closed:
+        return
+      self._buffer.append(entry)
+      self._recorded += 1
+      if len(self._buffer) >= self.flush_size:
+        self._cond.notify_all()
+
+  def flush(self, timeout=None):
+    """Blocks until every event recorded before the call has been written to the file."""
+    with self._cond:
+      target = self._recorded
+      self._flush_requested = True
+      self._cond.notify_all()
+      return self._cond.wait_for(lambda: self._written >= target or not self._writer.is_alive(), timeout)
+
+  def close(self):
+    """Writes the remaining events and stops the writer thread."""
+    with self._cond:
+      if self._closed:
+        return
+      self._closed = True
+      self._cond.notify_all()
+    self._writer.join()
+    atexit.unregister(self.close)
+
+  def _encode_entry(self, entry):
+    """Serializes one buffered entry (event dict or marker string) into a log line."""
+    if isinstance(entry, str):
+      return (entry + "\n").encode()
+    return (json.dumps(entry, default=_clock_to_json) + "\n").encode()
+
+  def _encode_batch(self, batch):
+    """Serializes a batch of buffered entries, returns (data appended to the file, index entries)."""
+    lines = [self._encode_entry(entry) for entry in batch]
+    index = None
+    if self.index_file:
+      entries = []
+      offset = self._offset
+      for entry, line in zip(batch, lines):
+        if isinstance(entry, str):
+          node_id, code = 0, EVENT_CODES["MARKER"]
+        else:
+          node_id, code = entry["node_id"], EVENT_CODES.get(entry["event_type"], 0)
+        entries.append(INDEX_ENTRY.pack(offset, len(line), node_id, code))
+        offset += len(line)
+      index = b"".join(entries)
+    return b"".join(lines), index
+
+  def _write_loop(self):
+    index_file = open(self.index_file, "ab") if self.index_file else None
+    with open(self.log_file, self.FILE_MODE) as f:
+      while True:
+        with self._cond:
+          deadline = time.monotonic() + self.flush_interval
+          while not (self._closed or self._flush_requested or len(self._buffer) >= self.flush_size):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 and self._buffer:
+              break
+            self._cond.wait(remaining if remaining > 0 else self.flush_interval)
+            if remaining <= 0:
+              deadline = time.monotonic() + self.flush_interval
+          batch, self._buffer = self._buffer, []
+          self._flush_requested = False
+          closing = self._closed
+
+        # Serialize and write outside the lock so record_event never waits on disk
+        if batch:
+          data, index = self._encode_batch(batch)
+          f.write(data)
+          f.flush()
+          self._offset += len(data)
+          if index_file:
+            index_file.write(index)  # Only after the lines it points to are in the file
+            index_file.flush()
+
+        with self._cond:
+          self._written += len(batch)
+          self._cond.notify_all()
+          if closing and not self._buffer:
+            if index_file:
+              index_file.close()
+            return
+
+
+class NullLogger:
+  """Logger that discards every event, for runs where only the clocks matter."""
+
+  def record_event(self, node_id, event_type, clock, details="", peer_id=None):
+    pass
+
+  def write_marker(self, text):
+    pass
 
+  def flush(self, timeout=None):
+    return True
 
+  def close(self):
+    pass
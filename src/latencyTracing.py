@@ -0,0 +1,178 @@
+#!/usr/bin python3
+
+# src/latencyTracing.py
+
+# Per-message latency tracing.
+#
+# A traced message carries a trace id and one monotonic timestamp (ns) per
+# stage it has passed: the sending node starts the trace, the simulator adds
+# when it scheduled the message and when it became due, and the receiving
+# node adds when its listener queued it and when processing began and ended.
+# The receiver's LatencyTracer turns the timestamps into per-stage durations,
+# aggregated in log-bucketed histograms per node and per link.
+import copy
+import itertools
+import math
+import threading
+import time
+
+from src.wireCodec import is_traced, append_trace_stamps
+
+# Timestamps of a fully traced message, in the order they are added
+STAMPS = ("send", "scheduled", "deadline", "due", "received", "dequeued", "processed")
+
+# Reported stages: name -> (start stamp, end stamp)
+STAGES = {
+    "send": ("send", "scheduled"),  # send_message and the way to the simulator
+    "delay": ("scheduled", "due"),  # The simulator's delay queue, including the configured delay
+    "lag": ("deadline", "due"),  # How long after its deadline the scheduler handed the message on
+    "forward": ("due", "received"),  # Forwarding, the sockets and the node's listener
+    "inbox": ("received", "dequeued"),  # The node's message_Queue
+    "process": ("dequeued", "processed"),  # deliver_message
+    "total": ("send", "processed"),
+}
+_STAGE_INDICES = [(name, STAMPS.index(start), STAMPS.index(end)) for name, (start, end) in STAGES.items()]
+
+trace_clock = time.monotonic_ns  # Same clock as time.monotonic(), shared by all processes of a host
+
+
+def add_stamps(message, *stamps):
+  """Returns `message` with stage timestamps added; untraced messages are returned as they are.
+
+  Encoded messages get the stamps appended to their trailer. Message objects
+  are copied, since the in-memory transport shares one object between the
+  targets of a broadcast.
+  """
+  if isinstance(message, (bytes, bytearray)):
+    return append_trace_stamps(message, *stamps) if is_traced(message) else message
+  if message.trace is None:
+    return message
+  traced = copy.copy(message)
+  traced.trace = message.trace + list(stamps)
+  return traced
+
+
+class LatencyHistogram:
+  """Durations in nanoseconds in logarithmic buckets of about 1% width.
+
+  Only occupied buckets are stored, so memory stays bounded by the range of
+  durations rather than by the number of samples.
+  """
+
+  BUCKETS_PER_OCTAVE = 64
+
+  def __init__(self):
+    self.buckets = {}  # bucket -> count, bucket -1 holds durations <= 0
+    self.count = 0
+    self.max = 0
+
+  def record(self, ns):
+    bucket = int(math.log2(ns) * self.BUCKETS_PER_OCTAVE) if ns > 0 else -1
+    self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+    self.count += 1
+    if ns > self.max:
+      self.max = ns
+
+  def merge(self, other):
+    for bucket, count in other.buckets.items():
+      self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+    self.count += other.count
+    self.max = max(self.max, other.max)
+
+  def percentile(self, q):
+    """Duration in ns below which `q` percent of the samples fall, None without samples."""
+    if not self.count:
+      return None
+    rank = q / 100 * self.count
+    seen = 0
+    for bucket in sorted(self.buckets):
+      seen += self.buckets[bucket]
+      if seen >= rank:
+        if bucket < 0:
+          return 0
+        return min(2 ** ((bucket + 0.5) / self.BUCKETS_PER_OCTAVE), self.max)
+    return self.max
+
+  def summary(self):
+    """{"count", "p50_ms", "p99_ms", "max_ms"} of the recorded durations."""
+    def ms(ns):
+      return None if ns is None else ns / 1e6
+    return {"count": self.count, "p50_ms": ms(self.percentile(50)), "p99_ms": ms(self.percentile(99)),
+            "max_ms": ms(self.max if self.count else None)}
+
+
+class LatencyTracer:
+  """Starts traces at the sending node and aggregates finished ones per receiving node and per link.
+
+  One tracer is shared by all nodes of a process; workers of a
+  ProcessDeployment each have their own, merged by the manager.
+  """
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._ids = itertools.count(1)
+    self.by_node = {}  # receiver_id -> {stage: LatencyHistogram}
+    self.by_link = {}  # (sender_id, receiver_id) -> {stage: LatencyHistogram}
+    self.incomplete = 0  # Finished messages missing a stage, e.g. sent before tracing started
+
+  def __getstate__(self):
+    with self._lock:
+      return {"by_node": self.by_node, "by_link": self.by_link, "incomplete": self.incomplete}
+
+  def __setstate__(self, state):
+    self.__init__()
+    self.__dict__.update(state)
+
+  def start(self, message, sender_id):
+    """Gives `message` a trace id and its first timestamp."""
+    message.trace_id = (sender_id << 32) | next(self._ids)
+    message.trace = [trace_clock()]
+
+  def record(self, sender_id, receiver_id, stamps):
+    """Adds the stage durations of a message whose processing finished."""
+    if len(stamps) != len(STAMPS):
+      with self._lock:
+        self.incomplete += 1
+      return
+    durations = [(name, stamps[end] - stamps[start]) for name, start, end in _STAGE_INDICES]
+    with self._lock:
+      for histograms in (self._histograms(self.by_node, receiver_id),
+                         self._histograms(self.by_link, (sender_id, receiver_id))):
+        for name, ns in durations:
+          histograms[name].record(ns)
+
+  @staticmethod
+  def _histograms(table, key):
+    histograms = table.get(key)
+    if histograms is None:
+      histograms = table[key] = {name: LatencyHistogram() for name in STAGES}
+    return histograms
+
+  def merge(self, other):
+    """Adds the histograms of another tracer, e.g. one of a worker process."""
+    with self._lock:
+      for table, other_table in ((self.by_node, other.by_node), (self.by_link, other.by_link)):
+        for key, histograms in other_table.items():
+          own = self._histograms(table, key)
+          for name, histogram in histograms.items():
+            own[name].merge(histogram)
+      self.incomplete += other.incomplete
+
+  def summary(self, by="node"):
+    """Per-stage percentiles: by "node" (receiver), "link" ((sender, receiver)) or None for all messages."""
+    with self._lock:
+      if by == "node":
+        return {key: {name: h.summary() for name, h in histograms.items()} for key, histograms in self.by_node.items()}
+      if by == "link":
+        return {key: {name: h.summary() for name, h in histograms.items()} for key, histograms in self.by_link.items()}
+      if by is not None:
+        raise ValueError(f"Unknown grouping {by}, expected 'node', 'link' or None")
+      combined = {name: LatencyHistogram() for name in STAGES}
+      for histograms in self.by_node.values():
+        for name, histogram in histograms.items():
+          combined[name].merge(histogram)
+      return {name: h.summary() for name, h in combined.items()}
+
+  def reset(self):
+    with self._lock:
+      self.by_node, self.by_link, self.incomplete = {}, {}, 0
@@ -0,0 +1,67 @@
+#!/usr/bin python3
+
+# src/messageFraming.py
+
+# Length-prefixed framing shared by the nodes and the network simulator.
+# Every message on a stream is sent as a 4 byte big-endian length followed by the payload.
+import struct
+
+FRAME_HEADER = struct.Struct("!I")
+MAX_FRAME_SIZE = 64 * 1024 * 1024  # Guards against reading garbage as a huge length
+RECV_SIZE = 64 * 1024
+
+
+class FrameError(Exception):
+  """Raised when a stream contains a frame that cannot be valid."""
+
+
+def encode_frame(payload):
+  """Prefixes `payload` with its length so it can be sent on a shared stream."""
+  if len(payload) > MAX_FRAME_SIZE:
+    raise FrameError(f"Frame of {len(payload)} bytes exceeds the {MAX_FRAME_SIZE} byte limit")
+  return FRAME_HEADER.pack(len(payload)) + payload
+
+
+class FrameReader:
+  """Incremental decoder that turns arbitrary stream chunks into complete payloads."""
+
+  def __init__(self):
+    self._buffer = bytearray()
+
+  def feed(self, data):
+    """Adds received bytes and returns every payload that is now complete."""
+    self._buffer += data
+    frames = []
+    offset = 0
+    buffered = len(self._buffer)
+    header_size = FRAME_HEADER.size
+
+    while buffered - offset >= header_size:
+      (length,) = FRAME_HEADER.unpack_from(self._buffer, offset)
+      if length > MAX_FRAME_SIZE:
+        raise FrameError(f"Frame length {length} exceeds the {MAX_FRAME_SIZE} byte limit")
+      end = offset + header_size + length
+      if end > buffered:
+        break
+      frames.append(bytes(self._buffer[offset + header_size:end]))
+      offset = end
+
+    if offset:
+      del self._buffer[:offset]  # Drop consumed frames once per read
+    return frames
+
+  def pending(self):
+    """Number of buffered bytes belonging to an incomplete frame."""
+    return len(self._buffer)
+
+
+def read_frames(conn, recv_size=RECV_SIZE):
+  """Yields the list of complete payloads decoded from each recv() until the peer closes."""
+  reader = FrameReader()
+  while True:
+    data = conn.recv(recv_size)
+    if not data:
+      return
+    frames = reader.feed(data)
+    if frames:
+      yield frames
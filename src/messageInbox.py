@@ -0,0 +1,83 @@
+#!/usr/bin python3
+
+# src/messageInbox.py
+
+# Blocking FIFO inbox between a node's listener and its processor thread
+import threading
+from collections import deque
+
+BATCH_SIZE = 64  # Messages handed to the processor per wakeup at most
+
+
+class MessageInbox:
+  """Deque-backed blocking queue of delivered messages.
+
+  get_batch() sleeps on a condition variable while the inbox is empty, so an
+  idle node uses no CPU, and takes up to `max_items` messages from the head
+  in one step when it wakes. Messages taken out count as unfinished until the
+  processor calls task_done(), which lets callers wait for a node to be idle
+  rather than only for its queue to be empty. close() wakes the processor;
+  it still receives the messages already queued and then an empty batch.
+  """
+
+  def __init__(self):
+    self._messages = deque()
+    self._cond = threading.Condition()
+    self._unfinished = 0  # Queued messages plus those taken but not yet processed
+    self._closed = False
+
+  def put(self, message):
+    self.put_many((message,))
+
+  def put_many(self, messages):
+    """Appends messages in order and wakes the processor. Returns False once closed."""
+    with self._cond:
+      if self._closed:
+        return False
+      before = len(self._messages)
+      self._messages.extend(messages)
+      self._unfinished += len(self._messages) - before
+      self._cond.notify()
+      return True
+
+  def get_batch(self, max_items=BATCH_SIZE, timeout=None):
+    """Blocks until messages are available and returns up to `max_items` of them.
+
+    Returns an empty list when the inbox is closed and drained, or when
+    `timeout` seconds pass without a message.
+    """
+    with self._cond:
+      if not self._cond.wait_for(lambda: self._messages or self._closed, timeout):
+        return []
+      count = min(max_items, len(self._messages))
+      popleft = self._messages.popleft
+      return [popleft() for _ in range(count)]
+
+  def task_done(self, count=1):
+    """Marks `count` messages returned by get_batch() as processed."""
+    with self._cond:
+      self._unfinished -= count
+      if self._unfinished <= 0:
+        self._cond.notify_all()
+
+  def join(self, timeout=None):
+    """Blocks until every queued message has been processed. Returns False on timeout."""
+    with self._cond:
+      return self._cond.wait_for(lambda: self._unfinished <= 0, timeout)
+
+  def unfinished(self):
+    """Number of messages queued or still being processed."""
+    return self._unfinished
+
+  def close(self):
+    """Stops accepting messages and wakes the processor so it can exit."""
+    with self._cond:
+      self._closed = True
+      self._cond.notify_all()
+
+  @property
+  def closed(self):
+    return self._closed
+
+  def __len__(self):
+    return len(self._messages)
@@ -9,7 +9,20 @@ import threading
 import time
 import sys
 import random
-import json
+import heapq
+import itertools
+import os
+import queue
+
+# autopep8: off
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.connectionPool import ConnectionPool
+from src.messageFraming import encode_frame, read_frames, FrameError
+from src.wireCodec import peek_route, is_multicast, unpack_multicast, pack_batch, WireFormatError
+from src.portRegistry import PortRegistry
+from src.latencyTracing import add_stamps, trace_clock
+from src.threadProfiling import profiled
+# autopep8: on
 
 SIM_PORT = 5000
 NODE_PORT_BASE = 6000
@@ -17,105 +30,404 @@ MIN_DELAY = 0.1
 MAX_DELAY = 0.5
 
 
+class DeliveryScheduler:
+  """Priority queue of pending deliveries ordered by delivery_time.
+
+  Scheduling and cancelling are O(log n). A single thread waits on a condition
+  until the earliest deadline (or a new, earlier message) and hands every due
+  message to `deliver_fn` as a list, so the simulator is idle when nothing is due.
+  """
+
+  def __init__(self, deliver_fn, profiler=None):
+    self.deliver_fn = deliver_fn
+    self._heap = []  # (delivery_time, msg_id, entry)
+    self._pending = {}  # msg_id -> entry, used for cancellation and depth
+    self._ids = itertools.count(1)
+    self._cond = threading.Condition()
+    self._running = True
+
+    self._scheduled = 0
+    self._delivered = 0
+    self._cancelled = 0
+    self._peak_depth = 0
+
+    self._thread = threading.Thread(target=profiled(profiler, "scheduler", self.run), daemon=True)
+    self._thread.start()
+
+  def schedule(self, delivery_time, target_id, message):
+    """Queues `message` for `target_id` at the monotonic `delivery_time` and returns its id."""
+    with self._cond:
+      msg_id = next(self._ids)
+      entry = {
+          "msg_id": msg_id,
+          "message": message,
+          "target_id": target_id,
+          "delivery_time": delivery_time
+      }
+      heapq.heappush(self._heap, (delivery_time, msg_id, entry))
+      self._pending[msg_id] = entry
+      self._scheduled += 1
+      self._peak_depth = max(self._peak_depth, len(self._pending))
+
+      # Only wake the scheduler if the new message is the next one due
+      if self._heap[0][1] == msg_id:
+        self._cond.notify()
+    return msg_id
+
+  def cancel(self, msg_id):
+    """Cancels a pending delivery. The heap entry is dropped lazily when it reaches the top."""
+    with self._cond:
+      entry = self._pending.pop(msg_id, None)
+      if entry is None:
+        return False
+      entry["cancelled"] = True
+      self._cancelled += 1
+      return True
+
+  def stats(self):
+    """Returns a snapshot of the queue-depth counters."""
+    with self._cond:
+      return {
+          "depth": len(self._pending),
+          "peak_depth": self._peak_depth,
+          "scheduled": self._scheduled,
+          "delivered": self._delivered,
+          "cancelled": self._cancelled,
+          "next_due_in": max(0.0, self._heap[0][0] - time.monotonic()) if self._heap else None
+      }
+
+  def _pop_due(self, now):
+    """Pops every non-cancelled entry whose delivery_time has passed. Caller holds the lock."""
+    due = []
+    while self._heap and self._heap[0][0] <= now:
+      _, msg_id, entry = heapq.heappop(self._heap)
+      if entry.get("cancelled"):
+        continue
+      del self._pending[msg_id]
+      due.append(entry)
+    self._delivered += len(due)
+    return due
+
+  def run(self):
+    """Sleeps until the earliest deadline and delivers everything that is due."""
+    while True:
+      with self._cond:
+        while self._running:
+          now = time.monotonic()
+          if self._heap and self._heap[0][0] <= now:
+            break
+          self._cond.wait(self._heap[0][0] - now if self._heap else None)
+        if not self._running:
+          return
+        due = self._pop_due(time.monotonic())
+
+      if due:
+        try:
+          self.deliver_fn(due)
+        except Exception as e:
+          print(f"[SYSTEM] Error delivering messages: {e}")
+
+  def stop(self):
+    """Stops the scheduler thread; pending messages are discarded."""
+    with self._cond:
+      self._running = False
+      self._cond.notify_all()
+
+
+class DeliveryShard:
+  """Delivery half of the simulator: delay queue, FIFO link deadlines and node connections.
+
+  A networkSimulator delivers through one shard, a ShardedNetworkSimulator
+  partitions the receivers over several. Shards bind no port: the simulator
+  schedules messages into them, and they forward to the nodes in `registry`
+  or to the in-memory nodes in `local_Nodes`.
+  """
+
+  def __init__(self, registry, local_Nodes, minDelay=MIN_DELAY, maxDelay=MAX_DELAY, fifo=False, profiler=None):
+    self.registry = registry
+    self.local_Nodes = local_Nodes  # Shared with the simulator, which attaches the nodes
+    self.minDelay = minDelay
+    self.maxDelay = maxDelay
+
+    # With fifo=True messages on the same sender -> receiver link are never
+    # reordered by the random delays (needed by differential vector clocks).
+    self.fifo = fifo
+    self.link_Deadlines = {}  # (sender_id, receiver_id) -> last delivery_time
+
+    # ThreadProfiler of the scheduler and forwarder threads, see threadProfiling.py
+    self.profiler = profiler
+
+    # Pending deliveries are kept in a heap ordered by delivery_time; the
+    # scheduler thread sleeps until the earliest deadline instead of polling.
+    self.messageQueue = DeliveryScheduler(self.deliver_messages, profiler)
+    self.batches_Sent = 0  # Only the scheduler thread writes this counter
+    # One persistent connection per target node, shared by the forwarders
+    self.node_Connections = ConnectionPool()
+    # On FIFO links one forwarding thread per target node sends its batches in
+    # deadline order, so a slow node never holds up the scheduler or other nodes
+    self.link_Forwarders = {}  # target_id -> queue of batches for that node's forwarder
+    self.forwarders_Lock = threading.Lock()
+
+  def schedule(self, sender_id, target_id, message):
+    """Schedules `message` for `target_id` after a random delay and returns its delivery id."""
+    message = add_stamps(message, trace_clock())  # "scheduled" for traced messages
+    delay = random.uniform(self.minDelay, self.maxDelay)
+    delivery_time = time.monotonic() + delay
+    if self.fifo:
+      # Equal deadlines keep their scheduling order in the heap
+      link = (sender_id, target_id)
+      delivery_time = max(delivery_time, self.link_Deadlines.get(link, 0.0))
+      self.link_Deadlines[link] = delivery_time
+    return self.messageQueue.schedule(delivery_time, target_id, message)
+
+  def cancel(self, msg_id):
+    """Cancels a scheduled delivery. Returns True if it was still pending."""
+    return self.messageQueue.cancel(msg_id)
+
+  def stats(self):
+    """Returns queue-depth and throughput counters of the delivery scheduler.
+
+    "batches" counts the coalesced deliveries, one per target node and tick.
+    """
+    return dict(self.messageQueue.stats(), batches=self.batches_Sent)
+
+  def deliver_messages(self, due_messages):
+    """Delivers messages whose scheduled delay has expired to their target nodes.
+
+    Messages due for the same node in one tick are coalesced: an in-memory node
+    gets them in one enqueue, a TCP node in one batch frame on one connection.
+    """
+    batches = {}  # target_id -> messages in deadline order
+    due = trace_clock()
+    for msg in due_messages:
+      # "deadline" and "due" for traced messages
+      message = add_stamps(msg["message"], int(msg["delivery_time"] * 1e9), due)
+      batches.setdefault(msg["target_id"], []).append(message)
+    self.batches_Sent += len(batches)
+
+    for target_id, messages in batches.items():
+      node = self.local_Nodes.get(target_id)
+      if node is not None:
+        node.enqueue_messages(messages)  # In-memory transport, no sockets involved
+      elif self.fifo:
+        self._forward_in_order(target_id, messages)
+      else:
+        threading.Thread(target=profiled(self.profiler, "forwarder", self._forward_batch), args=(target_id, messages),
+                         daemon=True).start()
+
+  def _forward_batch(self, target_id, messages):
+    """Forwards the encoded messages to the target node in a single frame."""
+    try:
+      self.node_Connections.send(self.registry.node_port(target_id), encode_frame(pack_batch(target_id, messages)))
+    except (ConnectionRefusedError, OSError, LookupError):
+      print(f"[FAILED] Could not deliver message to node {target_id}. Node may be down.")
+
+  def _forward_in_order(self, target_id, messages):
+    """Hands a batch to the target node's forwarder, started on its first batch."""
+    with self.forwarders_Lock:
+      batches = self.link_Forwarders.get(target_id)
+      if batches is None:
+        batches = self.link_Forwarders[target_id] = queue.SimpleQueue()
+        threading.Thread(target=profiled(self.profiler, "forwarder", self._forward_loop), args=(target_id, batches),
+                         daemon=True).start()
+    batches.put(messages)
+
+  def _forward_loop(self, target_id, batches):
+    """Forwarder of one target node: sends its batches one after another until stop() sends None."""
+    while True:
+      messages = batches.get()
+      if messages is None:
+        return
+      self._forward_batch(target_id, messages)
+
+  def stop(self):
+    """Stops the scheduler and forwarding threads, discarding pending messages, and closes the node connections."""
+    self.messageQueue.stop()
+    with self.forwarders_Lock:
+      for batches in self.link_Forwarders.values():
+        batches.put(None)
+      self.link_Forwarders.clear()
+    self.node_Connections.close()
+
+
 class networkSimulator:
-  def __init__(self, numNodes, minDelay=MIN_DELAY, maxDelay=MAX_DELAY):
+  def __init__(self, numNodes, minDelay=MIN_DELAY, maxDelay=MAX_DELAY, fifo=False, tcp=True, registry=None, profiler=None):
     # Initialize simulation manager with the node objects and an event logger
     self.numNodes = numNodes
     self.minDelay = minDelay
     self.maxDelay = maxDelay
+    self.fifo = fifo  # Never reorder messages on a sender -> receiver link, see DeliveryShard
 
-    self.messageQueue = []
-    self.queueLock = threading.Lock()
+    # ThreadProfiler of the scheduler, listener and forwarder threads, see threadProfiling.py
+    self.profiler = profiler
+    # Nodes using the in-memory transport, delivered to without sockets
+    self.local_Nodes = {}
+    # Where the simulator and the nodes listen; the fixed ports unless given a registry
+    self.registry = PortRegistry(SIM_PORT, NODE_PORT_BASE) if registry is None else registry
+    # Delay queues and node connections; ready before the listener can schedule into them
+    self.shards = self._create_shards()
+    self.is_running = True
 
-    threading.Thread(target=self.listen, daemon=True).start()
-    threading.Thread(target=self.deliver_messages, daemon=True).start()
+    # With tcp=False only in-memory nodes can reach the simulator and no port is bound
+    if tcp:
+      self._bind()
+      threading.Thread(target=profiled(profiler, "listener", self.listen), daemon=True).start()
+      print(
+          f"Network Simulator is running on Port {self.registry.sim_port} with {self.numNodes} nodes.")
+    else:
+      print(f"Network Simulator is running in memory with {self.numNodes} nodes.")
 
-    print(
-        f"Network Simulator is running on Port {SIM_PORT} with {self.numNodes} nodes.")
+  def _create_shards(self):
+    """The DeliveryShards messages are scheduled into; a single one delivers to every node."""
+    return [self._new_shard()]
 
-  def listen(self):
-    """Listens and receives incoming messages from nodes."""
+  def _new_shard(self):
+    return DeliveryShard(self.registry, self.local_Nodes, self.minDelay, self.maxDelay, self.fifo, self.profiler)
+
+  def _bind(self):
+    """Binds the simulator's port before the constructor returns and publishes it."""
     self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    # Persistent connections leave TIME_WAIT entries on this port after shutdown
+    self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
     try:
-      self.server.bind(("localhost", SIM_PORT))
+      self.server.bind(("localhost", self.registry.sim_port))
       self.server.listen()
+      self.server.settimeout(1.0)  # Lets the listener notice stop()
     except OSError as e:
       print(f"Error starting network simulator: {e}")
+      self.server.close()
+      self.server = None
       return
+    self.registry.publish_simulator(self.server.getsockname()[1])
 
-    self.server.settimeout(1.0)
+  def listen(self):
+    """Listens and receives incoming messages from nodes."""
+    if self.server is None:
+      return
 
-    while True:
+    while self.is_running:
       try:
         conn, _ = self.server.accept()
-        raw_data = conn.recv(1024).decode("utf-8")
-        conn.close()
-        self.schedule_delivery(raw_data)
+        threading.Thread(target=profiled(self.profiler, "listener", self._serve_connection), args=(conn,), daemon=True).start()
       except socket.timeout:
         continue
       except Exception as e:
+        if not self.is_running:
+          break  # Closed by stop()
         print(f"Simulation manager listener error: {e}")
         continue
 
+  def _serve_connection(self, conn):
+    """Schedules every length-prefixed message sent over a persistent node connection."""
+    try:
+      with conn:
+        for frames in read_frames(conn):
+          for frame in frames:
+            self.schedule_delivery(frame)
+    except (OSError, FrameError) as e:
+      print(f"Simulation manager connection error: {e}")
+
   def schedule_delivery(self, message):
-    """Schedules a message for delivery after a random delay."""
+    """Schedules an encoded message for delivery after a random delay and returns its delivery id.
+
+    A multicast envelope is fanned out with an independent delay per target,
+    all sharing the one encoded message, and a list of delivery ids is returned.
+    """
     try:
-      msg_data = json.loads(message)
-
-      delay = random.uniform(self.minDelay, self.maxDelay)
-      delivery_time = time.time() + delay
-
-      with self.queueLock:
-        self.messageQueue.append(
-            {
-                "message": message,
-                "target_id": msg_data["receiver_id"],
-                "delivery_time": delivery_time
-            }
-        )
-        self.messageQueue.sort(key=lambda x: x["delivery_time"])
-
-    except json.JSONDecodeError:
-      print(f"[SYSTEM] Failed to decode message: {message}")
+      if is_multicast(message):
+        sender_id, targets, payload = unpack_multicast(message)
+        return [self._schedule(sender_id, target_id, payload) for target_id in targets]
+      sender_id, target_id = peek_route(message)
+      return self._schedule(sender_id, target_id, message)
+
+    except WireFormatError as e:
+      print(f"[SYSTEM] Failed to decode message: {e}")
     except Exception as e:
       print(f"[SYSTEM] Error scheduling delivery: {e}")
+    return None
 
-  def deliver_messages(self):
-    """Delivers messages to their target nodes after the scheduled delay."""
-    while True:
-      now = time.time()
-      delivered_messages = []
-
-      with self.queueLock:
-        for i, msg in enumerate(self.messageQueue):
-          if msg["delivery_time"] <= now:
-            threading.Thread(target=self._forward_message, args=(msg,), daemon=True).start()
-            delivered_messages.append(i)
-          else:
-            break
+  def schedule_message(self, message):
+    """Schedules a message object from the in-memory transport and returns its delivery id."""
+    return self._schedule(message.sender_id, message.receiver_id, message)
 
-        for index in sorted(delivered_messages, reverse=True):
-          del self.messageQueue[index]
+  def schedule_multicast(self, message, targets):
+    """Schedules one message object for every node in `targets`, returns the delivery ids."""
+    return [self._schedule(message.sender_id, target_id, message) for target_id in targets]
 
-          time.sleep(0.1)
+  def _schedule(self, sender_id, target_id, message):
+    return self.shards[0].schedule(sender_id, target_id, message)
 
-  def _forward_message(self, msg):
-    """Forwards the message to the target node."""
-    target_id = msg["target_id"]
-    target_port = NODE_PORT_BASE + target_id
-    msg_data = json.loads(msg["message"])
+  def attach_node(self, node):
+    """Registers a node that receives its messages in memory instead of over TCP."""
+    self.local_Nodes[node.node_Id] = node
 
-    try:
-      s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-      s.connect(("localhost", target_port))
-      s.sendall(msg["message"].encode("utf-8"))
-      s.close()
-      # print(f"[DELIVERED] {msg_data['msg_type']} to node {target_id}.")
-    except (ConnectionRefusedError, OSError):
-      print(f"[FAILED] Could not deliver message to node {target_id}. Node may be down.")
+  def detach_node(self, node):
+    self.local_Nodes.pop(node.node_Id, None)
+
+  def cancel_delivery(self, msg_id):
+    """Cancels a scheduled delivery. Returns True if it was still pending."""
+    return self.shards[0].cancel(msg_id)
+
+  def queue_stats(self):
+    """Returns queue-depth and throughput counters of the delivery scheduler, see DeliveryShard.stats()."""
+    return self.shards[0].stats()
+
+  def deliver_messages(self, due_messages):
+    """Delivers due messages right away, see DeliveryShard.deliver_messages()."""
+    self.shards[0].deliver_messages(due_messages)
+
+  def stop(self):
+    """Stops the delivery schedulers and releases the simulator's port and connections."""
+    self.is_running = False
+    for shard in self.shards:
+      shard.stop()
+    if getattr(self, "server", None) is not None:  # No port is bound with tcp=False
+      self.server.close()
+
+
+class ShardedNetworkSimulator(networkSimulator):
+  """networkSimulator whose deliveries are partitioned by receiver_id across `shards` shards.
+
+  The front door stays single: one port, one reader per node connection.
+  Each shard has its own delay queue and scheduler thread, link deadlines and
+  connection pool, so scheduling, waking up and forwarding for different
+  receivers never wait on the same lock. Delivery ids encode their shard, so
+  cancel_delivery() works as before, and FIFO links stay ordered because a
+  link never spans two shards.
+  """
+
+  def __init__(self, numNodes, minDelay=MIN_DELAY, maxDelay=MAX_DELAY, fifo=False, tcp=True, registry=None, shards=2,
+               profiler=None):
+    self.shard_Count = max(shards, 1)  # Read by _create_shards() while the simulator starts
+    super().__init__(numNodes, minDelay, maxDelay, fifo, tcp, registry, profiler)
+
+  def _create_shards(self):
+    return [self._new_shard() for _ in range(self.shard_Count)]
+
+  def shard_index(self, target_id):
+    """Index of the shard delivering to node `target_id`."""
+    return (target_id - 1) % len(self.shards)
+
+  def _schedule(self, sender_id, target_id, message):
+    shard_index = self.shard_index(target_id)
+    msg_id = self.shards[shard_index].schedule(sender_id, target_id, message)
+    return msg_id * len(self.shards) + shard_index
+
+  def cancel_delivery(self, msg_id):
+    msg_id, shard_index = divmod(msg_id, len(self.shards))
+    return self.shards[shard_index].cancel(msg_id)
 
-      # Could implement retry logic here if desired
+  def shard_stats(self):
+    """queue_stats() of every shard, shard 0 first."""
+    return [shard.stats() for shard in self.shards]
 
+  def queue_stats(self):
+    """The counters of all shards combined; peak_depth is the sum of the shards' peaks."""
+    stats = self.shard_stats()
+    due = [s["next_due_in"] for s in stats if s["next_due_in"] is not None]
+    combined = {key: sum(s[key] for s in stats) for key in ("depth", "peak_depth", "scheduled", "delivered", "cancelled", "batches")}
+    combined["next_due_in"] = min(due) if due else None
+    return combined
 
 
 if __name__ == "__main__":
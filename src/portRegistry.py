@@ -0,0 +1,62 @@
+#!/usr/bin python3
+
+# src/portRegistry.py
+
+# Ports of one simulation: where its network simulator and each of its nodes listen
+import threading
+
+
+class PortRegistry:
+  """Publishes the ports bound by the network simulator and the nodes of one simulation.
+
+  SimulationManager owns one registry per simulation. A port of 0 asks the OS
+  for an ephemeral port: the simulator publishes the port it actually bound,
+  nodes register theirs once they listen, and the simulator looks the target
+  port up here for every forward. Several simulations can then share a host.
+  With a non-zero `node_port_base` node k binds node_port_base + k, the fixed
+  layout used by nodes started by hand with node.py.
+  """
+
+  def __init__(self, sim_port=0, node_port_base=0):
+    self.sim_port = sim_port  # 0 until an ephemeral simulator port was published
+    self.node_port_base = node_port_base
+    self._node_ports = {}  # node_id -> port
+    self._cond = threading.Condition()
+
+  def publish_simulator(self, port):
+    with self._cond:
+      self.sim_port = port
+      self._cond.notify_all()
+
+  def node_bind_port(self, node_id):
+    """Port node `node_id` should bind, 0 for an ephemeral one."""
+    return self.node_port_base + node_id if self.node_port_base else 0
+
+  def register(self, node_id, port):
+    with self._cond:
+      self._node_ports[node_id] = port
+      self._cond.notify_all()
+
+  def register_many(self, node_ports):
+    with self._cond:
+      self._node_ports.update(node_ports)
+      self._cond.notify_all()
+
+  def node_port(self, node_id):
+    """Port node `node_id` listens on. Raises LookupError for an unknown node."""
+    port = self._node_ports.get(node_id)
+    if port is not None:
+      return port
+    if self.node_port_base:
+      return self.node_port_base + node_id
+    raise LookupError(f"Node {node_id} has not registered a port")
+
+  def wait_for_nodes(self, node_ids, timeout=None):
+    """Blocks until every node in `node_ids` registered its port. Returns False on timeout."""
+    with self._cond:
+      return self._cond.wait_for(lambda: all(k in self._node_ports for k in node_ids), timeout)
+
+  def ports(self):
+    """{"simulator": port, "nodes": {node_id: port}} as currently published."""
+    with self._cond:
+      return {"simulator": self.sim_port, "nodes": dict(self._node_ports)}
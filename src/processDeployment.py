@@ -0,0 +1,329 @@
+#!/usr/bin python3
+
+# src/processDeployment.py
+
+# Runs the nodes of a simulation in worker processes, N nodes spread across K processes.
+#
+# Every worker hosts a block of nodes on the TCP transport, so they reach the network
+# simulator in the manager's process exactly like nodes started by hand with node.py.
+# One duplex pipe per worker is the control channel: the manager sends commands
+# (execute, status, counter, flush, latency, profile, stop) and the worker answers them in order, and
+# the worker forwards its nodes' log events in batches on the same pipe, so a reply
+# always arrives after every event logged before it.
+import multiprocessing
+import queue
+import threading
+
+from src.networkSimulation import SIM_PORT, NODE_PORT_BASE
+from src.latencyTracing import LatencyTracer
+from src.threadProfiling import ThreadProfiler
+
+FORWARD_SIZE = 256  # Log events sent to the manager in one batch at most
+FORWARD_INTERVAL = 0.05  # Seconds a log event waits in a worker at most
+START_TIMEOUT = 30.0  # Seconds for a worker to start and bind all of its nodes
+
+
+class ChannelLogger:
+  """Logger of a worker process, forwards the events to the manager's logger in batches."""
+
+  def __init__(self, conn, send_lock, flush_size=FORWARD_SIZE, flush_interval=FORWARD_INTERVAL):
+    self.conn = conn
+    self.send_lock = send_lock  # Shared with the command loop's replies
+    self.flush_size = flush_size
+    self.flush_interval = flush_interval
+    self._buffer = []
+    self._cond = threading.Condition()
+    self._send_order = threading.Lock()  # Batches leave in the order they were taken from the buffer
+    self._closed = False
+    self._sender = threading.Thread(target=self._send_loop, daemon=True)
+    self._sender.start()
+
+  def record_event(self, node_id, event_type, clock, details="", peer_id=None):
+    if hasattr(clock, "snapshot"):
+      clock = clock.snapshot()  # Copy-on-write, converted to a list by the sender
+    elif isinstance(clock, list):
+      clock = list(clock)
+    with self._cond:
+      self._buffer.append((node_id, event_type, clock, details, peer_id))
+      if len(self._buffer) >= self.flush_size:
+        self._cond.notify()
+
+  def write_marker(self, text):
+    pass  # Markers are written by the manager's logger
+
+  def flush(self, timeout=None):
+    """Sends every buffered event to the manager before returning."""
+    with self._send_order:
+      with self._cond:
+        batch, self._buffer = self._buffer, []
+      self._send(batch)
+    return True
+
+  def close(self):
+    with self._cond:
+      self._closed = True
+      self._cond.notify()
+    self._sender.join()
+    self.flush()
+
+  def _send(self, batch):
+    if not batch:
+      return
+    entries = [(node_id, event_type, clock.tolist() if hasattr(clock, "tolist") else clock, details, peer_id)
+               for node_id, event_type, clock, details, peer_id in batch]
+    with self.send_lock:
+      self.conn.send(("log", entries))
+
+  def _send_loop(self):
+    while True:
+      with self._cond:
+        self._cond.wait_for(lambda: self._closed or len(self._buffer) >= self.flush_size, self.flush_interval)
+        if self._closed:
+          return
+      try:
+        self.flush()
+      except (OSError, EOFError):
+        return  # The manager went away
+
+
+def _node_status(node):
+  clock = getattr(node, "lamport_Clock", getattr(node, "vector_Clock", None))
+  return {
+      "node_id": node.node_Id,
+      "known_nodes": node.known_Nodes,
+      "clock": clock.tolist() if hasattr(clock, "tolist") else clock,
+      "status": node._status,
+      "messages_sent": node.messages_Sent,
+      "messages_received": node.messages_Received,
+      "queued": node.message_Queue.unfinished(),
+  }
+
+
+def _worker_main(conn, node_ids, num_nodes, NODE_TYPE, differential, ports, causal=False, total_order=False,
+                 trace=False, profile=False, profile_memory=False):
+  """Entry point of a worker process: starts its nodes and serves the control channel."""
+  # Imported here so the manager does not need them for the parent side
+  from src.Lamport_timestamps.node import LamportNode
+  from src.Vector_clocks.node import VectorClockNode
+  from src.transport import TcpTransport
+  from src.portRegistry import PortRegistry
+
+  registry = PortRegistry(*ports)  # The worker's nodes publish their ports here, then to the manager
+  send_lock = threading.Lock()
+  logger = ChannelLogger(conn, send_lock)
+  known_nodes = list(range(1, num_nodes + 1))
+  tracer = LatencyTracer() if trace else None  # Shared by the worker's nodes, merged by the manager
+  profiler = ThreadProfiler(memory=profile_memory) if profile else None  # Likewise
+  nodes = {}
+  for node_id in node_ids:
+    if NODE_TYPE == "VECTOR":
+      node = VectorClockNode(node_id, known_nodes, logger, differential=differential,
+                             transport=TcpTransport(registry=registry), causal=causal)
+    else:
+      node = LamportNode(node_id, known_nodes, logger, transport=TcpTransport(registry=registry),
+                         total_order=total_order)
+    node.tracer = tracer
+    node.profiler = profiler
+    node.start()
+    nodes[node_id] = node
+  ready = registry.wait_for_nodes(node_ids, START_TIMEOUT)
+
+  def reply(result):
+    with send_lock:
+      conn.send(("reply", result))
+
+  reply(registry.ports()["nodes"] if ready else None)
+  while True:
+    try:
+      command, args = conn.recv()
+    except (EOFError, OSError):
+      command, args = "stop", ()
+    if command == "execute":
+      node_id, event_type, target_id, message_type = args
+      node = nodes[node_id]
+      if event_type == "LOCAL_EVENT":
+        node.local_event()
+      elif event_type == "BROADCAST":
+        node.broadcast(message_type, target_id)
+      else:
+        node.send(target_id, message_type)
+      reply(None)
+    elif command == "counter":
+      reply(sum(getattr(node, args[0]) for node in nodes.values()))
+    elif command == "status":
+      reply(_node_status(nodes[args[0]]))
+    elif command == "flush":
+      logger.flush()
+      reply(True)
+    elif command == "latency":
+      reply(tracer)
+    elif command == "profile":
+      reply(profiler)  # Pickled with the profiles of the threads still running
+    elif command == "stop":
+      for node in nodes.values():
+        node.stop()
+      if profiler is not None:
+        profiler.stop()
+      try:
+        logger.close()
+        reply(True)
+      except (OSError, EOFError):
+        pass
+      return
+
+
+class _Worker:
+  """Manager side of one worker process and its control channel."""
+
+  def __init__(self, context, node_ids, num_nodes, NODE_TYPE, differential, ports, logger, causal=False, total_order=False,
+               trace=False, profile=False, profile_memory=False):
+    self.node_ids = node_ids
+    self.logger = logger
+    self.conn, child_conn = context.Pipe()
+    self.process = context.Process(target=_worker_main, daemon=True,
+                                   args=(child_conn, node_ids, num_nodes, NODE_TYPE, differential, ports, causal, total_order,
+                                         trace, profile, profile_memory))
+    self.process.start()
+    child_conn.close()
+    self.replies = queue.Queue()
+    self.request_lock = threading.Lock()  # One outstanding request at a time keeps replies in order
+    self.reader = threading.Thread(target=self._read_loop, daemon=True)
+    self.reader.start()
+
+  def _read_loop(self):
+    """Writes forwarded log events to the manager's logger and hands replies to request()."""
+    while True:
+      try:
+        kind, payload = self.conn.recv()
+      except (EOFError, OSError):
+        self.replies.put(EOFError)
+        return
+      if kind == "log":
+        for entry in payload:
+          self.logger.record_event(*entry)
+      else:
+        self.replies.put(payload)
+
+  def wait_reply(self, timeout):
+    result = self.replies.get(timeout=timeout)
+    if result is EOFError:
+      raise ConnectionError(f"Worker process {self.process.pid} for nodes {self.node_ids[0]}-{self.node_ids[-1]} exited")
+    return result
+
+  def request(self, command, *args, timeout=None):
+    with self.request_lock:
+      self.conn.send((command, args))
+      return self.wait_reply(timeout)
+
+
+class RemoteNode:
+  """Stand-in in SimulationManager.nodes for a node that lives in a worker process."""
+
+  def __init__(self, deployment, node_id):
+    self.deployment = deployment
+    self.node_Id = node_id
+
+  def local_event(self):
+    self.deployment.execute(self.node_Id, "LOCAL_EVENT")
+
+  def send(self, target_id, message_type="CONTACT"):
+    self.deployment.execute(self.node_Id, "SEND", target_id, message_type)
+
+  def snapshot(self):
+    """The node's clock, status and message counters as a dict."""
+    return self.deployment.status(self.node_Id)
+
+  def status(self):
+    state = self.snapshot()
+    print(f" \
+              Node {self.node_Id} \n \
+              Known Nodes: {state['known_nodes']} \n \
+              Clock: {state['clock']} \n \
+              Status: {state['status']}")
+
+  def stop(self):
+    pass  # The nodes of a worker stop together with ProcessDeployment.stop()
+
+
+class ProcessDeployment:
+  """Spawns `num_processes` worker processes that host `num_nodes` nodes between them.
+
+  Nodes are assigned in contiguous blocks of (nearly) equal size. Their log
+  events are written by the manager's `logger`, commands reach them through
+  the control channel, and the ports they bind are published in `registry`.
+  """
+
+  def __init__(self, num_nodes, num_processes, NODE_TYPE, logger, differential=False, registry=None, causal=False, total_order=False,
+               trace=False, profile=False, profile_memory=False):
+    if num_processes < 1:
+      raise ValueError("A process deployment needs at least one worker process")
+    num_processes = min(num_processes, num_nodes)
+    context = multiprocessing.get_context("spawn")  # Forking a process running simulator threads is unsafe
+    self.workers = []
+    self.placement = {}  # node_id -> _Worker
+    ports = (SIM_PORT, NODE_PORT_BASE) if registry is None else (registry.sim_port, registry.node_port_base)
+    for k in range(num_processes):
+      node_ids = list(range(k * num_nodes // num_processes + 1, (k + 1) * num_nodes // num_processes + 1))
+      worker = _Worker(context, node_ids, num_nodes, NODE_TYPE, differential, ports, logger, causal, total_order, trace,
+                       profile, profile_memory)
+      self.workers.append(worker)
+      self.placement.update((node_id, worker) for node_id in node_ids)
+    for worker in self.workers:
+      node_ports = worker.wait_reply(START_TIMEOUT)
+      if node_ports is None:
+        raise ConnectionError(f"Nodes {worker.node_ids[0]}-{worker.node_ids[-1]} did not start listening")
+      if registry is not None:
+        registry.register_many(node_ports)  # Where the simulator forwards their messages
+    self.nodes = [RemoteNode(self, node_id) for node_id in range(1, num_nodes + 1)]
+
+  def execute(self, node_id, event_type, target_id=None, message_type="CONTACT"):
+    if event_type not in ("LOCAL_EVENT", "SEND", "BROADCAST"):
+      raise ValueError(f"Unknown event type {event_type}")
+    self.placement[node_id].request("execute", node_id, event_type, target_id, message_type)
+
+  def status(self, node_id):
+    return self.placement[node_id].request("status", node_id)
+
+  def counters(self):
+    """(messages received, messages sent) summed over all nodes.
+
+    Every worker's received count is read before any sent count, so each
+    received message was already counted by its sender, wherever it lives.
+    """
+    received = sum(worker.request("counter", "messages_Received") for worker in self.workers)
+    return received, sum(worker.request("counter", "messages_Sent") for worker in self.workers)
+
+  def latency(self):
+    """A LatencyTracer merging the traces recorded in every worker process."""
+    merged = LatencyTracer()
+    for worker in self.workers:
+      tracer = worker.request("latency")
+      if tracer is not None:
+        merged.merge(tracer)
+    return merged
+
+  def profiles(self):
+    """A ThreadProfiler merging the thread profiles of every worker process."""
+    merged = ThreadProfiler()
+    for worker in self.workers:
+      profiler = worker.request("profile")
+      if profiler is not None:
+        merged.merge(profiler)
+    return merged
+
+  def flush(self, timeout=None):
+    """Returns once every event logged by the workers so far was handed to the manager's logger."""
+    return all(worker.request("flush", timeout=timeout) for worker in self.workers)
+
+  def stop(self, timeout=5.0):
+    """Stops the nodes, collects their last log events and ends the worker processes."""
+    for worker in self.workers:
+      try:
+        worker.request("stop", timeout=timeout)
+      except (ConnectionError, OSError, queue.Empty):
+        pass
+    for worker in self.workers:
+      worker.process.join(timeout)
+      if worker.process.is_alive():
+        worker.process.terminate()
+      worker.conn.close()
@@ -11,39 +11,223 @@ sys.dont_write_bytecode = True  # Prevent creation of .pyc files
 import os
 from platform import node
 import time
-import threading
 # autopep8: off
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from src.networkSimulation import networkSimulator
+from src.networkSimulation import networkSimulator, ShardedNetworkSimulator, SIM_PORT, NODE_PORT_BASE
 from src.eventLogger import EventLogger
+from src.binaryEventLog import BinaryEventLogger
 from src.Lamport_timestamps.node import LamportNode
 from src.Vector_clocks.node import VectorClockNode 
+from src.asyncRuntime import AsyncRuntime, AsyncNetworkSimulator, AsyncLamportNode, AsyncVectorClockNode
+from src.transport import InMemoryTransport, TcpTransport
+from src.portRegistry import PortRegistry
+from src.workload import WorkloadGenerator
+from src.processDeployment import ProcessDeployment
+from src.latencyTracing import LatencyTracer
+from src.threadProfiling import ThreadProfiler
 # autopep8: on
 
 
 class SimulationManager:
-  def __init__(self, num_nodes, NODE_TYPE="LAMPORT", logger=None):
+  def __init__(self, num_nodes, NODE_TYPE="LAMPORT", logger=None, differential=False, RUNTIME="THREAD", TRANSPORT="TCP", LOG_FORMAT="JSON", processes=0,
+               sim_port=0, node_port_base=0, shards=1, causal=False, total_order=False,
+               trace=False, profile=False, profile_memory=False):
     # Initialize logger and network simulator
-    self.sim_manager = networkSimulator(num_nodes)
+    # RUNTIME="ASYNC" runs the simulator and all nodes on one asyncio event loop
+    # TRANSPORT="MEMORY" passes message objects to the nodes without sockets
+    # LOG_FORMAT="BINARY" writes fixed-width records readable with BinaryLogReader
+    # Differential vector clocks rely on FIFO links between each pair of nodes
+    # processes=K runs the nodes in K worker processes (see processDeployment.py)
+    # Ports of 0 are ephemeral; the bound ones are published in self.ports
+    # shards=K partitions the thread runtime's deliveries by receiver over K delay queues
+    # causal=True holds vector clock messages back until their causal predecessors were delivered
+    # total_order=True delivers Lamport broadcasts in the same order on every node, over FIFO links
+    # trace=True stamps every message at each stage for the histograms of latency()
+    # profile=True profiles every thread for profile_report(), dumped to profile_dir by stop()
+    # profile_memory=True profiles threads and also takes tracemalloc snapshots
+    if RUNTIME == "ASYNC" and TRANSPORT == "MEMORY":
+      raise ValueError("The in-memory transport is only available with the thread runtime")
+    if processes and (RUNTIME != "THREAD" or TRANSPORT != "TCP"):
+      raise ValueError("Worker processes are only available with the thread runtime and the TCP transport")
+    if shards > 1 and RUNTIME != "THREAD":
+      raise ValueError("Sharded delivery is only available with the thread runtime")
+    if (profile or profile_memory) and RUNTIME != "THREAD":
+      raise ValueError("Thread profiling is only available with the thread runtime")
+    self.RUNTIME = RUNTIME
+    self.TRANSPORT = TRANSPORT
+    self.ports = PortRegistry(sim_port, node_port_base)
+    fifo = differential or total_order
+    self.profiler = ThreadProfiler(memory=profile_memory) if profile or profile_memory else None
+    self.profile_dir = f"profile_{NODE_TYPE}"
+    if RUNTIME == "ASYNC":
+      self.runtime = AsyncRuntime()
+      self.sim_manager = AsyncNetworkSimulator(num_nodes, self.runtime, fifo=fifo, registry=self.ports)
+    elif shards > 1:
+      self.runtime = None
+      self.sim_manager = ShardedNetworkSimulator(num_nodes, fifo=fifo, tcp=(TRANSPORT == "TCP"), registry=self.ports, shards=shards,
+                                                 profiler=self.profiler)
+    else:
+      self.runtime = None
+      self.sim_manager = networkSimulator(num_nodes, fifo=fifo, tcp=(TRANSPORT == "TCP"), registry=self.ports, profiler=self.profiler)
+    if logger is None and LOG_FORMAT == "BINARY":
+      logger = BinaryEventLogger(f"simulationLog_{NODE_TYPE}.bin", clock_width=num_nodes if NODE_TYPE == "VECTOR" else 1)
     self.logger = EventLogger(f"simulationLog_{NODE_TYPE}.txt") if logger is None else logger
     self.nodes = []
     self.NODE_TYPE = NODE_TYPE
+    self.differential = differential
+    self.causal = causal
+    self.total_order = total_order
+    self.tracer = LatencyTracer() if trace else None
+    self.processes = processes
+    self.deployment = None
 
     self.setup_nodes(num_nodes)
 
   def setup_nodes(self, num_nodes):
     # Start Nodes of the specified type
+    if self.processes:
+      self.deployment = ProcessDeployment(num_nodes, self.processes, self.NODE_TYPE, self.logger, self.differential, self.ports,
+                                          causal=self.causal, total_order=self.total_order, trace=self.tracer is not None,
+                                          profile=self.profiler is not None, profile_memory=bool(self.profiler and self.profiler.memory))
+      self.nodes = self.deployment.nodes
+      return
+
+    node_options = {}
     if self.NODE_TYPE == "VECTOR":
-      NodeClass = VectorClockNode
+      NodeClass = AsyncVectorClockNode if self.runtime else VectorClockNode
+      node_options["differential"] = self.differential
+      node_options["causal"] = self.causal
     if self.NODE_TYPE == "LAMPORT":
-      NodeClass = LamportNode
+      NodeClass = AsyncLamportNode if self.runtime else LamportNode
+      node_options["total_order"] = self.total_order
+    if self.runtime:
+      node_options["runtime"] = self.runtime
+      node_options["registry"] = self.ports
 
     for node_id in range(1, num_nodes + 1):
       known_nodes = list(range(1, num_nodes + 1))
-      node = NodeClass(node_id, known_nodes, self.logger)
-      threading.Thread(target=node.start, daemon=True).start()
+      if self.TRANSPORT == "MEMORY":
+        node_options["transport"] = InMemoryTransport(self.sim_manager)
+      elif not self.runtime:
+        node_options["transport"] = TcpTransport(registry=self.ports)
+      node = NodeClass(node_id, known_nodes, self.logger, **node_options)
+      node.tracer = self.tracer
+      node.profiler = self.profiler
+      node.start()
       self.nodes.append(node)
-      time.sleep(0.2)  # Stagger node startups
+    if self.TRANSPORT == "TCP" and not self.ports.wait_for_nodes(range(1, num_nodes + 1), timeout=30):
+      raise ConnectionError("Not every node could bind a port")
+
+  # --- Driving the nodes -------------------------------------------------------
+
+  def execute(self, node_id, event_type, target_id=None, message_type="CONTACT"):
+    """Runs one scenario event on node `node_id`: a LOCAL_EVENT, a SEND to `target_id` or a BROADCAST.
+
+    A BROADCAST goes to the node ids in `target_id`, or to all other nodes if it is None.
+    """
+    if self.deployment:
+      self.deployment.execute(node_id, event_type, target_id, message_type)
+      return
+    node = self.nodes[node_id - 1]
+    if event_type == "LOCAL_EVENT":
+      node.local_event()
+    elif event_type == "SEND":
+      node.send(target_id, message_type)
+    elif event_type == "BROADCAST":
+      node.broadcast(message_type, target_id)
+    else:
+      raise ValueError(f"Unknown event type {event_type}")
+
+  def run_scenario(self, scenario, timeout=10.0):
+    """Runs (node_id, event_type, target_id) events in order, each once the previous one was fully delivered.
+
+    Returns False if the simulation did not quiesce within `timeout` seconds after an event.
+    """
+    for node_id, event_type, target_id in scenario:
+      self.execute(node_id, event_type, target_id)
+      if not self.wait_for_quiescence(timeout):
+        return False
+    return True
+
+  def in_flight(self):
+    """Messages sent but not yet processed by their receiver."""
+    if self.deployment:
+      received, sent = self.deployment.counters()
+      return sent - received
+    # Received is read first: every message it counts was already counted by its sender
+    received = sum(node.messages_Received for node in self.nodes)
+    return sum(node.messages_Sent for node in self.nodes) - received
+
+  def quiescent(self):
+    """True when no message is in flight and the simulator's delivery queue is empty."""
+    return self.in_flight() == 0 and self.sim_manager.queue_stats()["depth"] == 0
+
+  def wait_for_quiescence(self, timeout=10.0, poll=0.002):
+    """Blocks until quiescent() holds. Returns False on timeout."""
+    deadline = time.monotonic() + timeout
+    while not self.quiescent():
+      if time.monotonic() >= deadline:
+        return False
+      time.sleep(poll)
+    return True
+
+  def latency(self, by="node"):
+    """p50/p99/max in ms of each stage of the traced messages processed so far.
+
+    Grouped `by` "node" (receiver), "link" ((sender, receiver)) or None for
+    all messages; see latencyTracing.STAGES for the stages.
+    """
+    if self.tracer is None:
+      raise RuntimeError("Messages are not traced; create the SimulationManager with trace=True")
+    if self.deployment:
+      return self.deployment.latency().summary(by)
+    return self.tracer.summary(by)
+
+  def profiles(self):
+    """ThreadProfiler with the per-role profiles of every thread so far, worker processes included."""
+    if self.profiler is None:
+      raise RuntimeError("Threads are not profiled; create the SimulationManager with profile=True")
+    if not self.deployment:
+      return self.profiler
+    merged = self.deployment.profiles()
+    merged.merge(self.profiler)  # The simulator's threads run in this process
+    return merged
+
+  def profile_report(self, sort="cumulative", limit=20):
+    """Text report of the top functions per thread role (listener, processor, scheduler, forwarder)."""
+    return self.profiles().report(sort=sort, limit=limit)
+
+  def dump_profile(self, directory=None):
+    """Writes the per-role profiles and the report to `directory` (profile_dir by default), returns the paths."""
+    return self.profiles().dump(self.profile_dir if directory is None else directory)
+
+  def flush_logs(self, timeout=None):
+    """Blocks until every event logged so far, in this process or a worker, is in the log file."""
+    if self.deployment:
+      self.deployment.flush(timeout)
+    return self.logger.flush(timeout)
+
+  def stop(self):
+    """Stops the nodes, their worker processes and the network simulator, then closes the logger.
+
+    With profiling the profiles are dumped to profile_dir first.
+    """
+    if self.profiler is not None:
+      try:
+        print(f"Profiles written to {', '.join(self.dump_profile())}")
+      except (ConnectionError, OSError) as e:
+        print(f"Could not write the profiles: {e}")
+    if self.deployment:
+      self.deployment.stop()
+    else:
+      for node in self.nodes:
+        node.stop()
+    self.sim_manager.stop()
+    if self.runtime is not None:
+      self.runtime.stop()  # After the nodes and the simulator, which stop on its loop
+    if self.profiler is not None:
+      self.profiler.stop()
+    self.logger.close()  # Nothing logs anymore; writes what is left and ends the writer thread
 
 if __name__ == "__main__":
   # If NODE_TYPE is specified, use it, else default to LAMPORT
@@ -53,8 +237,25 @@ if __name__ == "__main__":
     NODE_TYPE = "LAMPORT"
 
   NUM_NODES = int(sys.argv[1])  # First argument is number of nodes
+  OPTIONS = [arg.lower() for arg in sys.argv[3:]]
+  DIFFERENTIAL = "diff" in OPTIONS  # Optional differential vector clocks
+  RUNTIME = "ASYNC" if "async" in OPTIONS else "THREAD"  # Optional asyncio runtime
+  TRANSPORT = "MEMORY" if "memory" in OPTIONS else "TCP"  # Optional in-process transport
+  LOG_FORMAT = "BINARY" if "binlog" in OPTIONS else "JSON"  # Optional binary event log
+  # Optional worker processes for the nodes, e.g. procs=4
+  PROCESSES = next((int(arg.split("=")[1]) for arg in OPTIONS if arg.startswith("procs=")), 0)
+  # Optional fixed ports (simulator on SIM_PORT, node k on NODE_PORT_BASE + k) instead of ephemeral ones
+  PORTS = (SIM_PORT, NODE_PORT_BASE) if "ports=fixed" in OPTIONS else (0, 0)
+  SHARDS = next((int(arg.split("=")[1]) for arg in OPTIONS if arg.startswith("shards=")), 1)  # e.g. shards=4
+  CAUSAL = "causal" in OPTIONS  # Optional causal delivery for vector clock nodes
+  TOTAL_ORDER = "total" in OPTIONS  # Optional totally ordered broadcasts for Lamport nodes
+  TRACE = "trace" in OPTIONS  # Optional per-message latency tracing
+  PROFILE_MEMORY = "profmem" in OPTIONS  # Optional tracemalloc snapshots, implies profile
+  PROFILE = "profile" in OPTIONS or PROFILE_MEMORY  # Optional per-thread profiling
   print(f"Starting simulation with {NUM_NODES} nodes of type {NODE_TYPE}")
-  sim_manager = SimulationManager(NUM_NODES, NODE_TYPE)
+  sim_manager = SimulationManager(NUM_NODES, NODE_TYPE, differential=DIFFERENTIAL, RUNTIME=RUNTIME, TRANSPORT=TRANSPORT, LOG_FORMAT=LOG_FORMAT, processes=PROCESSES,
+                                  sim_port=PORTS[0], node_port_base=PORTS[1], shards=SHARDS, causal=CAUSAL, total_order=TOTAL_ORDER, trace=TRACE,
+                                  profile=PROFILE, profile_memory=PROFILE_MEMORY)
 
   # Allow for terminal interaction
   try:
@@ -72,10 +273,33 @@ if __name__ == "__main__":
         target_id = int(cmd[2])
 
         print(f"Node {node_id} contacting Node {target_id}")
+        sim_manager.execute(node_id, "SEND", target_id)
+
+      if cmd[0] == "broadcast":  # broadcast <node_id> [target_id ...]
+        node_id = int(cmd[1])
+        targets = [int(k) for k in cmd[2:]] or None
+
+        print(f"Node {node_id} broadcasting to {targets or 'all nodes'}")
+        sim_manager.execute(node_id, "BROADCAST", targets)
+
+      if cmd[0] == "latency":  # latency [node|link|all]
+        by = cmd[1] if len(cmd) > 1 else "node"
+        for key, stages in sorted(sim_manager.latency(None if by == "all" else by).items()):
+          print(key, stages)
+
+      if cmd[0] == "profile":  # profile [dump]
+        if len(cmd) > 1 and cmd[1] == "dump":
+          print(f"Profiles written to {', '.join(sim_manager.dump_profile())}")
+        else:
+          print(sim_manager.profile_report())
+
+      if cmd[0] == "workload":  # workload <pattern> <rate> <count> [send_ratio]
+        generator = WorkloadGenerator(sim_manager, pattern=cmd[1], rate=float(cmd[2]),
+                                      send_ratio=float(cmd[4]) if len(cmd) > 4 else 1.0)
+        print(generator.run(count=int(cmd[3])))
 
-        message = sim_manager.nodes[node_id - 1]._create_message(target_id, "CONTACT")
-        sim_manager.nodes[node_id - 1].send_message(target_id, message)
-      time.sleep(3)  # Small delay to allow message processing
+      sim_manager.wait_for_quiescence()  # Wait for the messages to be processed
 
   except KeyboardInterrupt:
     print("\nShutting down simulation.")
+    sim_manager.stop()
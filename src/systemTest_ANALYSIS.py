@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+# src/systemTest_ANALYSIS.py
+
+"""
+System Test for the offline causality analysis
+----------------------------------------
+Analyzes logs of discrete-event runs and compares the vectorized
+happens-before relation with a transitive closure built edge by edge.
+"""
+
+
+# autopep8: off
+import pytest
+import os
+import sys
+
+np = pytest.importorskip("numpy")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.discreteEventSimulation import DiscreteEventSimulator
+from src.eventLogger import EventLogger
+from src.binaryEventLog import BinaryEventLogger
+from src.causalityAnalysis import CausalityAnalysis
+# autopep8: on
+
+# --- Utility helpers ---------------------------------------------------------
+
+
+def simulate(log_file, NODE_TYPE, logger_class=EventLogger, num_events=300, fifo=True, seed=1):
+  """Logs one seeded random run and returns its analysis."""
+  logger = logger_class(log_file) if logger_class is EventLogger else logger_class(log_file, 5 if NODE_TYPE == "VECTOR" else 1)
+  logger.write_marker("--- New Test Run ---")
+  simulator = DiscreteEventSimulator(5, NODE_TYPE, logger=logger, seed=seed)
+  simulator.fifo = fifo
+  simulator.schedule_random_events(num_events, send_ratio=0.6)
+  simulator.run()
+  assert logger.flush(timeout=5)
+  logger.close()
+  return CausalityAnalysis.from_log(log_file)
+
+
+def transitive_closure(analysis):
+  """reach[a, b] is True when a happens before b, built from program order and message edges."""
+  n = analysis.num_events
+  reach = np.zeros((n, n), dtype=bool)
+  for event in range(n):  # The log order is a topological order
+    for earlier in (analysis.previous_event[event], analysis.send_of[event]):
+      if earlier >= 0:
+        reach[earlier, event] = True
+        reach[:, event] |= reach[:, earlier]
+  return reach
+
+# --- Tests --------------------------------------------------------------------
+
+
+@pytest.mark.parametrize("NODE_TYPE", ["LAMPORT", "VECTOR"])
+@pytest.mark.parametrize("fifo", [True, False])
+def test_happens_before_matches_transitive_closure(tmp_path, NODE_TYPE, fifo):
+  analysis = simulate(str(tmp_path / "simulationLog.txt"), NODE_TYPE, fifo=fifo)
+  reach = transitive_closure(analysis)
+  concurrent = ~(reach | reach.T)
+  np.fill_diagonal(concurrent, False)
+
+  assert len(analysis.unmatched_receives()) == 0
+  assert (analysis.happens_before_matrix() == reach).all()
+  assert (analysis.concurrency_matrix() == concurrent).all()
+  assert (analysis.concurrency_counts() == concurrent.sum(axis=1)).all()
+  assert analysis.ordering_violations() == []
+
+  last = analysis.num_events - 1
+  assert list(analysis.causal_past(last)) == list(np.flatnonzero(reach[:, last]))
+  assert list(analysis.causal_future(0)) == list(np.flatnonzero(reach[0]))
+
+
+def test_binary_and_json_logs_agree(tmp_path):
+  from_json = simulate(str(tmp_path / "simulationLog.txt"), "VECTOR")
+  from_binary = simulate(str(tmp_path / "simulationLog.bin"), "VECTOR", logger_class=BinaryEventLogger)
+  assert from_json.summary() == from_binary.summary()
+  assert (from_json.send_of == from_binary.send_of).all()
+
+
+def test_causal_chain_is_ordered(tmp_path):
+  analysis = simulate(str(tmp_path / "simulationLog.txt"), "LAMPORT")
+  chain = analysis.longest_causal_chain()
+  assert all(analysis.happened_before(a, b) for a, b in zip(chain, chain[1:]))
+  # With one increment per event the longest chain ending at an event is its Lamport clock
+  assert len(chain) == analysis.clocks[:, 0].max()
+
+
+def test_detects_ordering_violations():
+  """Node 2 receives Node 1's message with a clock that is not larger than the send."""
+  analysis = CausalityAnalysis(
+      node_id=[1, 1, 2],
+      event_type=[1, 2, 3],  # LOCAL_EVENT, SEND_MESSAGE, RECEIVE_MESSAGE
+      peer_id=[0, 2, 1],
+      clocks=[1, 2, 2])
+  assert analysis.send_of.tolist() == [-1, -1, 1]
+  assert analysis.ordering_violations() == [(1, 2, "MESSAGE")]
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+# src/systemTest_ASYNC.py
+
+"""
+System Test for the asyncio runtime
+----------------------------------------
+Runs the Lamport nodes and the network simulator on a single event loop
+and checks that clocks and message delivery behave like the threaded runtime.
+"""
+
+
+# autopep8: off
+import socket
+import time
+import pytest
+import os
+import sys
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.simulationManager import SimulationManager
+from src.eventLogger import NullLogger
+# autopep8: on
+
+# --- Utility helpers ---------------------------------------------------------
+
+
+def get_node_by_id(manager, node_id):
+  """Helper to retrieve a node object by its ID."""
+  return manager.nodes[node_id - 1]
+
+
+def wait_until(condition_fn, timeout=10, poll=0.1):
+  """Waits until condition_fn() returns True or timeout occurs."""
+  start = time.time()
+  while time.time() - start < timeout:
+    if condition_fn():
+      return True
+    time.sleep(poll)
+  return False
+
+# --- Fixtures ----------------------------------------------------------------
+
+
+@pytest.fixture(scope="module")
+def node_setup():
+  NODE_TYPE = "LAMPORT"
+  NUM_NODES = 4
+
+  manager = SimulationManager(NUM_NODES, NODE_TYPE, RUNTIME="ASYNC")
+  assert wait_until(lambda: len(manager.nodes) == NUM_NODES, timeout=15), "Nodes did not start in time"
+  yield manager, NODE_TYPE
+  manager.stop()
+
+
+# --- Tests --------------------------------------------------------------------
+
+def test_startup(node_setup):
+  manager, NODE_TYPE = node_setup
+  for node in manager.nodes:
+    assert node._status == "IDLE", f"Node {node.node_Id} did not start in IDLE state."
+
+
+def test_message_ordering_simple(node_setup):
+  """A single send updates the clocks exactly like the threaded runtime."""
+  manager, NODE_TYPE = node_setup
+
+  node1 = get_node_by_id(manager, 1)
+  node2 = get_node_by_id(manager, 2)
+  node1.send_message(2, node1._create_message(2, "CONTACT"))
+
+  assert wait_until(lambda: manager.sim_manager.queue_stats()["delivered"] == 1 and node2.inbox.empty()), "Message was not delivered."
+  assert wait_until(lambda: node2.lamport_Clock == 2), "Node 2 Lamport clock incorrect after receiving message."
+  assert node1.lamport_Clock == 1, "Node 1 Lamport clock incorrect after sending message."
+
+
+def test_burst_single_loop(node_setup):
+  """Many in-flight messages are delivered without extra threads per node or message."""
+  manager, NODE_TYPE = node_setup
+  delivered_before = manager.sim_manager.queue_stats()["delivered"]
+  threads_before = threading.active_count()
+
+  for i in range(200):
+    sender = get_node_by_id(manager, i % 4 + 1)
+    target = (i + 1) % 4 + 1
+    sender.send_message(target, sender._create_message(target, "CONTACT"))
+
+  assert threading.active_count() == threads_before, "Async runtime should not start threads per message."
+  assert wait_until(lambda: manager.sim_manager.queue_stats()["delivered"] == delivered_before + 200), "Not all messages were delivered."
+  assert wait_until(lambda: all(n.inbox.empty() for n in manager.nodes)), "Nodes did not process all messages."
+
+
+def test_stop_releases_loop_and_port():
+  """stop() ends the event loop thread and frees the simulator's port for the next run."""
+  with socket.socket() as probe:
+    probe.bind(("127.0.0.1", 0))
+    sim_port = probe.getsockname()[1]
+  for _ in range(2):
+    manager = SimulationManager(2, "LAMPORT", logger=NullLogger(), RUNTIME="ASYNC", sim_port=sim_port)
+    node1 = get_node_by_id(manager, 1)
+    node1.send_message(2, node1._create_message(2, "CONTACT"))
+    assert wait_until(lambda: get_node_by_id(manager, 2).messages_Received == 1), "Message was not delivered."
+    manager.stop()
+    assert not manager.runtime.thread.is_alive() and manager.runtime.loop.is_closed()
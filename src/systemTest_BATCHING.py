@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+
+# src/systemTest_BATCHING.py
+
+"""
+System Test for per-destination coalescing
+------------------------------------------
+Checks that messages due for the same node in one delivery tick are sent as
+one batch frame and queued by the node in one step, over TCP and in memory,
+and that a burst of traffic needs fewer frames than messages.
+"""
+
+
+# autopep8: off
+import time
+import pytest
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.simulationManager import SimulationManager
+from src.eventLogger import NullLogger
+from src.workload import WorkloadGenerator
+from src.Lamport_timestamps.lamportMessage import LamportMessage
+from src import wireCodec
+# autopep8: on
+
+# --- Utility helpers ---------------------------------------------------------
+
+
+def due(target_id, messages):
+  now = time.monotonic()
+  return [{"msg_id": k, "target_id": target_id, "message": m, "delivery_time": now} for k, m in enumerate(messages)]
+
+
+def wait_until(predicate, timeout=5.0):
+  deadline = time.monotonic() + timeout
+  while time.monotonic() < deadline:
+    if predicate():
+      return True
+    time.sleep(0.01)
+  return predicate()
+
+
+# --- Tests --------------------------------------------------------------------
+
+def test_batch_roundtrip():
+  payloads = [LamportMessage("CONTACT", k, 2, k * 10).encode() for k in (1, 3, 4)]
+  batch = wireCodec.pack_batch(2, payloads)
+  assert wireCodec.peek_route(batch) == (wireCodec.BATCH_SENDER, 2)
+  assert wireCodec.batch_payloads(batch) == payloads
+  assert wireCodec.pack_batch(2, payloads[:1]) == payloads[0]  # A single message is not wrapped
+  assert wireCodec.batch_payloads(payloads[0]) == payloads[:1]
+  with pytest.raises(wireCodec.WireFormatError):
+    wireCodec.batch_payloads(batch[:-3])
+
+
+@pytest.mark.parametrize("TRANSPORT", ["TCP", "MEMORY"])
+def test_due_messages_coalesced_per_target(TRANSPORT):
+  manager = SimulationManager(3, "LAMPORT", logger=NullLogger(), TRANSPORT=TRANSPORT)
+  try:
+    simulator = manager.sim_manager
+    node2, node3 = manager.nodes[1], manager.nodes[2]
+    to_node2 = [LamportMessage("CONTACT", 1, 2, k) for k in range(1, 11)]
+    to_node3 = [LamportMessage("CONTACT", 1, 3, 7)]
+    if TRANSPORT == "TCP":
+      to_node2, to_node3 = [m.encode() for m in to_node2], [m.encode() for m in to_node3]
+
+    batches_before = simulator.queue_stats()["batches"]
+    simulator.deliver_messages(due(2, to_node2) + due(3, to_node3))
+    assert wait_until(lambda: node2.messages_Received == 10 and node3.messages_Received == 1)
+    assert simulator.queue_stats()["batches"] - batches_before == 2
+    assert node2.lamport_Clock == 11 and node3.lamport_Clock == 8
+  finally:
+    manager.stop()
+
+
+@pytest.mark.parametrize("RUNTIME", ["THREAD", "ASYNC"])
+def test_burst_uses_fewer_frames(RUNTIME):
+  """All-to-all bursts put several messages for the same node into one tick."""
+  manager = SimulationManager(8, "VECTOR", logger=NullLogger(), RUNTIME=RUNTIME, differential=True)
+  try:
+    stats = WorkloadGenerator(manager, pattern="all-to-all", rate=20000).run(count=8 * 7 * 10)
+    assert stats["quiescent"]
+    queue = manager.sim_manager.queue_stats()
+    assert queue["delivered"] == 8 * 7 * 10
+    assert queue["batches"] < queue["delivered"]
+  finally:
+    manager.stop()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+# src/systemTest_BINLOG.py
+
+"""
+System Test for the binary event log
+----------------------------------------
+Logs a discrete-event run in the binary format and reads it back
+through the memory-mapped reader.
+"""
+
+
+# autopep8: off
+import pytest
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.discreteEventSimulation import DiscreteEventSimulator
+from src import binaryEventLog
+from src.binaryEventLog import BinaryEventLogger, BinaryLogReader
+# autopep8: on
+
+# --- Tests --------------------------------------------------------------------
+
+
+def test_binary_log_round_trip(tmp_path):
+  """Each record keeps its order, node, type, peer and full vector clock."""
+  log_file = str(tmp_path / "simulationLog_VECTOR.bin")
+  logger = BinaryEventLogger(log_file, clock_width=4)
+  simulator = DiscreteEventSimulator(4, "VECTOR", logger=logger)
+  simulator.schedule_scenario([(1, "SEND", 2), (2, "LOCAL_EVENT", None), (2, "SEND", 3)], interval=1.0)
+  simulator.run()
+  logger.write_marker("--- New Test Run ---")
+  assert logger.flush(timeout=5)
+
+  with BinaryLogReader(log_file) as reader:
+    assert len(reader) == 6
+    assert list(reader.seq) == list(range(6))
+    assert [reader.event_type_name(i) for i in range(len(reader))] == [
+        "SEND_MESSAGE", "RECEIVE_MESSAGE", "LOCAL_EVENT", "SEND_MESSAGE", "RECEIVE_MESSAGE", "MARKER"]
+    assert list(reader.node_id[:5]) == [1, 2, 2, 2, 3]
+    assert list(reader.peer_id[:5]) == [2, 1, 0, 3, 2]
+    assert reader.clock(4) == [1, 3, 1, 0]
+  logger.close()
+
+
+def test_reader_refresh_picks_up_appended_records(tmp_path):
+  log_file = str(tmp_path / "simulationLog_LAMPORT.bin")
+  logger = BinaryEventLogger(log_file, clock_width=1)
+  logger.record_event(1, "LOCAL_EVENT", 1)
+  assert logger.flush(timeout=5)
+
+  reader = BinaryLogReader(log_file)
+  assert len(reader) == 1
+  logger.record_event(1, "LOCAL_EVENT", 2)
+  assert logger.flush(timeout=5)
+  reader.refresh()
+  assert len(reader) == 2 and reader.clock(1) == [2]
+  reader.close()
+  logger.close()
+
+
+def test_big_endian_host_without_numpy_rejected(tmp_path, monkeypatch):
+  log_file = str(tmp_path / "simulationLog_LAMPORT.bin")
+  logger = BinaryEventLogger(log_file, clock_width=1)
+  logger.close()
+  monkeypatch.setattr(binaryEventLog, "np", None)
+  monkeypatch.setattr(binaryEventLog.sys, "byteorder", "big")
+  with pytest.raises(RuntimeError):
+    BinaryLogReader(log_file)
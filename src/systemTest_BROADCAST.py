@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+# src/systemTest_BROADCAST.py
+
+"""
+System Test for broadcast/multicast
+-----------------------------------
+Checks that a broadcast stamps the clock once, reaches the simulator as a
+single envelope and is fanned out to every target, over TCP, in memory and
+on the discrete-event simulator.
+"""
+
+
+# autopep8: off
+import random
+import pytest
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.simulationManager import SimulationManager
+from src.discreteEventSimulation import DiscreteEventSimulator
+from src.eventLogger import EventLogger, NullLogger
+from src.Lamport_timestamps.lamportMessage import LamportMessage
+from src.transport import Transport
+from src import wireCodec
+# autopep8: on
+
+# --- Tests --------------------------------------------------------------------
+
+
+def test_multicast_envelope_roundtrip():
+  payload = LamportMessage("CONTACT", 3, wireCodec.MULTICAST_RECEIVER, 7).encode()
+  envelope = wireCodec.pack_multicast(3, [1, 2, 4], payload)
+  assert wireCodec.is_multicast(envelope) and not wireCodec.is_multicast(payload)
+  assert wireCodec.peek_route(envelope) == (3, wireCodec.MULTICAST_RECEIVER)
+  assert wireCodec.unpack_multicast(envelope) == (3, (1, 2, 4), payload)
+
+
+@pytest.mark.parametrize("TRANSPORT", ["TCP", "MEMORY"])
+def test_broadcast_stamps_once_and_reaches_all(TRANSPORT):
+  manager = SimulationManager(5, "LAMPORT", logger=NullLogger(), TRANSPORT=TRANSPORT)
+  try:
+    manager.nodes[0].broadcast("CONTACT")
+    assert manager.wait_for_quiescence()
+    assert [n.lamport_Clock for n in manager.nodes] == [1, 2, 2, 2, 2]
+    assert manager.sim_manager.queue_stats()["delivered"] == 4
+
+    manager.nodes[1].broadcast("CONTACT", targets=[3, 5])
+    assert manager.wait_for_quiescence()
+    assert [n.lamport_Clock for n in manager.nodes] == [1, 3, 4, 2, 4]
+    assert manager.nodes[1].messages_Sent == 2
+  finally:
+    manager.stop()
+
+
+def test_differential_broadcast_matches_full_clocks():
+  """A differential broadcast carries what the least recently contacted target is missing."""
+  def final_clocks(differential):
+    simulator = DiscreteEventSimulator(6, "VECTOR", logger=NullLogger(), seed=5, differential=differential)
+    rng = random.Random(5)
+    for step in range(400):
+      node = simulator.nodes[rng.randrange(6)]
+      if rng.random() < 0.3:
+        simulator.schedule_at(step * 0.05, node.broadcast, "CONTACT", rng.sample(range(1, 7), 3))
+      else:
+        target = rng.choice([k for k in range(1, 7) if k != node.node_Id])
+        simulator.schedule_send(step * 0.05, node.node_Id, target)
+    simulator.run()
+    return [n.vector_Clock.tolist() for n in simulator.nodes]
+
+  assert final_clocks(True) == final_clocks(False)
+
+
+def test_broadcast_receives_matched_in_analysis(tmp_path):
+  pytest.importorskip("numpy")
+  from src.causalityAnalysis import CausalityAnalysis
+
+  log_file = str(tmp_path / "simulationLog_VECTOR.txt")
+  logger = EventLogger(log_file)
+  simulator = DiscreteEventSimulator(4, "VECTOR", logger=logger)
+  simulator.schedule_at(0.0, simulator.nodes[0].broadcast, "CONTACT")
+  simulator.schedule_send(1.0, 2, 1)
+  simulator.run()
+  logger.close()
+
+  analysis = CausalityAnalysis.from_log(log_file, run=None)
+  assert len(analysis.unmatched_receives()) == 0
+  assert analysis.ordering_violations() == []
+  broadcast = 0  # The first event of the log
+  assert all(analysis.happened_before(broadcast, k) for k in range(1, analysis.num_events))
+
+
+def test_transport_without_multicast_rejected():
+  class UnicastOnly(Transport):
+    def send(self, node, message):
+      pass
+
+    def listen(self, node):
+      pass
+
+    def close(self, node):
+      pass
+
+  with pytest.raises(TypeError):  # Fails when created, not on the first broadcast
+    UnicastOnly()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+
+# src/systemTest_CAUSAL.py
+
+"""
+System Test for causal (CBCAST) delivery
+----------------------------------------
+Checks that vector clock nodes with causal=True hold a message back until
+the broadcasts it depends on were delivered, releasing it once they are,
+and that a reordering workload is delivered in causal order.
+"""
+
+
+# autopep8: off
+import random
+import threading
+import pytest
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.simulationManager import SimulationManager
+from src.discreteEventSimulation import DiscreteEventSimulator
+from src.eventLogger import NullLogger
+from src.Vector_clocks.node import VectorClockNode
+from src.Vector_clocks.vectorMessage import VectorMessage
+from src.transport import Transport
+from src.wireCodec import MULTICAST_RECEIVER
+# autopep8: on
+
+# --- Utility helpers ---------------------------------------------------------
+
+
+class FlakyTransport(Transport):
+  """Records the messages it is given and fails the first `failures` multicasts."""
+
+  def __init__(self, failures=0):
+    self.failures = failures
+    self.sent = []
+
+  def send(self, node, message):
+    self.sent.append(message)
+
+  def multicast(self, node, message, targets):
+    if self.failures:
+      self.failures -= 1
+      raise ConnectionRefusedError("Simulator down")
+    self.sent.append(message)
+
+  def listen(self, node):
+    pass
+
+  def close(self, node):
+    pass
+
+
+def record_deliveries(node):
+  """Replaces handle_message so every delivered message is appended to the returned list."""
+  delivered = []
+  node.handle_message = delivered.append
+  return delivered
+
+
+def causal_violations(delivered):
+  """(earlier, later) delivery positions where the later message is a broadcast sent before the earlier one."""
+  sends = [(msg.receiver_id == MULTICAST_RECEIVER, list(msg.vector_clock)) for msg in delivered]
+  violations = []
+  for later, (is_broadcast, later_send) in enumerate(sends):
+    if not is_broadcast:
+      continue
+    for earlier in range(later):
+      earlier_send = sends[earlier][1]
+      if later_send != earlier_send and all(a <= b for a, b in zip(later_send, earlier_send)):
+        violations.append((earlier, later))
+  return violations
+
+
+def run_workload(causal, seed=11):
+  simulator = DiscreteEventSimulator(6, "VECTOR", logger=NullLogger(), seed=seed, causal=causal)
+  delivered = [record_deliveries(node) for node in simulator.nodes]
+  rng = random.Random(seed)
+  for step in range(300):
+    node = simulator.nodes[rng.randrange(6)]
+    if rng.random() < 0.5:
+      simulator.schedule_at(step * 0.02, node.broadcast, "CONTACT")
+    else:
+      target = rng.choice([k for k in range(1, 7) if k != node.node_Id])
+      simulator.schedule_send(step * 0.02, node.node_Id, target)
+  simulator.run()
+  return simulator, delivered
+
+
+# --- Tests --------------------------------------------------------------------
+
+def test_causal_clock_roundtrip():
+  message = VectorMessage("CONTACT", 2, MULTICAST_RECEIVER, [1, 3, 0], causal_clock=[1, 2, 0])
+  decoded = VectorMessage.decode(message.encode())
+  assert decoded == message and decoded.causal_clock == [1, 2, 0]
+  assert VectorMessage.decode(VectorMessage("CONTACT", 2, 3, [1, 3, 0]).encode()).causal_clock is None
+
+
+def test_hold_back_and_release():
+  nodes = [VectorClockNode(k, [1, 2, 3], NullLogger(), causal=True) for k in (1, 2, 3)]
+  node1, node2, node3 = nodes
+  delivered = record_deliveries(node3)
+
+  first = node1._create_broadcast([2, 3], "CONTACT")
+  node2.deliver_message(first)
+  second = node2._create_broadcast([1, 3], "CONTACT")  # Depends on `first`
+  reply = node2._create_message(3, "CONTACT")  # Unicast, also depends on `first`
+
+  node3.deliver_message(second)
+  node3.deliver_message(reply)
+  assert delivered == [] and node3.held_Back == 2
+  assert node3.vector_Clock.tolist() == [0, 0, 0]
+
+  node3.deliver_message(first)
+  assert delivered[0] is first and {id(m) for m in delivered[1:]} == {id(second), id(reply)}
+  assert node3.held_Back == 0 and node3.hold_Back == {}
+  assert node3.causal_Delivered == [1, 1, 0]
+
+
+def test_failed_broadcast_not_counted():
+  """A broadcast the transport refused must not leave a gap receivers wait on forever."""
+  transport = FlakyTransport(failures=1)
+  node1 = VectorClockNode(1, [1, 2, 3], NullLogger(), transport=transport, causal=True)
+  node2 = VectorClockNode(2, [1, 2, 3], NullLogger(), causal=True)
+  delivered = record_deliveries(node2)
+
+  node1.broadcast("CONTACT")
+  assert transport.sent == [] and node1.causal_Delivered == [0, 0, 0] and node1.messages_Sent == 0
+  node1.broadcast("CONTACT")
+  assert transport.sent[0].causal_clock == [1, 0, 0]
+
+  node2.deliver_message(transport.sent[0])
+  assert delivered == transport.sent and node2.held_Back == 0
+
+
+def test_broadcasts_from_one_sender_in_order():
+  node1, node2 = VectorClockNode(1, [1, 2], NullLogger(), causal=True), VectorClockNode(2, [1, 2], NullLogger(), causal=True)
+  delivered = record_deliveries(node2)
+  messages = [node1._create_broadcast([2], "CONTACT") for _ in range(50)]
+  for msg in reversed(messages):
+    node2.deliver_message(msg)
+  assert delivered == messages
+
+
+def test_reordering_delivered_in_causal_order():
+  simulator, delivered = run_workload(causal=True)
+  assert all(node.held_Back == 0 for node in simulator.nodes)
+  assert all(causal_violations(d) == [] for d in delivered)
+  counts = [node.causal_Delivered for node in simulator.nodes]
+  assert all(c[k] == counts[k][k] for c in counts for k in range(6) if c is not counts[k])
+
+  _, unordered = run_workload(causal=False)
+  assert any(causal_violations(d) for d in unordered)  # The random delays do reorder without it
+
+
+def test_threaded_concurrent_broadcasts():
+  manager = SimulationManager(5, "VECTOR", logger=NullLogger(), TRANSPORT="MEMORY", causal=True)
+  try:
+    def broadcaster(node):
+      for _ in range(20):
+        node.broadcast("CONTACT")
+    threads = [threading.Thread(target=broadcaster, args=(node,)) for node in manager.nodes]
+    for t in threads:
+      t.start()
+    for t in threads:
+      t.join()
+    assert manager.wait_for_quiescence()
+    assert all(node.held_Back == 0 for node in manager.nodes)
+    assert all(node.causal_Delivered == [20] * 5 for node in manager.nodes)
+  finally:
+    manager.stop()
+
+
+def test_unsupported_configurations():
+  with pytest.raises(ValueError):
+    VectorClockNode(1, [1, 2], NullLogger(), differential=True, causal=True)
+  node = VectorClockNode(1, [1, 2, 3], NullLogger(), causal=True)
+  with pytest.raises(ValueError):
+    node.broadcast("CONTACT", targets=[2])
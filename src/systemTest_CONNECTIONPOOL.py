@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+
+# src/systemTest_CONNECTIONPOOL.py
+
+"""
+System Test for the connection pool
+-----------------------------------
+Checks that ConnectionPool reuses one connection per port, reconnects exactly
+once when its peer dropped the connection, raises when the peer is gone for
+good, and that close() closes the pooled connections.
+"""
+
+
+# autopep8: off
+import queue
+import socket
+import struct
+import threading
+import pytest
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.connectionPool import ConnectionPool
+from src.messageFraming import encode_frame, read_frames
+# autopep8: on
+
+# --- Utility helpers ---------------------------------------------------------
+
+
+class CountingPool(ConnectionPool):
+  """ConnectionPool that counts the connections it opens."""
+
+  def __init__(self):
+    super().__init__()
+    self.connects = 0
+
+  def _connect(self, port):
+    self.connects += 1
+    return super()._connect(port)
+
+
+class Peer:
+  """Listening socket that queues every frame it reads and the connection it came on.
+
+  A b"reset" frame makes the reader close its connection with a RST, so the
+  pool's next writes on it fail.
+  """
+
+  def __init__(self):
+    self.server = socket.create_server(("localhost", 0))
+    self.port = self.server.getsockname()[1]
+    self.connections = queue.Queue()
+    self.frames = queue.Queue()
+    self.resets = queue.Queue()
+    threading.Thread(target=self._accept, daemon=True).start()
+
+  def _accept(self):
+    while True:
+      try:
+        conn, _ = self.server.accept()
+      except OSError:
+        return
+      self.connections.put(conn)
+      threading.Thread(target=self._read, args=(conn,), daemon=True).start()
+
+  def _read(self, conn):
+    try:
+      for frames in read_frames(conn):
+        for frame in frames:
+          if frame == b"reset":
+            conn.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+            conn.close()
+            self.resets.put(conn)
+            return
+          self.frames.put((conn, frame))
+    except OSError:
+      pass
+
+  def close(self):
+    try:
+      self.server.shutdown(socket.SHUT_RDWR)  # Wakes the accept thread, which keeps the socket open until then
+    except OSError:
+      pass
+    self.server.close()
+
+
+# --- Fixtures ----------------------------------------------------------------
+
+
+@pytest.fixture
+def peer():
+  peer = Peer()
+  yield peer
+  peer.close()
+
+
+# --- Tests --------------------------------------------------------------------
+
+def test_connection_reused(peer):
+  pool = CountingPool()
+  try:
+    for k in range(5):
+      pool.send(peer.port, encode_frame(b"%d" % k))
+    frames = [peer.frames.get(timeout=2.0) for _ in range(5)]
+    assert [frame for _, frame in frames] == [b"0", b"1", b"2", b"3", b"4"]
+    assert pool.connects == 1 and len({conn for conn, _ in frames}) == 1
+  finally:
+    pool.close()
+
+
+def test_single_reconnect_after_peer_reset(peer):
+  pool = CountingPool()
+  try:
+    pool.send(peer.port, encode_frame(b"reset"))
+    first_conn = peer.resets.get(timeout=2.0)
+    assert peer.connections.get(timeout=2.0) is first_conn
+
+    # The first write after a RST may still succeed, the next one fails on the dead socket
+    for k in range(20):
+      pool.send(peer.port, encode_frame(b"again"))
+      if pool.connects == 2:
+        break
+    assert pool.connects == 2
+    second_conn, frame = peer.frames.get(timeout=2.0)
+    assert frame == b"again" and second_conn is not first_conn
+    assert peer.connections.get(timeout=2.0) is second_conn
+  finally:
+    pool.close()
+
+
+def test_raises_when_peer_is_gone(peer):
+  pool = CountingPool()
+  pool.send(peer.port, encode_frame(b"reset"))
+  peer.resets.get(timeout=2.0)
+  peer.close()
+  with pytest.raises(OSError):
+    for _ in range(20):
+      pool.send(peer.port, encode_frame(b"lost"))
+  assert pool.connects == 2  # The first connection, then one reconnect attempt for the failed send
+  assert pool._sockets == {}
+
+
+def test_close(peer):
+  pool = ConnectionPool()
+  pool.send(peer.port, encode_frame(b"x"))
+  conn, _ = peer.frames.get(timeout=2.0)
+  pool.close()
+  assert pool._sockets == {}
+  conn.settimeout(2.0)
+  assert conn.recv(1) == b""  # The pool's side of the connection was closed
+  pool.send(peer.port, encode_frame(b"y"))  # A closed pool reconnects on demand
+  assert peer.frames.get(timeout=2.0)[1] == b"y"
+  pool.close()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+# src/systemTest_DES.py
+
+"""
+System Test for the discrete-event simulation mode
+----------------------------------------
+Runs the scenarios of the other system tests on a virtual clock and
+checks that seeded runs are reproducible.
+"""
+
+
+# autopep8: off
+import pytest
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.discreteEventSimulation import DiscreteEventSimulator
+from src.eventLogger import NullLogger
+# autopep8: on
+
+# --- Tests --------------------------------------------------------------------
+
+
+def test_message_ordering_sequential_lamport():
+  """1->2, 2->3, 3 LOCAL_EVENT, 3->4 yields the textbook Lamport clocks without waiting."""
+  simulator = DiscreteEventSimulator(4, "LAMPORT", logger=NullLogger())
+  simulator.schedule_scenario([
+      (1, "SEND", 2),
+      (2, "SEND", 3),
+      (3, "LOCAL_EVENT", None),
+      (3, "SEND", 4),
+  ], interval=1.0)
+  simulator.run()
+
+  assert [n.lamport_Clock for n in simulator.nodes] == [1, 3, 6, 7]
+  assert simulator.stats()["messages_delivered"] == 3
+  assert simulator.now < 4.0, "Virtual time should only advance by the scheduled events."
+
+
+def test_message_ordering_sequential_vector():
+  simulator = DiscreteEventSimulator(4, "VECTOR", logger=NullLogger())
+  simulator.schedule_scenario([(1, "SEND", 2), (2, "SEND", 3), (3, "SEND", 4)], interval=1.0)
+  simulator.run()
+
+  assert simulator.nodes[3].vector_Clock == [1, 2, 2, 1]
+
+
+@pytest.mark.parametrize("NODE_TYPE", ["LAMPORT", "VECTOR"])
+def test_seeded_runs_are_reproducible(NODE_TYPE):
+  def final_clocks(seed):
+    simulator = DiscreteEventSimulator(8, NODE_TYPE, logger=NullLogger(), seed=seed)
+    simulator.schedule_random_events(5000, send_ratio=0.6)
+    simulator.run()
+    return [getattr(n, "lamport_Clock", getattr(n, "vector_Clock", None)) for n in simulator.nodes], simulator.now
+
+  assert final_clocks(42) == final_clocks(42)
+  assert final_clocks(42) != final_clocks(7)
+
+
+def test_large_cluster_differential_matches_full_clocks():
+  """Clocks above NUMPY_MIN_SIZE entries (NumPy-backed when installed) merge the same in both modes."""
+  def final_clocks(differential):
+    simulator = DiscreteEventSimulator(128, "VECTOR", logger=NullLogger(), seed=5, differential=differential)
+    simulator.schedule_random_events(3000, send_ratio=0.8)
+    simulator.run()
+    return [n.vector_Clock.tolist() for n in simulator.nodes]
+
+  assert final_clocks(False) == final_clocks(True)
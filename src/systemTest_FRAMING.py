@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+# src/systemTest_FRAMING.py
+
+"""
+System Test for length-prefixed framing
+---------------------------------------
+Checks that FrameReader reassembles frames split across reads, returns every
+frame of a read that holds several, and rejects frames over MAX_FRAME_SIZE.
+"""
+
+
+# autopep8: off
+import socket
+import pytest
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.messageFraming import encode_frame, FrameReader, FrameError, read_frames, FRAME_HEADER, MAX_FRAME_SIZE
+# autopep8: on
+
+PAYLOADS = [b"", b"a", b"hello world", bytes(range(256)) * 40]
+
+# --- Tests --------------------------------------------------------------------
+
+
+def test_frames_split_across_reads():
+  stream = b"".join(encode_frame(p) for p in PAYLOADS)
+  for chunk_size in (1, 2, 3, 7, 100):
+    reader = FrameReader()
+    frames = []
+    for start in range(0, len(stream), chunk_size):
+      frames.extend(reader.feed(stream[start:start + chunk_size]))
+    assert frames == PAYLOADS and reader.pending() == 0
+
+
+def test_partial_header_and_payload_pending():
+  reader = FrameReader()
+  frame = encode_frame(b"payload")
+  assert reader.feed(frame[:2]) == [] and reader.pending() == 2  # Half a header
+  assert reader.feed(frame[2:6]) == [] and reader.pending() == 6  # Header and part of the payload
+  assert reader.feed(frame[6:]) == [b"payload"] and reader.pending() == 0
+
+
+def test_several_frames_in_one_read():
+  reader = FrameReader()
+  data = b"".join(encode_frame(p) for p in PAYLOADS) + encode_frame(b"tail")[:5]
+  assert reader.feed(data) == PAYLOADS
+  assert reader.pending() == 5
+  assert reader.feed(encode_frame(b"tail")[5:]) == [b"tail"]
+
+
+def test_oversized_frame_rejected():
+  with pytest.raises(FrameError):
+    FrameReader().feed(FRAME_HEADER.pack(MAX_FRAME_SIZE + 1))
+  assert FrameReader().feed(FRAME_HEADER.pack(MAX_FRAME_SIZE)) == []  # At the limit it waits for the payload
+
+  class Huge(bytes):
+    def __len__(self):
+      return MAX_FRAME_SIZE + 1
+  with pytest.raises(FrameError):
+    encode_frame(Huge())
+
+
+def test_read_frames_over_socket():
+  left, right = socket.socketpair()
+  with left, right:
+    left.sendall(b"".join(encode_frame(p) for p in PAYLOADS))
+    left.close()
+    assert [frame for frames in read_frames(right, recv_size=5) for frame in frames] == PAYLOADS
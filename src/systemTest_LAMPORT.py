@@ -13,7 +13,6 @@ using the real network simulator and Node implementations.
 # autopep8: off
 import time
 import pytest
-import json
 import os
 import sys
 import struct
@@ -22,6 +21,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.Lamport_timestamps.node import LamportNode as LamportNode
 from src.simulationManager import SimulationManager
+from src.eventLogIndex import EventLogIndex
 # autopep8: on
 
 # --- Utility helpers ---------------------------------------------------------
@@ -43,49 +43,17 @@ def wait_until(condition_fn, timeout=10, poll=0.5):
 
 
 def run_scenario(manager, scenario_fn, t=10):
-  """Runs a sequence of events defined in the scenario_fn, timeout after t seconds for waiting for idle state."""
-  for node_id, event_type, target_id in scenario_fn:
-    node = get_node_by_id(manager, node_id)
-    if event_type == "LOCAL_EVENT":
-      node.local_event()
-    elif event_type == "SEND":
-      message = node._create_message(target_id, "CONTACT")
-      node.send_message(target_id, message)
-    time.sleep(1)  # Allow some time between events
-
-  wait_until(lambda: all(n.message_Queue == [] or n._status == "IDLE" for n in manager.nodes), timeout=t)
+  """Runs a sequence of events defined in the scenario_fn, each once the previous one was delivered, timeout after t seconds for waiting for quiescence."""
+  assert manager.run_scenario(scenario_fn, timeout=t), "Simulation did not quiesce in time."
 
 
 def get_message_log(log_file_path, length):
-  """Safely reads the last `length` JSON log entries from the log file."""
-  events = []
+  """Reads the last `length` JSON log entries, seeking to them through the log's sidecar index."""
   try:
-    with open(log_file_path, 'r') as f:
-      lines = [line.strip() for line in f if line.strip()]  # skip empty lines
-      logs = []
-      for line in lines:
-        try:
-          entry = json.loads(line)
-          if isinstance(entry, dict):
-            logs.append(entry)
-        except json.JSONDecodeError:
-          continue  # skip invalid lines
-
-      # slice the last `length` entries safely
-      for log in logs[-length:]:
-        events.append({
-            'node_id': log.get('node_id'),
-            'event_type': log.get('event_type'),
-            'clock': log.get('clock'),
-            'details': log.get('details')
-        })
+    return EventLogIndex(log_file_path).last(length)
   except FileNotFoundError:
     print(f"Log file {log_file_path} not found")
-  except Exception as e:
-    print(f"Error reading log file {log_file_path}: {e}")
-
-  print(f"Parsed {len(events)} events from log {log_file_path}")
-  return events
+    return []
 
 
 
@@ -93,8 +61,7 @@ def reset_clocks(NODE_TYPE, manager):
     # Reset clocks
   for node in manager.nodes:
       node.lamport_Clock = 0
-  with open(f"simulationLog_{NODE_TYPE}.txt", "a") as f:
-    f.write("--- New Test Run ---\n")
+  manager.logger.write_marker("--- New Test Run ---")
 
 # --- Fixtures ----------------------------------------------------------------
 
@@ -129,8 +96,7 @@ def test_message_ordering_simple(node_setup):
   ]
   run_scenario(manager, scenario)
 
-  wait_until(lambda: all(n.message_Queue == [] and n._status == "IDLE" for n in manager.nodes), timeout=10)
-  time.sleep(1)  # Ensure logs are flushed
+  manager.logger.flush()  # Ensure logs are flushed
 
   node1 = get_node_by_id(manager, 1)
   node2 = get_node_by_id(manager, 2)
@@ -164,7 +130,7 @@ def test_message_ordering_sequential(node_setup):
   ]
 
   run_scenario(manager, scenario, t=10)
-  time.sleep(1)  # Ensure logs are flushed
+  manager.logger.flush()  # Ensure logs are flushed
 
   log_file_path = f"simulationLog_{NODE_TYPE}.txt"
 
@@ -196,7 +162,7 @@ def test_message_complexity(node_setup):
   ]
 
   run_scenario(manager, scenario, t=10)
-  time.sleep(1)  # Ensure logs are flushed
+  manager.logger.flush()  # Ensure logs are flushed
 
   logs = get_message_log(f"simulationLog_{NODE_TYPE}.txt", 6)  # 3 sends + 3 receives
 
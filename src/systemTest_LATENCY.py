@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+
+# src/systemTest_LATENCY.py
+
+"""
+System Test for per-message latency tracing
+-------------------------------------------
+Checks that traced messages collect a timestamp at every stage on each
+runtime and transport, that the trace survives the wire format, and that
+SimulationManager.latency() reports per-stage percentiles per node and link.
+"""
+
+
+# autopep8: off
+import pytest
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.simulationManager import SimulationManager
+from src.eventLogger import NullLogger
+from src.networkSimulation import MIN_DELAY, MAX_DELAY
+from src.latencyTracing import LatencyHistogram, LatencyTracer, STAGES, STAMPS, add_stamps
+from src.Lamport_timestamps.lamportMessage import LamportMessage
+from src.Vector_clocks.vectorMessage import VectorMessage
+from src import wireCodec
+# autopep8: on
+
+SCENARIO = [(1, "SEND", 2), (2, "SEND", 3), (3, "SEND", 1), (1, "SEND", 3)]
+
+# --- Utility helpers ---------------------------------------------------------
+
+
+def check_stages(stages, count):
+  assert set(stages) == set(STAGES)
+  assert all(stage["count"] == count for stage in stages.values())
+  delay = stages["delay"]
+  assert MIN_DELAY * 1000 * 0.98 <= delay["p50_ms"] <= delay["max_ms"] <= MAX_DELAY * 1000 * 1.5
+  assert stages["total"]["max_ms"] >= delay["max_ms"]
+
+
+# --- Tests --------------------------------------------------------------------
+
+def test_trace_survives_the_wire():
+  message = LamportMessage("CONTACT", 1, 2, 5)
+  LatencyTracer().start(message, 1)
+  data = add_stamps(message.encode(), 111, 222)
+  decoded = LamportMessage.decode(data)
+  assert decoded == message and decoded.trace_id == message.trace_id
+  assert decoded.trace == message.trace + [111, 222]
+
+  vector = VectorMessage("CONTACT", 1, 2, [1, 0, 0], causal_clock=[0, 0, 0])
+  vector.trace_id, vector.trace = 7, [1]
+  decoded = VectorMessage.decode(add_stamps(vector.encode(), 2))
+  assert decoded.vector_clock == [1, 0, 0] and decoded.causal_clock == [0, 0, 0] and decoded.trace == [1, 2]
+
+  plain = LamportMessage("CONTACT", 1, 2, 5).encode()
+  assert add_stamps(plain, 1) is plain and LamportMessage.decode(plain).trace is None
+  with pytest.raises(wireCodec.WireFormatError):
+    wireCodec.unpack_trace(data[:wireCodec.HEADER.size + 2] + data[-wireCodec.TRACE_TAIL.size:])
+
+
+def test_histogram_percentiles():
+  histogram = LatencyHistogram()
+  for ms in range(1, 1001):
+    histogram.record(ms * 1_000_000)
+  summary = histogram.summary()
+  assert summary["count"] == 1000 and summary["max_ms"] == 1000
+  assert summary["p50_ms"] == pytest.approx(500, rel=0.02)
+  assert summary["p99_ms"] == pytest.approx(990, rel=0.02)
+
+  other = LatencyHistogram()
+  other.record(0)
+  histogram.merge(other)
+  assert histogram.count == 1001 and histogram.percentile(0) == 0
+
+
+@pytest.mark.parametrize("RUNTIME,TRANSPORT", [("THREAD", "TCP"), ("THREAD", "MEMORY"), ("ASYNC", "TCP")])
+def test_stages_per_node_and_link(RUNTIME, TRANSPORT):
+  manager = SimulationManager(3, "VECTOR", logger=NullLogger(), RUNTIME=RUNTIME, TRANSPORT=TRANSPORT, trace=True)
+  try:
+    assert manager.run_scenario(SCENARIO)
+    by_node = manager.latency()
+    assert sorted(by_node) == [1, 2, 3]
+    check_stages(by_node[3], 2)
+
+    by_link = manager.latency(by="link")
+    assert sorted(by_link) == [(1, 2), (1, 3), (2, 3), (3, 1)]
+    check_stages(by_link[(1, 3)], 1)
+    check_stages(manager.latency(by=None), len(SCENARIO))
+    assert manager.tracer.incomplete == 0
+  finally:
+    manager.stop()
+
+
+def test_broadcast_traced_per_link():
+  manager = SimulationManager(4, "LAMPORT", logger=NullLogger(), TRANSPORT="MEMORY", trace=True)
+  try:
+    assert manager.run_scenario([(2, "BROADCAST", None)])
+    assert sorted(manager.latency(by="link")) == [(2, 1), (2, 3), (2, 4)]
+    assert all(stages["total"]["count"] == 1 for stages in manager.latency().values())
+  finally:
+    manager.stop()
+
+
+def test_worker_processes_merged():
+  manager = SimulationManager(4, "LAMPORT", logger=NullLogger(), processes=2, trace=True)
+  try:
+    assert manager.run_scenario([(1, "SEND", 4), (4, "SEND", 2), (2, "SEND", 3)])
+    by_link = manager.latency(by="link")
+    assert sorted(by_link) == [(1, 4), (2, 3), (4, 2)]
+    check_stages(manager.latency(by=None), 3)
+  finally:
+    manager.stop()
+
+
+def test_tracing_off_by_default():
+  manager = SimulationManager(2, "LAMPORT", logger=NullLogger(), TRANSPORT="MEMORY")
+  try:
+    message = manager.nodes[0]._create_message(2, "CONTACT")
+    manager.nodes[0].send_message(2, message)
+    assert message.trace is None and len(STAMPS) == 7
+    with pytest.raises(RuntimeError):
+      manager.latency()
+  finally:
+    manager.stop()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+# src/systemTest_LOGINDEX.py
+
+"""
+System Test for the indexed event log
+----------------------------------------
+Queries a discrete-event run's log through its sidecar index and
+compares the results with a full scan of the log.
+"""
+
+
+# autopep8: off
+import gc
+import json
+import weakref
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.discreteEventSimulation import DiscreteEventSimulator
+from src.simulationManager import SimulationManager
+from src.eventLogger import EventLogger, INDEX_SUFFIX
+from src.eventLogIndex import EventLogIndex
+# autopep8: on
+
+# --- Utility helpers ---------------------------------------------------------
+
+
+def full_scan(log_file):
+  """Every event of the log with its seq, the way the index numbers them."""
+  with open(log_file) as f:
+    return [dict(json.loads(line), seq=seq) for seq, line in enumerate(f) if line.startswith("{")]
+
+
+# --- Tests --------------------------------------------------------------------
+
+
+def test_queries_match_full_scan(tmp_path):
+  log_file = str(tmp_path / "simulationLog_LAMPORT.txt")
+  logger = EventLogger(log_file)
+  simulator = DiscreteEventSimulator(4, "LAMPORT", logger=logger, seed=3)
+  simulator.schedule_random_events(500)
+  simulator.run()
+  logger.write_marker("--- New Test Run ---")
+  simulator.schedule_random_events(500)
+  simulator.run()
+  assert logger.flush(timeout=5)
+
+  events = full_scan(log_file)
+  index = EventLogIndex(log_file)
+  assert index.last(7) == events[-7:]
+  assert index.select(node_id=2, event_type="RECEIVE_MESSAGE") == [
+      e for e in events if e["node_id"] == 2 and e["event_type"] == "RECEIVE_MESSAGE"]
+  assert index.seq_range(100, 200) == [e for e in events if 100 <= e["seq"] < 200]
+  assert index.count(event_type="SEND_MESSAGE") == sum(e["event_type"] == "SEND_MESSAGE" for e in events)
+
+  marker = index.last(1, event_type="MARKER")[0]
+  assert marker["details"] == "--- New Test Run ---" and index.get(marker["seq"]) == marker
+  logger.close()
+
+
+def test_polling_reads_only_new_entries(tmp_path):
+  log_file = str(tmp_path / "simulationLog_VECTOR.txt")
+  logger = EventLogger(log_file)
+  logger.record_event(1, "LOCAL_EVENT", [1, 0])
+  assert logger.flush(timeout=5)
+
+  index = EventLogIndex(log_file)
+  assert index.refresh() == 1
+  assert index.refresh() == 0, "Nothing new was logged."
+  logger.record_event(2, "LOCAL_EVENT", [0, 1])
+  assert logger.flush(timeout=5)
+  assert index.refresh() == 1
+  assert [e["clock"] for e in index.last(2)] == [[1, 0], [0, 1]]
+  logger.close()
+
+
+def test_closed_logger_released(tmp_path):
+  """close() drops the shutdown hook, so a closed logger is not kept alive until exit."""
+  logger = EventLogger(str(tmp_path / "simulationLog_LAMPORT.txt"))
+  logger.record_event(1, "LOCAL_EVENT", 1)
+  logger.close()
+  ref = weakref.ref(logger)
+  del logger
+  gc.collect()
+  assert ref() is None
+
+
+def test_devnull_not_indexed():
+  """A log that is not a regular file gets no sidecar index next to it."""
+  logger = EventLogger(os.devnull)
+  logger.record_event(1, "LOCAL_EVENT", 1)
+  assert logger.flush(timeout=5)
+  logger.close()
+  assert logger.index_file is None
+  assert not os.path.exists(os.devnull + INDEX_SUFFIX)
+
+
+def test_manager_stop_closes_logger(tmp_path):
+  """stop() writes the remaining events and ends the logger's writer thread."""
+  log_file = str(tmp_path / "simulationLog_LAMPORT.txt")
+  logger = EventLogger(log_file, flush_interval=60)
+  manager = SimulationManager(2, "LAMPORT", logger=logger, TRANSPORT="MEMORY")
+  manager.run_scenario([(1, "SEND", 2)])
+  manager.stop()
+  assert not logger._writer.is_alive()
+  assert EventLogIndex(log_file).count() == 2  # The send and the receive
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+# src/systemTest_MEMORY.py
+
+"""
+System Test for the in-memory transport
+----------------------------------------
+Runs vector clock nodes that exchange message objects through the
+simulator's delay scheduler without sockets or serialization.
+"""
+
+
+# autopep8: off
+import time
+import pytest
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.simulationManager import SimulationManager
+from src.transport import InMemoryTransport
+# autopep8: on
+
+# --- Utility helpers ---------------------------------------------------------
+
+
+def get_node_by_id(manager, node_id):
+  """Helper to retrieve a node object by its ID."""
+  return manager.nodes[node_id - 1]
+
+
+def wait_until(condition_fn, timeout=10, poll=0.05):
+  """Waits until condition_fn() returns True or timeout occurs."""
+  start = time.time()
+  while time.time() - start < timeout:
+    if condition_fn():
+      return True
+    time.sleep(poll)
+  return False
+
+
+def send(manager, sender_id, target_id):
+  node = get_node_by_id(manager, sender_id)
+  node.send_message(target_id, node._create_message(target_id, "CONTACT"))
+
+
+def delivered(manager, count):
+  """True once `count` messages were delivered and every node has processed its queue."""
+  return (manager.sim_manager.queue_stats()["delivered"] == count and
+          all(n.message_Queue.unfinished() == 0 and n._status == "IDLE" for n in manager.nodes))
+
+# --- Fixtures ----------------------------------------------------------------
+
+
+@pytest.fixture(scope="module")
+def node_setup():
+  NODE_TYPE = "VECTOR"
+  NUM_NODES = 4
+
+  manager = SimulationManager(NUM_NODES, NODE_TYPE, TRANSPORT="MEMORY")
+  assert wait_until(lambda: len(manager.nodes) == NUM_NODES, timeout=15), "Nodes did not start in time"
+  yield manager, NODE_TYPE
+  del manager, NODE_TYPE
+
+
+# --- Tests --------------------------------------------------------------------
+
+def test_startup(node_setup):
+  manager, NODE_TYPE = node_setup
+  assert not hasattr(manager.sim_manager, "server"), "In-memory simulation should not bind a socket."
+  for node in manager.nodes:
+    assert isinstance(node.transport, InMemoryTransport)
+    assert node._status == "IDLE", f"Node {node.node_Id} did not start in IDLE state."
+
+
+def test_message_ordering_sequential(node_setup):
+  """A causal chain 1 -> 2 -> 3 -> 4 produces the same clocks as over TCP."""
+  manager, NODE_TYPE = node_setup
+
+  for count, (sender_id, target_id) in enumerate([(1, 2), (2, 3), (3, 4)], start=1):
+    send(manager, sender_id, target_id)
+    assert wait_until(lambda: delivered(manager, count)), "Message was not delivered in memory."
+
+  assert get_node_by_id(manager, 1).vector_Clock == [1, 0, 0, 0]
+  assert get_node_by_id(manager, 2).vector_Clock == [1, 2, 0, 0]
+  assert get_node_by_id(manager, 3).vector_Clock == [1, 2, 2, 0]
+  assert get_node_by_id(manager, 4).vector_Clock == [1, 2, 2, 1]
+
+
+def test_idle_nodes_do_not_spin(node_setup):
+  """Processor threads block on their inbox, so an idle simulation uses (almost) no CPU."""
+  manager, NODE_TYPE = node_setup
+  assert wait_until(lambda: delivered(manager, 3))
+
+  start = time.process_time()
+  time.sleep(0.5)
+  assert time.process_time() - start < 0.1, "Idle nodes are busy-waiting on their message queue."
+
+
+def test_stop_shuts_down_processor_threads(node_setup):
+  manager, NODE_TYPE = node_setup
+  for node in manager.nodes:
+    node.stop()
+  for node in manager.nodes:
+    assert not node.processor_thread.is_alive(), f"Node {node.node_Id} processor thread is still running."
+    assert node.message_Queue.closed
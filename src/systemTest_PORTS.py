@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+# src/systemTest_PORTS.py
+
+"""
+System Test for dynamic port allocation
+---------------------------------------
+Runs two TCP simulations side by side in one process and checks that each
+binds its own ephemeral ports and keeps its messages to itself.
+"""
+
+
+# autopep8: off
+import pytest
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.simulationManager import SimulationManager
+from src.eventLogger import EventLogger
+from src.networkSimulation import SIM_PORT, NODE_PORT_BASE
+# autopep8: on
+
+NUM_NODES = 3
+
+# --- Fixtures ----------------------------------------------------------------
+
+
+@pytest.fixture(scope="module")
+def managers(tmp_path_factory):
+  log_dir = tmp_path_factory.mktemp("ports")
+  managers = [SimulationManager(NUM_NODES, "LAMPORT", logger=EventLogger(str(log_dir / f"simulationLog_{k}.txt")))
+              for k in range(2)]
+  yield managers
+  for manager in managers:
+    manager.stop()
+
+
+# --- Tests --------------------------------------------------------------------
+
+def test_ephemeral_ports_published(managers):
+  published = [manager.ports.ports() for manager in managers]
+  for ports in published:
+    assert ports["simulator"] not in (0, SIM_PORT)
+    assert sorted(ports["nodes"]) == list(range(1, NUM_NODES + 1))
+    assert NODE_PORT_BASE + 1 not in ports["nodes"].values()
+  all_ports = [p["simulator"] for p in published] + [port for p in published for port in p["nodes"].values()]
+  assert len(set(all_ports)) == len(all_ports)
+
+
+def test_simulations_run_side_by_side(managers):
+  first, second = managers
+  assert first.run_scenario([(1, "SEND", 2)])
+  assert second.run_scenario([(1, "LOCAL_EVENT", None), (1, "SEND", 3), (3, "SEND", 2)])
+
+  assert [n.lamport_Clock for n in first.nodes] == [1, 2, 0]
+  assert [n.lamport_Clock for n in second.nodes] == [2, 5, 4]
+  assert [n.messages_Received for n in first.nodes] == [0, 1, 0]
+
+
+def test_fixed_ports_remain_configurable():
+  manager = SimulationManager(2, "LAMPORT", TRANSPORT="MEMORY", sim_port=SIM_PORT, node_port_base=NODE_PORT_BASE)
+  try:
+    assert manager.ports.node_port(2) == NODE_PORT_BASE + 2
+    assert manager.ports.node_bind_port(2) == NODE_PORT_BASE + 2
+  finally:
+    manager.stop()
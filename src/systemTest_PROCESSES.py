@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+# src/systemTest_PROCESSES.py
+
+"""
+System Test for the multi-process deployment
+--------------------------------------------
+Runs vector clock nodes in worker processes, drives them through the
+control channel and checks their clocks and the log collected by the
+manager.
+"""
+
+
+# autopep8: off
+import pytest
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.simulationManager import SimulationManager
+from src.eventLogIndex import EventLogIndex
+# autopep8: on
+
+NUM_NODES = 6
+NUM_PROCESSES = 3
+
+# --- Fixtures ----------------------------------------------------------------
+
+
+@pytest.fixture(scope="module")
+def manager():
+  manager = SimulationManager(NUM_NODES, "VECTOR", processes=NUM_PROCESSES)
+  yield manager
+  manager.stop()
+
+
+# --- Tests --------------------------------------------------------------------
+
+def test_nodes_spread_over_workers(manager):
+  pids = {worker.process.pid for worker in manager.deployment.workers}
+  assert len(pids) == NUM_PROCESSES and os.getpid() not in pids
+  assert [len(worker.node_ids) for worker in manager.deployment.workers] == [2, 2, 2]
+  assert [node.node_Id for node in manager.nodes] == list(range(1, NUM_NODES + 1))
+
+
+def test_scenario_across_processes(manager):
+  """1 -> 3 -> 6 crosses all three workers; the receivers' clocks carry the causal history."""
+  assert manager.run_scenario([(1, "SEND", 3), (3, "SEND", 6), (6, "LOCAL_EVENT", None)])
+  assert manager.quiescent()
+
+  assert manager.nodes[0].snapshot()["clock"] == [1, 0, 0, 0, 0, 0]
+  assert manager.nodes[2].snapshot()["clock"] == [1, 0, 2, 0, 0, 0]
+  state = manager.nodes[5].snapshot()
+  assert state["clock"] == [1, 0, 2, 0, 0, 2]
+  assert state["messages_received"] == 1 and state["queued"] == 0
+
+
+def test_logs_collected_by_manager(manager):
+  manager.flush_logs()
+  index = EventLogIndex(manager.logger.log_file)
+  receives = index.select(event_type="RECEIVE_MESSAGE")
+  assert [(e["node_id"], e["clock"]) for e in receives[-2:]] == [(3, [1, 0, 1, 0, 0, 0]), (6, [1, 0, 2, 0, 0, 1])]
+  assert index.last(1, node_id=6)[0]["event_type"] == "LOCAL_EVENT"
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+
+# src/systemTest_PROFILING.py
+
+"""
+System Test for per-thread profiling
+------------------------------------
+Checks that every listener, processor, scheduler and forwarder thread is
+profiled under its role, that reports include threads that are still running,
+that the profiles are merged across worker processes and dumped on stop(),
+that tracemalloc snapshots report allocation sites, and that profiling fails
+loudly where threads cannot have their own profiler (Python 3.12+).
+"""
+
+
+# autopep8: off
+import cProfile
+import os
+import pstats
+import sys
+import tracemalloc
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.simulationManager import SimulationManager
+from src.eventLogger import NullLogger
+from src.workload import WorkloadGenerator
+from src import threadProfiling
+from src.threadProfiling import ThreadProfiler, ROLES, profiled
+# autopep8: on
+
+per_thread = pytest.mark.skipif(not threadProfiling.PER_THREAD_PROFILING, reason="Needs one cProfile profiler per thread (Python 3.11 or earlier)")
+
+# --- Utility helpers ---------------------------------------------------------
+
+
+def profiled_functions(profiler, role):
+  """Names of the functions in the merged profile of `role`."""
+  stats = profiler.stats(role)
+  return set() if stats is None else {name for _, _, name in stats.stats}
+
+
+def run_workload(manager, count=200):
+  stats = WorkloadGenerator(manager, pattern="all-to-all", rate=5000).run(count=count)
+  assert stats["quiescent"]
+
+
+# --- Tests --------------------------------------------------------------------
+
+@per_thread
+def test_every_role_profiled(tmp_path):
+  manager = SimulationManager(4, "LAMPORT", logger=NullLogger(), profile=True)
+  manager.profile_dir = str(tmp_path)
+  try:
+    run_workload(manager)
+    profiler = manager.profiles()
+    assert profiler.threads["processor"] == 4 and profiler.threads["scheduler"] == 1
+    assert profiler.threads["forwarder"] > 0
+    # Processors and listeners are still running: their profiles are read in place
+    assert "deliver_message" in profiled_functions(profiler, "processor")
+    assert "enqueue_messages" in profiled_functions(profiler, "listener")
+    assert "deliver_messages" in profiled_functions(profiler, "scheduler")
+    assert "_forward_batch" in profiled_functions(profiler, "forwarder")
+
+    report = manager.profile_report(limit=5)
+    assert all(f"=== {role}:" in report for role in ROLES)
+  finally:
+    manager.stop()
+  for role in ROLES:
+    assert pstats.Stats(str(tmp_path / f"{role}.prof")).total_calls > 0
+  assert "=== processor:" in (tmp_path / "report.txt").read_text()
+
+
+@per_thread
+def test_sharded_schedulers_merged(tmp_path):
+  manager = SimulationManager(4, "VECTOR", logger=NullLogger(), TRANSPORT="MEMORY", shards=2, profile=True)
+  manager.profile_dir = str(tmp_path)
+  try:
+    run_workload(manager)
+    profiler = manager.profiles()
+    assert profiler.threads["scheduler"] == 2 and profiler.threads["forwarder"] == 0  # In memory nothing is forwarded
+    assert "enqueue_messages" in profiled_functions(profiler, "scheduler")
+  finally:
+    manager.stop()
+
+
+@per_thread
+def test_memory_snapshots(tmp_path):
+  manager = SimulationManager(3, "VECTOR", logger=NullLogger(), TRANSPORT="MEMORY", profile_memory=True)
+  manager.profile_dir = str(tmp_path)
+  try:
+    run_workload(manager)
+    sites = manager.profiles().memory_sites(10)
+    assert sites and all(site.rsplit(":", 1)[1].isdigit() for site, _, _, _ in sites)
+    assert "=== memory:" in manager.profile_report()
+  finally:
+    manager.stop()
+  assert not tracemalloc.is_tracing()
+  assert "=== memory:" in (tmp_path / "report.txt").read_text()
+
+
+@per_thread
+def test_worker_processes_merged(tmp_path):
+  manager = SimulationManager(4, "LAMPORT", logger=NullLogger(), processes=2, profile=True)
+  manager.profile_dir = str(tmp_path)
+  try:
+    run_workload(manager, count=40)
+    profiler = manager.profiles()
+    assert profiler.threads["processor"] == 4 and profiler.threads["scheduler"] == 1
+    assert "deliver_message" in profiled_functions(profiler, "processor")
+    assert "_decode_message" in profiled_functions(profiler, "listener")
+  finally:
+    manager.stop()
+  assert (tmp_path / "processor.prof").exists()
+
+
+def test_profiling_off_by_default():
+  target = lambda: None
+  assert profiled(None, "listener", target) is target
+  with pytest.raises(ValueError):
+    SimulationManager(2, "LAMPORT", logger=NullLogger(), RUNTIME="ASYNC", profile=True)
+
+  manager = SimulationManager(2, "LAMPORT", logger=NullLogger(), TRANSPORT="MEMORY")
+  try:
+    assert manager.profiler is None and manager.nodes[0].profiler is None
+    with pytest.raises(RuntimeError):
+      manager.profile_report()
+  finally:
+    manager.stop()
+
+
+@per_thread
+def test_unknown_role_rejected():
+  with pytest.raises(ValueError):
+    ThreadProfiler().wrap("watcher", lambda: None)
+
+
+def test_unsupported_python_fails_loudly(monkeypatch):
+  monkeypatch.setattr(threadProfiling, "PER_THREAD_PROFILING", False)
+  with pytest.raises(RuntimeError):
+    ThreadProfiler()
+  with pytest.raises(RuntimeError):
+    SimulationManager(2, "LAMPORT", logger=NullLogger(), profile=True)
+
+
+@per_thread
+def test_thread_not_run_unprofiled(monkeypatch):
+  """A thread whose profiler cannot be enabled raises instead of running without it."""
+  class Refused(cProfile.Profile):
+    def enable(self):
+      raise ValueError("Another profiling tool is already active")
+  profiler = ThreadProfiler()
+  monkeypatch.setattr(threadProfiling.cProfile, "Profile", Refused)
+  calls = []
+  with pytest.raises(RuntimeError):
+    profiler.wrap("listener", lambda: calls.append(1))()
+  assert calls == [] and profiler.threads["listener"] == 0
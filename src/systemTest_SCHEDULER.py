@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+
+# src/systemTest_SCHEDULER.py
+
+"""
+System Test for the delivery scheduler
+--------------------------------------
+Checks that DeliveryScheduler hands messages on in deadline order, that
+equal deadlines keep their scheduling order, that cancelled messages are
+never delivered and that stats() counts depth, peak depth and cancellations.
+"""
+
+
+# autopep8: off
+import threading
+import time
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.networkSimulation import DeliveryScheduler, networkSimulator
+from src.portRegistry import PortRegistry
+from src.Lamport_timestamps.lamportMessage import LamportMessage
+# autopep8: on
+
+# --- Utility helpers ---------------------------------------------------------
+
+
+class Recorder:
+  """deliver_fn that records the messages it was handed and signals once `expected` arrived."""
+
+  def __init__(self, expected):
+    self.expected = expected
+    self.delivered = []
+    self.done = threading.Event()
+
+  def __call__(self, due):
+    self.delivered.extend(entry["message"] for entry in due)
+    if len(self.delivered) >= self.expected:
+      self.done.set()
+
+
+# --- Tests --------------------------------------------------------------------
+
+def test_deadline_order():
+  recorder = Recorder(4)
+  scheduler = DeliveryScheduler(recorder)
+  try:
+    start = time.monotonic()
+    for message, delay in (("c", 0.15), ("a", 0.05), ("d", 0.2), ("b", 0.1)):
+      scheduler.schedule(start + delay, 1, message)
+    assert recorder.done.wait(2.0)
+    assert recorder.delivered == ["a", "b", "c", "d"]
+  finally:
+    scheduler.stop()
+
+
+def test_equal_deadlines_keep_scheduling_order():
+  recorder = Recorder(50)
+  scheduler = DeliveryScheduler(recorder)
+  try:
+    deadline = time.monotonic() + 0.05
+    for k in range(50):
+      scheduler.schedule(deadline, 1, k)
+    assert recorder.done.wait(2.0)
+    assert recorder.delivered == list(range(50))
+  finally:
+    scheduler.stop()
+
+
+def test_cancel_and_stats():
+  recorder = Recorder(2)
+  scheduler = DeliveryScheduler(recorder)
+  try:
+    deadline = time.monotonic() + 0.1
+    ids = [scheduler.schedule(deadline, 1, message) for message in ("a", "b", "c")]
+    stats = scheduler.stats()
+    assert stats["depth"] == stats["peak_depth"] == stats["scheduled"] == 3
+    assert 0.0 < stats["next_due_in"] <= 0.1
+
+    assert scheduler.cancel(ids[1])
+    assert not scheduler.cancel(ids[1])  # Already cancelled
+    stats = scheduler.stats()
+    assert stats["depth"] == 2 and stats["cancelled"] == 1 and stats["peak_depth"] == 3
+
+    assert recorder.done.wait(2.0)
+    time.sleep(0.05)  # The cancelled entry is dropped lazily, it must never show up
+    assert recorder.delivered == ["a", "c"]
+    stats = scheduler.stats()
+    assert stats["depth"] == 0 and stats["delivered"] == 2 and stats["next_due_in"] is None
+    assert not scheduler.cancel(ids[0])  # Already delivered
+  finally:
+    scheduler.stop()
+
+
+def test_earlier_message_wakes_the_scheduler():
+  """A message due before the one the scheduler sleeps on is not held up by it."""
+  recorder = Recorder(1)
+  scheduler = DeliveryScheduler(recorder)
+  try:
+    scheduler.schedule(time.monotonic() + 5.0, 1, "late")
+    time.sleep(0.02)  # Let the scheduler go to sleep until the late deadline
+    scheduler.schedule(time.monotonic() + 0.02, 1, "early")
+    assert recorder.done.wait(1.0)
+    assert recorder.delivered == ["early"]
+  finally:
+    scheduler.stop()
+
+
+def test_slow_node_does_not_stall_fifo_links():
+  """Forwarding to a blocked node leaves the scheduler free for other nodes and keeps the blocked link in order."""
+  simulator = networkSimulator(3, minDelay=0.01, maxDelay=0.01, fifo=True, tcp=False, registry=PortRegistry(0, 0))
+  shard = simulator.shards[0]
+  gate = threading.Event()
+  forwarded = {2: [], 3: []}
+  arrived = threading.Event()
+
+  def forward_batch(target_id, messages):
+    if target_id == 2:
+      assert gate.wait(5.0)  # Node 2 takes its time
+    forwarded[target_id].extend(LamportMessage.decode(m).timestamp for m in messages)
+    arrived.set()
+  shard._forward_batch = forward_batch
+  try:
+    simulator.schedule_delivery(LamportMessage("CONTACT", 1, 2, 1).encode())
+    time.sleep(0.05)  # Node 2's forwarder is now blocked
+    simulator.schedule_delivery(LamportMessage("CONTACT", 1, 2, 2).encode())
+    simulator.schedule_delivery(LamportMessage("CONTACT", 1, 3, 3).encode())
+    assert arrived.wait(1.0) and forwarded == {2: [], 3: [3]}
+
+    gate.set()
+    deadline = time.monotonic() + 2.0
+    while len(forwarded[2]) < 2 and time.monotonic() < deadline:
+      time.sleep(0.01)
+    assert forwarded[2] == [1, 2]
+  finally:
+    gate.set()
+    simulator.stop()
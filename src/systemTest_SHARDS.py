@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+# src/systemTest_SHARDS.py
+
+"""
+System Test for the sharded network simulator
+---------------------------------------------
+Partitions deliveries by receiver over several delay queues and checks
+that every message goes through its receiver's shard, that FIFO links and
+cancellation still work and that TCP nodes are reached through one port.
+"""
+
+
+# autopep8: off
+import threading
+import pytest
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.simulationManager import SimulationManager
+from src.networkSimulation import ShardedNetworkSimulator, DeliveryShard
+from src.portRegistry import PortRegistry
+from src.workload import WorkloadGenerator
+from src.Vector_clocks.vectorMessage import VectorMessage
+# autopep8: on
+
+NUM_NODES = 6
+NUM_SHARDS = 3
+
+# --- Fixtures ----------------------------------------------------------------
+
+
+@pytest.fixture(scope="module")
+def manager():
+  manager = SimulationManager(NUM_NODES, "VECTOR", TRANSPORT="MEMORY", differential=True, shards=NUM_SHARDS)
+  yield manager
+  manager.stop()
+
+
+# --- Tests --------------------------------------------------------------------
+
+def test_deliveries_partitioned_by_receiver(manager):
+  simulator = manager.sim_manager
+  assert isinstance(simulator, ShardedNetworkSimulator) and len(simulator.shards) == NUM_SHARDS
+  before = [s["scheduled"] for s in simulator.shard_stats()]
+  received_before = [n.messages_Received for n in manager.nodes]
+
+  stats = WorkloadGenerator(manager, pattern="all-to-all", rate=2000).run(count=NUM_NODES * (NUM_NODES - 1))
+  assert stats["quiescent"]
+
+  received = [a - b for a, b in zip((n.messages_Received for n in manager.nodes), received_before)]
+  per_shard = [sum(received[k] for k in range(NUM_NODES) if simulator.shard_index(k + 1) == shard)
+               for shard in range(NUM_SHARDS)]
+  assert [s["scheduled"] - b for s, b in zip(simulator.shard_stats(), before)] == per_shard == [10, 10, 10]
+  assert simulator.queue_stats()["depth"] == 0
+
+
+def test_fifo_links_keep_differential_clocks_exact(manager):
+  """Differential vector clocks are only correct if no link is reordered across shards."""
+  stats = WorkloadGenerator(manager, pattern="poisson", rate=3000, seed=3).run(count=300)
+  assert stats["quiescent"]
+  clocks = [n.vector_Clock.tolist() for n in manager.nodes]
+  for k, clock in enumerate(clocks):
+    for other in clocks:
+      assert other[k] <= clock[k], "A node knows more of another node's events than that node itself."
+
+
+def test_cancel_in_any_shard(manager):
+  simulator = manager.sim_manager
+  ids = [simulator.schedule_message(VectorMessage("CONTACT", 1, target, [0] * NUM_NODES)) for target in range(2, 5)]
+  assert sorted(simulator.shard_index(target) for target in range(2, 5)) == [0, 1, 2]
+  assert all(simulator.cancel_delivery(msg_id) for msg_id in ids)
+  assert not simulator.cancel_delivery(ids[0])
+  assert manager.wait_for_quiescence(timeout=2)
+
+
+def test_tcp_front_door():
+  manager = SimulationManager(4, "LAMPORT", shards=2)
+  try:
+    assert manager.run_scenario([(1, "SEND", 2), (2, "SEND", 3), (3, "SEND", 4)])
+    assert [n.lamport_Clock for n in manager.nodes] == [1, 3, 5, 6]
+    assert [s["delivered"] for s in manager.sim_manager.shard_stats()] == [1, 2]
+  finally:
+    manager.stop()
+
+
+def test_shards_ready_before_listener():
+  """A connection accepted right after startup already finds every shard, and each shard has its own queue."""
+  class Recording(ShardedNetworkSimulator):
+    def listen(self):
+      self.shards_at_listen = len(getattr(self, "shards", []))
+      listening.set()
+      super().listen()
+
+  listening = threading.Event()
+  simulator = Recording(4, fifo=True, registry=PortRegistry(0, 0), shards=NUM_SHARDS)
+  try:
+    assert listening.wait(2.0) and simulator.shards_at_listen == NUM_SHARDS
+    assert all(isinstance(shard, DeliveryShard) and shard.fifo for shard in simulator.shards)
+    assert len({id(shard.messageQueue) for shard in simulator.shards}) == NUM_SHARDS
+    assert all(shard.local_Nodes is simulator.local_Nodes for shard in simulator.shards)
+  finally:
+    simulator.stop()
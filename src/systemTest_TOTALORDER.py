@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+
+# src/systemTest_TOTALORDER.py
+
+"""
+System Test for totally ordered multicast
+-----------------------------------------
+Checks that Lamport nodes with total_order=True deliver broadcasts in the
+same (timestamp, sender) order on every node, that a broadcast is held back
+until every node has acknowledged past it, and that acknowledgements are
+batched and piggybacked instead of sent once per message.
+"""
+
+
+# autopep8: off
+import random
+import threading
+import pytest
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.simulationManager import SimulationManager
+from src.discreteEventSimulation import DiscreteEventSimulator
+from src.eventLogger import NullLogger
+from src.Lamport_timestamps.node import LamportNode, ACK_TYPE
+from src.Lamport_timestamps.lamportMessage import LamportMessage
+from src.wireCodec import MULTICAST_RECEIVER
+from src.transport import Transport
+# autopep8: on
+
+# --- Utility helpers ---------------------------------------------------------
+
+
+def record_broadcasts(node):
+  """Replaces handle_message so every delivered broadcast's (timestamp, sender) is appended to the returned list."""
+  delivered = []
+
+  def handle(msg):
+    if msg.receiver_id == MULTICAST_RECEIVER:
+      delivered.append((msg.timestamp, msg.sender_id))
+  node.handle_message = handle
+  return delivered
+
+
+def broadcast_concurrently(nodes, count):
+  def broadcaster(node):
+    for _ in range(count):
+      node.broadcast("CONTACT")
+  threads = [threading.Thread(target=broadcaster, args=(node,)) for node in nodes]
+  for t in threads:
+    t.start()
+  for t in threads:
+    t.join()
+
+
+class GatedTransport(Transport):
+  """Records the timestamps of the messages a node hands it; sends of CONTACT messages block until `gate` is set."""
+
+  def __init__(self):
+    self.gate = threading.Event()
+    self.sent = []
+    self.entered = threading.Event()
+
+  def _take(self, message):
+    if message.msg_type == "CONTACT":
+      self.entered.set()
+      assert self.gate.wait(5.0)
+    self.sent.append(message.timestamp)
+
+  def send(self, node, message):
+    self._take(message)
+
+  def multicast(self, node, message, targets):
+    self._take(message)
+
+  def listen(self, node):
+    pass
+
+  def close(self, node):
+    pass
+
+
+# --- Tests --------------------------------------------------------------------
+
+def test_held_until_every_node_is_past_it():
+  node1, node2 = (LamportNode(k, [1, 2, 3], NullLogger(), total_order=True) for k in (1, 2))
+  delivered = record_broadcasts(node2)
+
+  message = node1._create_broadcast([2, 3], "CONTACT")
+  node2.deliver_message(message)
+  assert delivered == [] and len(node2.hold_Back) == 1  # Node 3 may still send something earlier
+  assert node2.ack_Pending
+
+  node2.deliver_message(LamportMessage(ACK_TYPE, 3, MULTICAST_RECEIVER, message.timestamp))
+  assert delivered == [(message.timestamp, 1)] and node2.hold_Back == []
+
+
+def test_same_order_on_every_node():
+  num_nodes = 5
+  simulator = DiscreteEventSimulator(num_nodes, "LAMPORT", logger=NullLogger(), seed=4, total_order=True)
+  delivered = [record_broadcasts(node) for node in simulator.nodes]
+  rng = random.Random(4)
+  broadcasts = 0
+  for step in range(300):
+    node = simulator.nodes[rng.randrange(num_nodes)]
+    if rng.random() < 0.6:
+      simulator.schedule_at(step * 0.01, node.broadcast, "CONTACT")
+      broadcasts += 1
+    else:
+      target = rng.choice([k for k in range(1, num_nodes + 1) if k != node.node_Id])
+      simulator.schedule_send(step * 0.01, node.node_Id, target)
+  simulator.run()
+
+  assert all(node.hold_Back == [] for node in simulator.nodes)
+  assert len(delivered[0]) == broadcasts
+  assert all(order == delivered[0] for order in delivered)
+  assert delivered[0] == sorted(delivered[0])
+
+
+@pytest.mark.parametrize("TRANSPORT", ["TCP", "MEMORY"])
+def test_concurrent_broadcasts_with_batched_acks(TRANSPORT):
+  num_nodes, count = 5, 30
+  manager = SimulationManager(num_nodes, "LAMPORT", logger=NullLogger(), TRANSPORT=TRANSPORT, total_order=True)
+  try:
+    delivered = [record_broadcasts(node) for node in manager.nodes]
+    broadcast_concurrently(manager.nodes, count)
+    assert manager.wait_for_quiescence()
+    assert all(len(order) == num_nodes * count for order in delivered)
+    assert all(order == delivered[0] for order in delivered)
+
+    # One ACK per received broadcast would be (num_nodes - 1) * count multicasts per node
+    ack_deliveries = sum(node.messages_Sent for node in manager.nodes) - num_nodes * count * (num_nodes - 1)
+    assert ack_deliveries // (num_nodes - 1) < num_nodes * (num_nodes - 1) * count // 2
+  finally:
+    manager.stop()
+
+
+def test_async_runtime():
+  manager = SimulationManager(4, "LAMPORT", logger=NullLogger(), RUNTIME="ASYNC", total_order=True)
+  try:
+    delivered = [record_broadcasts(node) for node in manager.nodes]
+    broadcast_concurrently(manager.nodes, 10)
+    assert manager.wait_for_quiescence()
+    assert len(delivered[0]) == 40 and all(order == delivered[0] for order in delivered)
+  finally:
+    manager.stop()
+
+
+def test_broadcast_to_subset_rejected():
+  node = LamportNode(1, [1, 2, 3], NullLogger(), total_order=True)
+  with pytest.raises(ValueError):
+    node.broadcast("CONTACT", targets=[2])
+
+
+@pytest.mark.parametrize("SEND", ["BROADCAST", "UNICAST"])
+def test_ack_waits_for_message_being_sent(SEND):
+  """An ACK stamped after a message still on its way to the transport does not overtake it."""
+  transport = GatedTransport()
+  node = LamportNode(1, [1, 2, 3], NullLogger(), transport=transport, total_order=True)
+  send = (lambda: node.broadcast("CONTACT")) if SEND == "BROADCAST" else (lambda: node.send(2))
+  sender = threading.Thread(target=send)
+  sender.start()
+  assert transport.entered.wait(5.0)  # Stamped, blocked inside the transport
+
+  node.deliver_message(LamportMessage("CONTACT", 2, MULTICAST_RECEIVER, 1))
+  assert node.ack_Pending
+  acker = threading.Thread(target=node._after_batch)  # What the processor thread does after the batch
+  acker.start()
+  acker.join(0.2)
+  assert acker.is_alive() and transport.sent == []  # The ACK waits for the send, not for the clock
+
+  transport.gate.set()
+  sender.join(5.0)
+  acker.join(5.0)
+  assert len(transport.sent) == 2 and transport.sent == sorted(transport.sent)
+
+
+def test_failed_broadcast_not_held_back():
+  node = LamportNode(1, [1, 2, 3], NullLogger(), total_order=True)
+  node.ack_Pending = True
+
+  def refuse(message, targets):
+    raise ConnectionRefusedError
+  node._send_multicast = refuse
+  node.broadcast("CONTACT")
+  assert node.hold_Back == [] and node.messages_Sent == 0
+  assert node.ack_Pending  # Nothing acknowledged what the node received
@@ -11,9 +11,9 @@ using the real network simulator and Node implementations.
 
 
 # autopep8: off
+import threading
 import time
 import pytest
-import json
 import os
 import sys
 import struct
@@ -21,7 +21,12 @@ import struct
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.Vector_clocks.node import VectorClockNode as VectorClockNode
+from src.Vector_clocks.vectorClock import VectorClock
+from src.Vector_clocks.vectorMessage import VectorMessage
 from src.simulationManager import SimulationManager
+from src.eventLogIndex import EventLogIndex
+from src.eventLogger import NullLogger, freeze_clock
+from src.transport import Transport
 # autopep8: on
 
 # --- Utility helpers ---------------------------------------------------------
@@ -43,49 +48,17 @@ def wait_until(condition_fn, timeout=10, poll=0.5):
 
 
 def run_scenario(manager, scenario_fn, t=10):
-  """Runs a sequence of events defined in the scenario_fn, timeout after t seconds for waiting for idle state."""
-  for node_id, event_type, target_id in scenario_fn:
-    node = get_node_by_id(manager, node_id)
-    if event_type == "LOCAL_EVENT":
-      node.local_event()
-    elif event_type == "SEND":
-      message = node._create_message(target_id, "CONTACT")
-      node.send_message(target_id, message)
-    time.sleep(1)  # Allow some time between events
-
-  wait_until(lambda: all(n.message_Queue == [] or n._status == "IDLE" for n in manager.nodes), timeout=t)
+  """Runs a sequence of events defined in the scenario_fn, each once the previous one was delivered, timeout after t seconds for waiting for quiescence."""
+  assert manager.run_scenario(scenario_fn, timeout=t), "Simulation did not quiesce in time."
 
 
 def get_message_log(log_file_path, length):
-  """Safely reads the last `length` JSON log entries from the log file."""
-  events = []
+  """Reads the last `length` JSON log entries, seeking to them through the log's sidecar index."""
   try:
-    with open(log_file_path, 'r') as f:
-      lines = [line.strip() for line in f if line.strip()]  # skip empty lines
-      logs = []
-      for line in lines:
-        try:
-          entry = json.loads(line)
-          if isinstance(entry, dict):
-            logs.append(entry)
-        except json.JSONDecodeError:
-          continue  # skip invalid lines
-
-      # slice the last `length` entries safely
-      for log in logs[-length:]:
-        events.append({
-            'node_id': log.get('node_id'),
-            'event_type': log.get('event_type'),
-            'clock': log.get('clock'),
-            'details': log.get('details')
-        })
+    return EventLogIndex(log_file_path).last(length)
   except FileNotFoundError:
     print(f"Log file {log_file_path} not found")
-  except Exception as e:
-    print(f"Error reading log file {log_file_path}: {e}")
-
-  print(f"Parsed {len(events)} events from log {log_file_path}")
-  return events
+    return []
 
 
 def is_vector_less_than(vc1, vc2):
@@ -107,9 +80,42 @@ def is_vector_comparable(vc1, vc2):
 def reset_clocks(NODE_TYPE, manager):
     # Reset clocks
   for node in manager.nodes:
-    node.vector_Clock = [0 for _ in manager.nodes]
-  with open(f"simulationLog_{NODE_TYPE}.txt", "a") as f:
-    f.write("--- New Test Run ---\n")
+    node.vector_Clock = VectorClock(len(manager.nodes))
+  manager.logger.write_marker("--- New Test Run ---")
+
+class GatedTransport(Transport):
+  """Keeps the messages a node hands it in order; every send blocks until `gate` is set."""
+
+  def __init__(self):
+    self.gate = threading.Event()
+    self.entered = threading.Event()
+    self.sent = []
+
+  def send(self, node, message):
+    self.entered.set()
+    assert self.gate.wait(5.0)
+    self.sent.append(message)
+
+  def multicast(self, node, message, targets):
+    self.send(node, message)
+
+  def listen(self, node):
+    pass
+
+  def close(self, node):
+    pass
+
+
+class LockCheckingLogger(NullLogger):
+  """Records every logged clock with whether its node's state_Lock was held while it was read."""
+
+  def __init__(self):
+    self.nodes = {}
+    self.events = []
+
+  def record_event(self, node_id, event_type, clock, details="", peer_id=None):
+    self.events.append((event_type, self.nodes[node_id].state_Lock.locked(), freeze_clock(clock)))
+
 
 # --- Fixtures ----------------------------------------------------------------
 
@@ -144,8 +150,7 @@ def test_message_ordering_simple(node_setup):
   ]
   run_scenario(manager, scenario)
 
-  wait_until(lambda: all(n.message_Queue == [] and n._status == "IDLE" for n in manager.nodes), timeout=10)
-  time.sleep(1)  # Ensure logs are flushed
+  manager.logger.flush()  # Ensure logs are flushed
 
   node1 = get_node_by_id(manager, 1)
   node2 = get_node_by_id(manager, 2)
@@ -179,7 +184,7 @@ def test_message_ordering_sequential(node_setup):
   ]
 
   run_scenario(manager, scenario, t=10)
-  time.sleep(1)  # Ensure logs are flushed
+  manager.logger.flush()  # Ensure logs are flushed
 
   log_file_path = f"simulationLog_{NODE_TYPE}.txt"
 
@@ -210,7 +215,7 @@ def test_message_complexity(node_setup):
   ]
 
   run_scenario(manager, scenario, t=10)
-  time.sleep(1)  # Ensure logs are flushed
+  manager.logger.flush()  # Ensure logs are flushed
 
   logs = get_message_log(f"simulationLog_{NODE_TYPE}.txt", 6)  # 3 sends + 3 receives
 
@@ -243,8 +248,9 @@ def test_space_complexity(node_setup):
   print(f"Average space usage for {NODE_TYPE} clocks: {avg_space} bytes")
 
   N = len(manager.nodes)
-  expected_size = sys.getsizeof([0]*N)
+  expected_size = sys.getsizeof(VectorClock(N))  # One 4 byte entry per node
   assert avg_space == expected_size, "Vector clock space usage too small, expected O(N) complexity."
+  assert sys.getsizeof(VectorClock(2 * N)) - expected_size == N * 4, "Vector clock should grow by 4 bytes per node."
 
 # Only for vector clocks
 def test_partial_ordering(node_setup):
@@ -261,3 +267,40 @@ def test_partial_ordering(node_setup):
   n2.local_event()  # N2: [0,1]
 
   assert not is_vector_comparable(n1.vector_Clock, n2.vector_Clock), "Vector clocks should be concurrent but are comparable."
+
+
+def test_differential_sends_leave_in_stamp_order():
+  """A second send from another thread is not stamped while the first is still on its way to the transport."""
+  transport = GatedTransport()
+  sender = VectorClockNode(1, [1, 2, 3], NullLogger(), differential=True, transport=transport)
+  receiver = VectorClockNode(2, [1, 2, 3], NullLogger(), differential=True)
+  sender.local_event()
+  first = threading.Thread(target=sender.send, args=(2,))
+  first.start()
+  assert transport.entered.wait(5.0)
+  second = threading.Thread(target=sender.send, args=(2,))
+  second.start()
+  second.join(0.2)
+  assert second.is_alive() and sender.vector_Clock[0] == 2  # Waiting to stamp, not on the wire
+
+  transport.gate.set()
+  first.join(5.0)
+  second.join(5.0)
+  assert [dict(m.clock_diff)[0] for m in transport.sent] == [2, 3]
+  for message in transport.sent:  # Over a FIFO link, in the order the transport took them
+    receiver.deliver_message(message)
+  assert receiver.vector_Clock.tolist() == [3, 2, 0]  # Dominates the clock of the last send
+
+
+def test_send_logged_under_state_lock():
+  """The clock of a send is snapshotted while the processor thread cannot update it."""
+  logger = LockCheckingLogger()
+  transport = GatedTransport()
+  transport.gate.set()
+  node = VectorClockNode(1, [1, 2, 3], logger, transport=transport)
+  logger.nodes[1] = node
+  node.send(2)
+  node.broadcast("CONTACT")
+  node.deliver_message(VectorMessage("CONTACT", 2, 1, [0, 4, 0]))
+  sends = [(locked, clock.tolist()) for event_type, locked, clock in logger.events if event_type == "SEND_MESSAGE"]
+  assert sends == [(True, [1, 0, 0]), (True, [2, 0, 0])]  # Not changed by the receive that followed
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+# src/systemTest_VECTORCLOCK.py
+
+"""
+System Test for the compact vector clock
+----------------------------------------
+Checks VectorClock on the array and the NumPy backend: copy-on-write
+snapshots, clocks wrapping a received frame without copying it, merge() and
+merge_entries() returning the indices that increased, and the switch between
+the backends at NUMPY_MIN_SIZE entries.
+"""
+
+
+# autopep8: off
+import struct
+import pytest
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.Vector_clocks import vectorClock
+from src.Vector_clocks.vectorClock import VectorClock, NUMPY_MIN_SIZE
+# autopep8: on
+
+BACKENDS = ["array", pytest.param("numpy", marks=pytest.mark.skipif(vectorClock.np is None, reason="NumPy is not installed"))]
+
+# --- Tests --------------------------------------------------------------------
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_snapshot_copy_on_write(backend):
+  clock = VectorClock.from_entries([1, 2, 3], backend)
+  snapshot = clock.snapshot()
+  assert snapshot == [1, 2, 3] and snapshot.backend == backend
+
+  clock.increment(0)
+  assert clock == [2, 2, 3] and snapshot == [1, 2, 3]  # The first writer copied the storage
+  snapshot[2] = 9
+  assert clock == [2, 2, 3] and snapshot == [1, 2, 9]
+
+  copy = clock.copy()
+  copy.assign([0, 1], 0)
+  assert clock == [2, 2, 3] and copy == [0, 0, 3]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_from_buffer_aliases_the_frame(backend):
+  frame = bytearray(b"head" + struct.pack("<4I", 5, 0, 7, 1))
+  clock = VectorClock.from_buffer(frame, 4, 4, backend)
+  assert clock == [5, 0, 7, 1] and clock.backend == backend
+
+  struct.pack_into("<I", frame, 8, 3)  # Entry 1, seen through the clock: no copy was made
+  assert clock[1] == 3
+
+  assert clock.increment(3) == 2  # The first change copies the entries out of the frame
+  assert clock == [5, 3, 7, 2]
+  assert struct.unpack_from("<4I", frame, 4) == (5, 3, 7, 1)
+  struct.pack_into("<I", frame, 4, 0)
+  assert clock[0] == 5
+
+  assert bytes(VectorClock.from_entries([1, 2], backend).buffer()) == struct.pack("<2I", 1, 2)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_merge_returns_changed_indices(backend):
+  clock = VectorClock.from_entries([3, 0, 5, 1], backend)
+  snapshot = clock.snapshot()
+  assert clock.merge([1, 0, 5, 0]) == []
+  assert clock.merge(VectorClock.from_entries([4, 2, 5, 0], backend)) == [0, 1]
+  assert clock == [4, 2, 5, 1] and snapshot == [3, 0, 5, 1]
+  with pytest.raises(ValueError):
+    clock.merge([1, 2])
+
+  assert clock.merge_entries([(2, 4), (3, 6), (0, 9)]) == [3, 0]
+  assert clock.merge_entries([]) == [] and clock.merge_entries([(1, 2)]) == []
+  assert clock == [9, 2, 5, 6]
+  assert clock.indices_above(5) == [0, 3]
+  assert clock.pairs([1, 3]) == [(1, 2), (3, 6)]
+
+
+def test_backend_switch_at_numpy_min_size():
+  large = "numpy" if vectorClock.np is not None else "array"
+  assert VectorClock(NUMPY_MIN_SIZE - 1).backend == "array"
+  assert VectorClock(NUMPY_MIN_SIZE).backend == large
+  assert VectorClock.from_entries(range(NUMPY_MIN_SIZE)).backend == large
+  frame = struct.pack(f"<{NUMPY_MIN_SIZE}I", *range(NUMPY_MIN_SIZE))
+  clock = VectorClock.from_buffer(frame, 0, NUMPY_MIN_SIZE)
+  assert clock.backend == large and clock.tolist() == list(range(NUMPY_MIN_SIZE))
+
+  small = VectorClock.from_entries([0] * 4)
+  assert small.merge(VectorClock.from_entries([1, 0, 2, 0], large)) == [0, 2]  # Clocks of either backend merge
+  if vectorClock.np is None:
+    with pytest.raises(ValueError):
+      VectorClock(4, "numpy")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+
+# src/systemTest_WIRECODEC.py
+
+"""
+System Test for the binary wire format
+--------------------------------------
+Checks that Lamport and vector messages survive an encode/decode round trip,
+and that truncated payloads, unknown wire versions and message types that are
+not valid UTF-8 raise WireFormatError, also when they reach a node's listener.
+"""
+
+
+# autopep8: off
+import time
+import pytest
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.simulationManager import SimulationManager
+from src.eventLogger import NullLogger
+from src.connectionPool import ConnectionPool
+from src.messageFraming import encode_frame
+from src.Lamport_timestamps.lamportMessage import LamportMessage
+from src.Vector_clocks.vectorMessage import VectorMessage
+from src import wireCodec
+# autopep8: on
+
+MESSAGES = [
+    LamportMessage("CONTACT", 1, 2, 42),
+    LamportMessage("", 7, 3, 2 ** 63),
+    VectorMessage("CONTACT", 2, 1, [3, 0, 1, 9]),
+    VectorMessage("CONTACT", 2, 1, None, clock_diff=[(0, 3), (3, 9)]),
+    VectorMessage("CONTACT", 2, 1, [1, 0, 0], causal_clock=[0, 0, 0]),
+]
+
+# --- Utility helpers ---------------------------------------------------------
+
+
+def wait_until(predicate, timeout=5.0):
+  deadline = time.monotonic() + timeout
+  while time.monotonic() < deadline:
+    if predicate():
+      return True
+    time.sleep(0.01)
+  return predicate()
+
+
+# --- Tests --------------------------------------------------------------------
+
+@pytest.mark.parametrize("message", MESSAGES)
+def test_roundtrip(message):
+  data = message.encode()
+  decoded = type(message).decode(data)
+  assert (decoded.msg_type, decoded.sender_id, decoded.receiver_id) == (message.msg_type, message.sender_id, message.receiver_id)
+  if isinstance(message, LamportMessage):
+    assert decoded.timestamp == message.timestamp
+  elif message.clock_diff is not None:
+    assert list(decoded.clock_diff) == list(message.clock_diff)
+  else:
+    assert list(decoded.vector_clock) == list(message.vector_clock)
+    assert decoded.causal_clock == message.causal_clock
+  assert wireCodec.peek_route(data) == (message.sender_id, message.receiver_id)
+
+
+@pytest.mark.parametrize("message", MESSAGES)
+def test_truncated(message):
+  data = message.encode()
+  for length in range(len(data)):
+    with pytest.raises(wireCodec.WireFormatError):
+      type(message).decode(data[:length])
+
+
+def test_bad_version():
+  data = bytearray(MESSAGES[0].encode())
+  data[0] = wireCodec.WIRE_VERSION + 1
+  with pytest.raises(wireCodec.WireFormatError):
+    LamportMessage.decode(bytes(data))
+  with pytest.raises(wireCodec.WireFormatError):
+    wireCodec.peek_route(bytes(data))
+
+
+def test_bad_utf8_and_type_length():
+  data = bytearray(MESSAGES[0].encode())
+  data[wireCodec.HEADER.size] = 0xFF  # First byte of "CONTACT"
+  with pytest.raises(wireCodec.WireFormatError):
+    LamportMessage.decode(bytes(data))
+
+  data = bytearray(MESSAGES[0].encode())
+  data[3] = 255  # type_len far past the end of the payload
+  with pytest.raises(wireCodec.WireFormatError):
+    LamportMessage.decode(bytes(data))
+  with pytest.raises(wireCodec.WireFormatError):
+    wireCodec.pack_header(wireCodec.KIND_LAMPORT, "x" * 256, 1, 2)
+
+
+@pytest.mark.parametrize("RUNTIME", ["THREAD", "ASYNC"])
+def test_listener_survives_malformed_frame(RUNTIME):
+  manager = SimulationManager(2, "LAMPORT", logger=NullLogger(), RUNTIME=RUNTIME)
+  pool = ConnectionPool()
+  try:
+    corrupt = bytearray(LamportMessage("CONTACT", 1, 2, 5).encode())
+    corrupt[wireCodec.HEADER.size] = 0xFF
+    port = manager.ports.node_port(2)
+    pool.send(port, encode_frame(bytes(corrupt)))
+    pool.send(port, encode_frame(LamportMessage("CONTACT", 1, 2, 5).encode()))  # Same connection
+    node = manager.nodes[1]
+    assert wait_until(lambda: node.messages_Received == 1)
+    assert node.lamport_Clock == 6
+  finally:
+    pool.close()
+    manager.stop()
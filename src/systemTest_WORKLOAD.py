@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+
+# src/systemTest_WORKLOAD.py
+
+"""
+System Test for the workload generator
+--------------------------------------
+Drives Lamport nodes on the in-memory transport with each traffic pattern
+and checks the generated traffic, the pacing and quiescence detection.
+"""
+
+
+# autopep8: off
+import time
+import pytest
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.simulationManager import SimulationManager
+from src.workload import WorkloadGenerator
+# autopep8: on
+
+NUM_NODES = 5
+
+# --- Utility helpers ---------------------------------------------------------
+
+
+def received(manager):
+  return [n.messages_Received for n in manager.nodes]
+
+
+# --- Fixtures ----------------------------------------------------------------
+
+
+@pytest.fixture(scope="module")
+def manager():
+  manager = SimulationManager(NUM_NODES, "LAMPORT", TRANSPORT="MEMORY")
+  yield manager
+  manager.stop()
+
+
+# --- Tests --------------------------------------------------------------------
+
+def test_run_scenario_waits_for_delivery(manager):
+  """Each event of a scenario runs once the previous one was delivered, without fixed sleeps."""
+  clocks_before = [n.lamport_Clock for n in manager.nodes]
+  start = time.monotonic()
+  assert manager.run_scenario([(1, "SEND", 2), (2, "SEND", 3)])
+  assert time.monotonic() - start < 2.0  # Two deliveries of at most MAX_DELAY each
+  assert manager.quiescent()
+  assert manager.nodes[2].lamport_Clock > manager.nodes[1].lamport_Clock > clocks_before[1]
+
+
+def test_ring_and_all_to_all(manager):
+  before = received(manager)
+  stats = WorkloadGenerator(manager, pattern="ring", rate=1000).run(count=NUM_NODES)
+  assert stats["quiescent"] and stats["sends"] == NUM_NODES
+  assert [a - b for a, b in zip(received(manager), before)] == [1] * NUM_NODES
+
+  before = received(manager)
+  stats = WorkloadGenerator(manager, pattern="all-to-all", rate=1000).run(count=NUM_NODES * (NUM_NODES - 1))
+  assert stats["quiescent"]
+  assert [a - b for a, b in zip(received(manager), before)] == [NUM_NODES - 1] * NUM_NODES
+
+
+def test_hotspot_and_mix(manager):
+  before = received(manager)
+  stats = WorkloadGenerator(manager, pattern="hotspot", rate=2000, hotspot=3, hotspot_fraction=0.9, seed=1).run(count=200)
+  assert stats["quiescent"]
+  counts = [a - b for a, b in zip(received(manager), before)]
+  assert sum(counts) == 200 and counts[2] > 100
+
+  stats = WorkloadGenerator(manager, rate=2000, send_ratio=0.0).run(count=50)
+  assert stats["sends"] == 0 and stats["local_events"] == 50
+
+
+def test_pacing(manager):
+  """Events follow the target rate and a stopped generator ends promptly."""
+  stats = WorkloadGenerator(manager, pattern="poisson", rate=100, seed=2).run(count=50)
+  assert stats["quiescent"]
+  assert 0.5 * 100 < stats["achieved_rate"] < 1.5 * 100
+
+  generator = WorkloadGenerator(manager, rate=50)
+  generator.start(duration=30)
+  time.sleep(0.3)
+  start = time.monotonic()
+  stats = generator.stop()
+  assert time.monotonic() - start < 2.0
+  assert 0 < stats["events"] < 50
@@ -0,0 +1,219 @@
+#!/usr/bin python3
+
+# src/threadProfiling.py
+
+# Per-thread profiling of the thread runtime.
+#
+# cProfile only sees the thread that enabled it, so a profile taken from the
+# command line shows the main thread waiting in input(). A ThreadProfiler gives
+# every thread started through profiled() its own cProfile profiler, timed with
+# the thread's CPU time so that threads blocked in accept() or on a condition do
+# not dominate the report. Profiles are merged per role: node listeners and the
+# simulator's connection readers ("listener"), node processors ("processor"),
+# delay-queue schedulers ("scheduler") and forwarding threads ("forwarder").
+# With memory=True tracemalloc also records where memory was allocated since
+# profiling started; it is process wide, so that report is not split by role.
+#
+# Requires Python 3.11 or earlier. From 3.12 on cProfile is built on
+# sys.monitoring, which allows one profiler per interpreter, so threads cannot
+# run their own; ThreadProfiler raises RuntimeError there instead of profiling
+# some threads and silently leaving out the rest.
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+
+ROLES = ("listener", "processor", "scheduler", "forwarder")
+PER_THREAD_PROFILING = sys.version_info < (3, 12)  # One cProfile profiler per thread, see above
+MEMORY_SITES = 50  # Allocation sites kept per process for the memory report
+# Allocations of the profiler itself and of the import machinery are left out
+MEMORY_FILTERS = (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+                  tracemalloc.Filter(False, "<unknown>"))
+
+
+def profiled(profiler, role, target):
+  """`target` wrapped to run under `profiler` as a thread of `role`, or `target` itself without a profiler."""
+  return target if profiler is None else profiler.wrap(role, target)
+
+
+class _Snapshot:
+  """pstats input taken from a cProfile profiler that may still be running in its thread.
+
+  pstats.Stats(profile) would disable the profiler, and only its own thread can
+  do that, so the entries are read with getstats() and converted like
+  cProfile.Profile.snapshot_stats() does. Calls that have not returned yet,
+  such as the thread's own loop, are only counted once the thread ends.
+  """
+
+  def __init__(self, profile):
+    self.getstats = profile.getstats
+    cProfile.Profile.snapshot_stats(self)
+
+  def create_stats(self):
+    pass  # Called by pstats.Stats before it reads self.stats
+
+
+class _Stats:
+  """pstats input for an already converted stats dict."""
+
+  def __init__(self, stats):
+    self.stats = dict(stats)
+
+  def create_stats(self):
+    pass
+
+
+def _add_stats(target, stats):
+  """Adds the pstats dict `stats` to `target`, function by function."""
+  for func, stat in stats.items():
+    old = target.get(func)
+    target[func] = stat if old is None else pstats.add_func_stats(old, stat)
+
+
+class ThreadProfiler:
+  """cProfile profilers for the threads of a simulation, merged per role.
+
+  Threads that finished are merged when they end; threads still running are
+  read when a report is asked for, so reports are available at any time.
+  Profilers of worker processes are merged into the manager's with merge().
+  """
+
+  def __init__(self, memory=False, frames=1):
+    if not PER_THREAD_PROFILING:
+      raise RuntimeError(f"Thread profiling needs one cProfile profiler per thread, which Python {sys.version_info.major}.{sys.version_info.minor} "
+                         "does not support; use Python 3.11 or earlier")
+    self._lock = threading.Lock()
+    self._finished = {role: {} for role in ROLES}  # role -> pstats dict of the threads that ended
+    self._active = {}  # cProfile.Profile -> role of a running thread
+    self.threads = {role: 0 for role in ROLES}  # Threads profiled per role
+    self._memory_sites = {}  # site -> [size_diff, size, count_diff] merged from other processes
+    self.memory = memory
+    self._started_tracemalloc = False
+    self._baseline = None
+    if memory:
+      if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+        self._started_tracemalloc = True
+      self._baseline = tracemalloc.take_snapshot().filter_traces(MEMORY_FILTERS)
+
+  def __getstate__(self):
+    return {"_finished": self.stats_dicts(), "threads": dict(self.threads),
+            "_memory_sites": {site: [size_diff, size, count_diff] for site, size_diff, size, count_diff in self.memory_sites()}}
+
+  def __setstate__(self, state):
+    self.__init__()
+    self.__dict__.update(state)
+
+  def wrap(self, role, target):
+    """`target` running under its own profiler, merged into `role` when it returns."""
+    if role not in ROLES:
+      raise ValueError(f"Unknown thread role {role}, expected one of {ROLES}")
+
+    def run(*args, **kwargs):
+      profile = cProfile.Profile(time.thread_time)  # CPU time of this thread only
+      try:
+        profile.enable()
+      except ValueError as e:
+        raise RuntimeError(f"Cannot profile {role} thread {threading.current_thread().name}: {e}") from e
+      with self._lock:
+        self._active[profile] = role
+        self.threads[role] += 1
+      try:
+        return target(*args, **kwargs)
+      finally:
+        profile.disable()
+        stats = _Snapshot(profile).stats
+        with self._lock:
+          del self._active[profile]
+          _add_stats(self._finished[role], stats)
+    return run
+
+  def stats_dicts(self):
+    """role -> pstats dict of every thread profiled so far, running ones included."""
+    with self._lock:
+      merged = {role: dict(stats) for role, stats in self._finished.items()}
+      active = list(self._active.items())
+    for profile, role in active:
+      _add_stats(merged[role], _Snapshot(profile).stats)
+    return merged
+
+  def stats(self, role, stream=None):
+    """pstats.Stats of the threads of `role`, None if none of them was profiled yet."""
+    stats = self.stats_dicts()[role]
+    return pstats.Stats(_Stats(stats), stream=stream) if stats else None
+
+  def merge(self, other):
+    """Adds the profiles of another profiler, e.g. one of a worker process, running threads included."""
+    state = other.__getstate__()
+    with self._lock:
+      for role, stats in state["_finished"].items():
+        _add_stats(self._finished[role], stats)
+        self.threads[role] += state["threads"][role]
+      for site, (size_diff, size, count_diff) in state["_memory_sites"].items():
+        row = self._memory_sites.setdefault(site, [0, 0, 0])
+        row[0] += size_diff
+        row[1] += size
+        row[2] += count_diff
+
+  def memory_sites(self, limit=MEMORY_SITES):
+    """[(site, size_diff, size, count_diff)] of the sites that allocated the most since profiling started.
+
+    Sizes are in bytes; sites are "file:line" of the allocating line.
+    """
+    sites = {site: list(row) for site, row in self._memory_sites.items()}
+    if self.memory and tracemalloc.is_tracing():
+      snapshot = tracemalloc.take_snapshot().filter_traces(MEMORY_FILTERS)
+      for stat in snapshot.compare_to(self._baseline, "lineno"):
+        frame = stat.traceback[0]
+        row = sites.setdefault(f"{frame.filename}:{frame.lineno}", [0, 0, 0])
+        row[0] += stat.size_diff
+        row[1] += stat.size
+        row[2] += stat.count_diff
+    ranked = sorted(sites.items(), key=lambda item: item[1][0], reverse=True)
+    return [(site, size_diff, size, count_diff) for site, (size_diff, size, count_diff) in ranked[:limit]]
+
+  def report(self, roles=ROLES, sort="cumulative", limit=20):
+    """Text report of the `limit` top functions of every role, by `sort`, and the top allocation sites."""
+    out = io.StringIO()
+    for role in roles:
+      out.write(f"=== {role}: {self.threads[role]} threads ===\n")
+      stats = self.stats(role, stream=out)
+      if stats is None:
+        out.write("No profiled threads.\n\n")
+        continue
+      stats.sort_stats(sort).print_stats(limit)
+    sites = self.memory_sites(limit)
+    if sites:
+      out.write("=== memory: allocated since profiling started ===\n")
+      for site, size_diff, size, count_diff in sites:
+        out.write(f"{size_diff / 1024:+10.1f} KiB {count_diff:+8d} blocks {size / 1024:10.1f} KiB  {site}\n")
+    return out.getvalue()
+
+  def dump(self, directory, sort="cumulative", limit=20):
+    """Writes `<role>.prof` for every profiled role (readable with pstats) and report.txt to `directory`.
+
+    Returns the paths written.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for role, stats in self.stats_dicts().items():
+      if stats:
+        path = os.path.join(directory, f"{role}.prof")
+        pstats.Stats(_Stats(stats)).dump_stats(path)
+        paths.append(path)
+    path = os.path.join(directory, "report.txt")
+    with open(path, "w") as f:
+      f.write(self.report(sort=sort, limit=limit))
+    paths.append(path)
+    return paths
+
+  def stop(self):
+    """Stops tracemalloc if this profiler started it."""
+    if self._started_tracemalloc:
+      tracemalloc.stop()
+      self._started_tracemalloc = False
+      self.memory = False
@@ -0,0 +1,143 @@
+#!/usr/bin python3
+
+# src/transport.py
+
+# Pluggable transports between the nodes and the network simulator.
+#
+# TcpTransport is the socket path used for multi-process runs: messages are encoded,
+# framed and sent over persistent connections. InMemoryTransport is for simulations
+# where every node lives in the same process as the simulator: message objects are
+# handed to the simulator's delay scheduler and then put straight into the target
+# node's queue, without serialization or sockets.
+from abc import ABC, abstractmethod
+import socket
+import threading
+
+from src.networkSimulation import SIM_PORT
+from src.connectionPool import ConnectionPool
+from src.messageFraming import encode_frame, read_frames, FrameError
+from src.wireCodec import WireFormatError, pack_multicast, batch_payloads
+from src.threadProfiling import profiled
+
+
+class Transport(ABC):
+  """Moves messages from a node to the simulator and delivered messages into the node."""
+
+  @abstractmethod
+  def send(self, node, message):
+    pass
+
+  @abstractmethod
+  def listen(self, node):
+    pass
+
+  @abstractmethod
+  def close(self, node):
+    pass
+
+  @abstractmethod
+  def multicast(self, node, message, targets):
+    """Sends one message to every node in `targets`; the message is addressed to MULTICAST_RECEIVER."""
+    pass
+
+
+class TcpTransport(Transport):
+  """Socket transport: one persistent connection to the simulator and a listening server per node."""
+
+  def __init__(self, sim_port=SIM_PORT, registry=None):
+    # With a PortRegistry the simulator's port is looked up there and the node's port published
+    self.registry = registry
+    self.sim_port = sim_port if registry is None else registry.sim_port
+    self.port = None  # Bound by listen()
+    self.sim_Connection = ConnectionPool()
+    self.server = None
+    self.listening = threading.Event()  # Set once the node's server accepts connections
+
+  def send(self, node, message):
+    """Encodes and frames the message and writes it on the connection to the simulator."""
+    self.sim_Connection.send(self.sim_port, encode_frame(message.encode()))
+
+  def multicast(self, node, message, targets):
+    """Encodes the message once and sends a single multicast envelope that the simulator fans out."""
+    envelope = pack_multicast(node.node_Id, targets, message.encode())
+    self.sim_Connection.send(self.sim_port, encode_frame(envelope))
+
+  def listen(self, node):
+    """Accepts simulator connections and queues the messages read from them, until the node stops."""
+    self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if self.registry is None:
+      self.server.bind(("localhost", node.PORT_BASE + node.node_Id))
+    else:
+      self.server.bind(("localhost", self.registry.node_bind_port(node.node_Id)))
+    self.server.listen()
+    self.server.settimeout(1.0)
+    self.port = self.server.getsockname()[1]
+    if self.registry is not None:
+      self.registry.register(node.node_Id, self.port)
+    self.listening.set()
+
+    print(f"Node {node.node_Id} listening on port {self.port}")
+
+    while node.is_alive:
+      try:
+        conn, _ = self.server.accept()
+      except socket.timeout:
+        continue
+      except OSError:
+        break
+      # The simulator keeps its connection open, so each one gets a reader thread
+      threading.Thread(target=profiled(node.profiler, "listener", self._serve_connection), args=(node, conn),
+                       daemon=True).start()
+
+  def _serve_connection(self, node, conn):
+    """Reads length-prefixed messages from a persistent simulator connection until it closes."""
+    try:
+      with conn:
+        for frames in read_frames(conn):
+          batch = []
+          for frame in frames:
+            try:
+              payloads = batch_payloads(frame)  # A frame may carry a batch coalesced by the simulator
+            except WireFormatError as e:
+              print(f"Node {node.node_Id} dropped malformed batch: {e}")
+              continue
+            for payload in payloads:
+              try:
+                batch.append(node._decode_message(payload))
+              except WireFormatError as e:
+                print(f"Node {node.node_Id} dropped malformed message: {e}")
+          # Everything decoded from one read is queued in a single step
+          node.enqueue_messages(batch)
+    except (OSError, FrameError) as e:
+      print(f"Node {node.node_Id} connection error: {e}")
+
+  def close(self, node):
+    self.sim_Connection.close()
+    try:
+      self.server.shutdown(socket.SHUT_RDWR)
+      self.server.close()
+    except Exception as e:
+      pass
+
+
+class InMemoryTransport(Transport):
+  """Zero-socket transport for nodes running in the same process as the simulator."""
+
+  def __init__(self, simulator):
+    self.simulator = simulator
+
+  def send(self, node, message):
+    """Schedules the message object itself; the simulator enqueues it at the target when due."""
+    self.simulator.schedule_message(message)
+
+  def multicast(self, node, message, targets):
+    """Schedules the same message object once per target."""
+    self.simulator.schedule_multicast(message, targets)
+
+  def listen(self, node):
+    """Registers the node so the simulator can deliver into its queue; nothing to wait for."""
+    self.simulator.attach_node(node)
+
+  def close(self, node):
+    self.simulator.detach_node(node)
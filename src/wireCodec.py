@@ -0,0 +1,224 @@
+#!/usr/bin python3
+
+# src/wireCodec.py
+
+# Compact binary wire format for LamportMessage and VectorMessage.
+#
+# Layout (little-endian):
+#   header   version u8 | kind u8 | flags u8 | type_len u8 | sender u32 | receiver u32
+#   msg_type type_len bytes of utf-8
+#   body     LAMPORT: timestamp u64
+#            VECTOR:  entry count u32 followed by the packed u32 clock entries
+#            VECTOR_DIFF: pair count u32 followed by (index u32, value u32) pairs
+#   causal   only with FLAG_CAUSAL: the CBCAST timestamp, packed like a VECTOR body
+#   trace    only with FLAG_TRACE: stamp count u64 timestamps | trace id u64 | stamp count u8
+#            Kept at the very end, so the simulator can add stamps without decoding.
+#
+# A multicast envelope carries one encoded message for several receivers:
+#   header   version u8 | MULTICAST u8 | 0 u8 | 0 u8 | sender u32 | MULTICAST_RECEIVER u32
+#   targets  target count u32 followed by the u32 target ids
+#   message  the encoded message, addressed to MULTICAST_RECEIVER
+#
+# A batch carries every message the simulator delivers to one node in one tick:
+#   header   version u8 | BATCH u8 | 0 u8 | 0 u8 | 0 u32 | receiver u32
+#   messages message count u32 followed by (length u32, encoded message) per message
+#
+# The simulator only needs the sender and receiver, which sit at a fixed offset and
+# can be read with peek_route() without decoding the rest of the message.
+import struct
+
+WIRE_VERSION = 1
+
+KIND_LAMPORT = 1
+KIND_VECTOR = 2
+KIND_VECTOR_DIFF = 3
+KIND_MULTICAST = 4
+KIND_BATCH = 5
+
+FLAG_CAUSAL = 0x01  # The body is followed by a causal-delivery timestamp
+FLAG_TRACE = 0x02  # The message ends with a latency trace trailer
+
+MULTICAST_RECEIVER = 0  # Receiver id of a message sent to several nodes at once
+BATCH_SENDER = 0  # Sender id of a batch, whose messages may come from several nodes
+
+HEADER = struct.Struct("<BBBBII")
+LAMPORT_BODY = struct.Struct("<Q")
+VECTOR_COUNT = struct.Struct("<I")
+CLOCK_ENTRY_SIZE = 4
+CLOCK_PAIR_SIZE = 8
+
+TRACE_TAIL = struct.Struct("<QB")  # trace id, stamp count
+TRACE_STAMP_SIZE = 8
+
+ROUTE = struct.Struct("<II")
+_SENDER_OFFSET = 4
+
+
+class WireFormatError(ValueError):
+  """Raised when a payload is not a valid message for this wire version."""
+
+
+def pack_header(kind, msg_type, sender_id, receiver_id, flags=0):
+  """Packs the fixed header followed by the message type string."""
+  type_bytes = msg_type.encode("utf-8")
+  if len(type_bytes) > 255:
+    raise WireFormatError(f"Message type '{msg_type}' is longer than 255 bytes")
+  return HEADER.pack(WIRE_VERSION, kind, flags, len(type_bytes), sender_id, receiver_id) + type_bytes
+
+
+def unpack_header(data, expected_kind=None):
+  """Returns (kind, flags, msg_type, sender_id, receiver_id, body_offset) for a payload."""
+  if len(data) < HEADER.size:
+    raise WireFormatError(f"Payload of {len(data)} bytes is shorter than the header")
+  version, kind, flags, type_len, sender_id, receiver_id = HEADER.unpack_from(data)
+  if version != WIRE_VERSION:
+    raise WireFormatError(f"Unsupported wire version {version}")
+  if expected_kind is not None and kind != expected_kind:
+    raise WireFormatError(f"Expected message kind {expected_kind}, got {kind}")
+  body_offset = HEADER.size + type_len
+  if body_offset > len(data):
+    raise WireFormatError(f"Message type of {type_len} bytes runs past the end of a {len(data)} byte payload")
+  try:
+    msg_type = bytes(data[HEADER.size:body_offset]).decode("utf-8")
+  except UnicodeDecodeError as e:
+    raise WireFormatError(f"Message type is not valid UTF-8: {e}") from e
+  return kind, flags, msg_type, sender_id, receiver_id, body_offset
+
+
+def peek_receiver(data):
+  """Reads the receiver id of an encoded message without decoding it."""
+  return peek_route(data)[1]
+
+
+def peek_route(data):
+  """Reads (sender_id, receiver_id) of an encoded message without decoding it."""
+  if len(data) < HEADER.size or data[0] != WIRE_VERSION:
+    raise WireFormatError("Not a valid encoded message")
+  return ROUTE.unpack_from(data, _SENDER_OFFSET)
+
+
+def is_multicast(data):
+  """True if `data` is a multicast envelope rather than a single message."""
+  return len(data) > 1 and data[1] == KIND_MULTICAST
+
+
+def pack_multicast(sender_id, targets, payload):
+  """Wraps an encoded message in an envelope addressed to every node in `targets`."""
+  return b"".join((HEADER.pack(WIRE_VERSION, KIND_MULTICAST, 0, 0, sender_id, MULTICAST_RECEIVER),
+                   VECTOR_COUNT.pack(len(targets)), struct.pack(f"<{len(targets)}I", *targets), payload))
+
+
+def unpack_multicast(data):
+  """Returns (sender_id, targets, payload) of a multicast envelope; the payload is shared by all targets."""
+  kind, _, _, sender_id, _, offset = unpack_header(data, KIND_MULTICAST)
+  try:
+    (count,) = VECTOR_COUNT.unpack_from(data, offset)
+    offset += VECTOR_COUNT.size
+    targets = struct.unpack_from(f"<{count}I", data, offset)
+  except struct.error as e:
+    raise WireFormatError(f"Truncated multicast envelope: {e}") from e
+  return sender_id, targets, bytes(data[offset + count * CLOCK_ENTRY_SIZE:])
+
+
+def pack_batch(receiver_id, payloads):
+  """Packs encoded messages for `receiver_id` into one batch; a single message is returned as is."""
+  if len(payloads) == 1:
+    return payloads[0]
+  parts = [HEADER.pack(WIRE_VERSION, KIND_BATCH, 0, 0, BATCH_SENDER, receiver_id), VECTOR_COUNT.pack(len(payloads))]
+  for payload in payloads:
+    parts.append(VECTOR_COUNT.pack(len(payload)))
+    parts.append(payload)
+  return b"".join(parts)
+
+
+def batch_payloads(data):
+  """Encoded messages carried by `data`: the messages of a batch in order, or `data` itself."""
+  if len(data) < 2 or data[1] != KIND_BATCH:
+    return [data]
+  _, _, _, _, _, offset = unpack_header(data, KIND_BATCH)
+  payloads = []
+  try:
+    (count,) = VECTOR_COUNT.unpack_from(data, offset)
+    offset += VECTOR_COUNT.size
+    for _ in range(count):
+      (length,) = VECTOR_COUNT.unpack_from(data, offset)
+      offset += VECTOR_COUNT.size
+      if offset + length > len(data):
+        raise WireFormatError("Truncated batch")
+      payloads.append(bytes(data[offset:offset + length]))
+      offset += length
+  except struct.error as e:
+    raise WireFormatError(f"Truncated batch: {e}") from e
+  return payloads
+
+
+def pack_clock(clock):
+  """Packs a vector clock as a u32 entry count followed by the raw u32 entries.
+
+  Clocks exposing buffer() (VectorClock) already hold their entries as
+  little-endian u32 values and are copied into the frame as they are.
+  """
+  if hasattr(clock, "buffer"):
+    return b"".join((VECTOR_COUNT.pack(len(clock)), clock.buffer()))
+  return VECTOR_COUNT.pack(len(clock)) + struct.pack(f"<{len(clock)}I", *clock)
+
+
+def clock_bounds(data, offset):
+  """Locates a vector clock written by pack_clock, returns (count, entries_offset, next_offset)."""
+  (count,) = VECTOR_COUNT.unpack_from(data, offset)
+  offset += VECTOR_COUNT.size
+  end = offset + count * CLOCK_ENTRY_SIZE
+  if end > len(data):
+    raise WireFormatError(f"Vector clock of {count} entries is truncated")
+  return count, offset, end
+
+
+def unpack_clock(data, offset):
+  """Unpacks a vector clock written by pack_clock, returns (clock, next_offset)."""
+  count, offset, end = clock_bounds(data, offset)
+  return list(struct.unpack_from(f"<{count}I", data, offset)), end
+
+
+def pack_clock_diff(pairs):
+  """Packs differential (index, value) clock entries as a u32 pair count followed by the pairs."""
+  flat = [item for pair in pairs for item in pair]
+  return VECTOR_COUNT.pack(len(pairs)) + struct.pack(f"<{len(flat)}I", *flat)
+
+
+def unpack_clock_diff(data, offset):
+  """Unpacks pairs written by pack_clock_diff, returns (pairs, next_offset)."""
+  (count,) = VECTOR_COUNT.unpack_from(data, offset)
+  offset += VECTOR_COUNT.size
+  end = offset + count * CLOCK_PAIR_SIZE
+  if end > len(data):
+    raise WireFormatError(f"Clock diff of {count} pairs is truncated")
+  flat = struct.unpack_from(f"<{count * 2}I", data, offset)
+  return list(zip(flat[0::2], flat[1::2])), end
+
+
+def pack_trace(trace_id, stamps):
+  """Packs a trace trailer: the stage timestamps, the trace id and the number of timestamps."""
+  return struct.pack(f"<{len(stamps)}Q", *stamps) + TRACE_TAIL.pack(trace_id, len(stamps))
+
+
+def is_traced(data):
+  """True if `data` is an encoded message carrying a trace trailer."""
+  return len(data) > 2 and data[2] & FLAG_TRACE != 0
+
+
+def append_trace_stamps(data, *stamps):
+  """Returns a traced encoded message with `stamps` added to its trailer."""
+  trace_id, count = TRACE_TAIL.unpack_from(data, len(data) - TRACE_TAIL.size)
+  return b"".join((data[:-TRACE_TAIL.size], struct.pack(f"<{len(stamps)}Q", *stamps),
+                   TRACE_TAIL.pack(trace_id, count + len(stamps))))
+
+
+def unpack_trace(data):
+  """Returns (trace_id, stamps) of a traced encoded message."""
+  if len(data) < HEADER.size + TRACE_TAIL.size:
+    raise WireFormatError("Traced message is too short for its trailer")
+  trace_id, count = TRACE_TAIL.unpack_from(data, len(data) - TRACE_TAIL.size)
+  start = len(data) - TRACE_TAIL.size - count * TRACE_STAMP_SIZE
+  if start < HEADER.size:
+    raise WireFormatError(f"Trace trailer of {count} stamps is truncated")
+  return trace_id, list(struct.unpack_from(f"<{count}Q", data, start))
@@ -0,0 +1,146 @@
+#!/usr/bin python3
+
+# src/workload.py
+
+# Synthetic traffic for the nodes of a SimulationManager
+import random
+import threading
+import time
+
+PATTERNS = ("poisson", "all-to-all", "ring", "hotspot")
+
+
+class WorkloadGenerator:
+  """Drives the nodes of a SimulationManager at a target event rate.
+
+  Patterns:
+    poisson     random sender and receiver, exponential inter-arrival times
+    all-to-all  every node sends to every other node in turn
+    ring        node k sends to node k + 1, the last node to node 1
+    hotspot     `hotspot_fraction` of the sends go to node `hotspot`
+
+  Each event is a send with probability `send_ratio` and a local event on the
+  sender otherwise. Events are paced against a schedule of deadlines rather
+  than a fixed sleep per event, so the time spent sending counts toward the
+  interval and a generator that falls behind catches up without sleeping.
+  """
+
+  def __init__(self, manager, pattern="poisson", rate=100.0, send_ratio=1.0,
+               hotspot=1, hotspot_fraction=0.8, seed=0):
+    if pattern not in PATTERNS:
+      raise ValueError(f"Unknown workload pattern {pattern}, expected one of {', '.join(PATTERNS)}")
+    if rate <= 0:
+      raise ValueError("The workload rate must be positive")
+    self.manager = manager
+    self.pattern = pattern
+    self.rate = rate
+    self.send_ratio = send_ratio
+    self.hotspot = hotspot
+    self.hotspot_fraction = hotspot_fraction
+    self.rng = random.Random(seed)
+    self._stop = threading.Event()
+    self._thread = None
+    self.stats = {}
+
+  # --- Events ------------------------------------------------------------------
+
+  def events(self):
+    """Endless (node_id, event_type, target_id) events of the pattern."""
+    rand = self.rng.random
+    num_nodes = len(self.manager.nodes)
+    for node_id, target_id in self._pairs(num_nodes):
+      if num_nodes > 1 and rand() < self.send_ratio:
+        yield node_id, "SEND", target_id
+      else:
+        yield node_id, "LOCAL_EVENT", None
+
+  def _pairs(self, num_nodes):
+    """Endless (sender, receiver) pairs of the pattern."""
+    rand = self.rng.random
+    if num_nodes < 2:
+      while True:
+        yield 1, None
+    if self.pattern == "all-to-all":
+      while True:
+        for node_id in range(1, num_nodes + 1):
+          for target_id in range(1, num_nodes + 1):
+            if target_id != node_id:
+              yield node_id, target_id
+    if self.pattern == "ring":
+      while True:
+        for node_id in range(1, num_nodes + 1):
+          yield node_id, node_id % num_nodes + 1
+    while True:
+      node_id = 1 + int(rand() * num_nodes)
+      if self.pattern == "hotspot" and node_id != self.hotspot and rand() < self.hotspot_fraction:
+        yield node_id, self.hotspot
+        continue
+      target_id = 1 + int(rand() * (num_nodes - 1))
+      target_id += target_id >= node_id  # Any node but the sender
+      yield node_id, target_id
+
+  def _interval(self):
+    if self.pattern == "poisson":
+      return self.rng.expovariate(self.rate)
+    return 1.0 / self.rate
+
+  # --- Running -----------------------------------------------------------------
+
+  def run(self, count=None, duration=None, quiesce=True, timeout=10.0):
+    """Generates events until `count` were run, `duration` seconds passed or stop() is called.
+
+    With `quiesce` the call returns once the simulation delivered every
+    message, waiting at most `timeout` seconds. Returns the run's stats.
+    """
+    self._stop.clear()
+    return self._run(count, duration, quiesce, timeout)
+
+  def _run(self, count, duration, quiesce, timeout):
+    if count is None and duration is None:
+      raise ValueError("A workload needs a count or a duration")
+    sends = local_events = 0
+    start = time.monotonic()
+    end = None if duration is None else start + duration
+    deadline = start
+    for node_id, event_type, target_id in self.events():
+      if count is not None and sends + local_events >= count:
+        break
+      delay = deadline - time.monotonic()
+      if delay > 0 and self._stop.wait(delay):
+        break
+      if self._stop.is_set() or (end is not None and time.monotonic() >= end):
+        break
+      self.manager.execute(node_id, event_type, target_id)
+      if event_type == "SEND":
+        sends += 1
+      else:
+        local_events += 1
+      deadline += self._interval()
+
+    elapsed = time.monotonic() - start
+    quiescent = self.manager.wait_for_quiescence(timeout) if quiesce else self.manager.quiescent()
+    self.stats = {
+        "pattern": self.pattern,
+        "events": sends + local_events,
+        "sends": sends,
+        "local_events": local_events,
+        "elapsed": elapsed,
+        "target_rate": self.rate,
+        "achieved_rate": (sends + local_events) / elapsed if elapsed > 0 else 0.0,
+        "quiescent": quiescent,
+    }
+    return self.stats
+
+  def start(self, count=None, duration=None):
+    """Runs the workload on a background thread until it ends or stop() is called."""
+    self._stop.clear()
+    self._thread = threading.Thread(target=self._run, args=(count, duration, True, 10.0), daemon=True)
+    self._thread.start()
+
+  def stop(self, timeout=None):
+    """Stops a running workload and waits for it to quiesce. Returns its stats."""
+    self._stop.set()
+    if self._thread is not None:
+      self._thread.join(timeout)
+      self._thread = None
+    return self.stats